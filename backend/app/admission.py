@@ -0,0 +1,147 @@
+"""
+Admission control for batch uploads
+
+Every endpoint that runs analyses on the shared scheduler admits its batch
+here first, so in_flight_files covers all of them.
+
+Estimates how long a new batch would wait behind the files already admitted,
+using the observed per-file service time and the worker count:
+
+    expected_wait_ms = in_flight_files / workers * per_file_ms
+
+A batch is admitted while the expected wait is within ADMISSION_MAX_WAIT_MS.
+Otherwise it waits up to ADMISSION_QUEUE_TIMEOUT_MS for the backlog to drain,
+then is shed with a Retry-After computed from the excess wait.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .scheduler import SCHEDULER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_MAX_WAIT_MS = float(os.getenv('ADMISSION_MAX_WAIT_MS', 30000))
+# How long an over-limit batch may wait for admission before it is shed (0 sheds immediately)
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', 0))
+# Per-file service time assumed until real files have been observed
+ADMISSION_INITIAL_FILE_MS = float(os.getenv('ADMISSION_INITIAL_FILE_MS', 5000))
+ADMISSION_EWMA_ALPHA = float(os.getenv('ADMISSION_EWMA_ALPHA', 0.2))
+
+
+class AdmissionTicket:
+    """An admitted batch; release it when the batch finishes"""
+
+    def __init__(self, files: int):
+        self.files = files
+        self.released = False
+
+
+class AdmissionController:
+    """Tracks in-flight files and per-file latency to admit or shed batches"""
+
+    def __init__(self, workers: int, max_wait_ms: float = ADMISSION_MAX_WAIT_MS,
+                 queue_timeout_ms: float = ADMISSION_QUEUE_TIMEOUT_MS):
+        self.workers = max(workers, 1)
+        self.max_wait_ms = max_wait_ms
+        self.queue_timeout_ms = queue_timeout_ms
+        self.per_file_ms = ADMISSION_INITIAL_FILE_MS
+        self.observed_files = 0
+        self.in_flight_files = 0
+        self.admitted = 0
+        self.admitted_after_wait = 0
+        self.shed = 0
+        self._cond = threading.Condition()
+
+    def observe_file(self, elapsed_ms: float):
+        """Fold one file's service time into the moving average"""
+        with self._cond:
+            if self.observed_files == 0:
+                self.per_file_ms = elapsed_ms
+            else:
+                self.per_file_ms += ADMISSION_EWMA_ALPHA * (elapsed_ms - self.per_file_ms)
+            self.observed_files += 1
+
+    def expected_wait_ms(self) -> float:
+        """Expected queueing delay for a batch admitted now; caller holds the lock"""
+        return self.in_flight_files / self.workers * self.per_file_ms
+
+    def try_admit(self, files: int) -> tuple:
+        """
+        Admit a batch of files, waiting up to the queue timeout if over the limit
+
+        Args:
+            files: Number of files in the batch
+
+        Returns:
+            Tuple of (ticket, retry_after_seconds); ticket is None when the batch is shed
+        """
+        deadline = time.monotonic() + self.queue_timeout_ms / 1000
+        with self._cond:
+            waited = False
+            # An idle server always admits, however large the batch
+            while self.in_flight_files and self.expected_wait_ms() > self.max_wait_ms:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.shed += 1
+                    excess_ms = self.expected_wait_ms() - self.max_wait_ms
+                    retry_after = max(1, math.ceil(excess_ms / 1000))
+                    logger.warning(f"🚦 Shedding batch of {files} files - expected wait "
+                                   f"{self.expected_wait_ms():.0f}ms, retry after {retry_after}s")
+                    return None, retry_after
+                waited = True
+                self._cond.wait(remaining)
+
+            self.in_flight_files += files
+            self.admitted += 1
+            if waited:
+                self.admitted_after_wait += 1
+            return AdmissionTicket(files), 0
+
+    def extend(self, ticket: AdmissionTicket, files: int):
+        """Add files to an admitted batch whose size was not known up front (archives)"""
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.files += files
+            self.in_flight_files += files
+
+    def release_files(self, ticket: AdmissionTicket, files: int):
+        """Return some of a batch's files to the pool as they finish, ahead of the rest"""
+        with self._cond:
+            if ticket.released:
+                return
+            files = min(files, ticket.files)
+            ticket.files -= files
+            self.in_flight_files -= files
+            self._cond.notify_all()
+
+    def release(self, ticket: Optional[AdmissionTicket]):
+        """Return a batch's files to the capacity pool"""
+        if ticket is None or ticket.released:
+            return
+        with self._cond:
+            ticket.released = True
+            self.in_flight_files -= ticket.files
+            self._cond.notify_all()
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "in_flight_files": self.in_flight_files,
+                "per_file_ms": round(self.per_file_ms, 1),
+                "observed_files": self.observed_files,
+                "expected_wait_ms": round(self.expected_wait_ms(), 1),
+                "max_wait_ms": self.max_wait_ms,
+                "queue_timeout_ms": self.queue_timeout_ms,
+                "admitted": self.admitted,
+                "admitted_after_wait": self.admitted_after_wait,
+                "shed": self.shed,
+            }
+
+
+admission = AdmissionController(SCHEDULER_WORKERS)
@@ -0,0 +1,226 @@
+"""
+Streaming score and latency analytics with constant-memory sketches
+
+Every completed analysis updates fixed-size histograms in place, so memory does
+not grow with history and reads never rescan past results:
+
+- Latencies go into log-linear (HDR-style) histograms with ~2% relative error
+- Match scores (integers 0-100) go into exact 101-bucket histograms, overall
+  and per job description (bounded LRU of job descriptions)
+- A ring of hourly buckets tracks score trends over time
+"""
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ANALYTICS_MAX_JDS = int(os.getenv('ANALYTICS_MAX_JDS', 200))
+ANALYTICS_TIME_BUCKETS = int(os.getenv('ANALYTICS_TIME_BUCKETS', 7 * 24))  # hourly buckets
+ANALYTICS_BUCKET_SECONDS = 3600
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram for positive values (milliseconds)
+
+    Bucket i covers [min_value * growth**i, min_value * growth**(i+1)), giving a
+    fixed relative error for any quantile with a fixed number of buckets.
+    """
+
+    def __init__(self, min_value: float = 0.1, max_value: float = 3_600_000.0, relative_error: float = 0.02):
+        self.min_value = min_value
+        self.growth = 1.0 + 2 * relative_error
+        self._log_growth = math.log(self.growth)
+        self.buckets = [0] * (int(math.log(max_value / min_value) / self._log_growth) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float):
+        value = max(float(value), 0.0)
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(int(math.log(value / self.min_value) / self._log_growth) + 1, len(self.buckets) - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen > rank:
+                if index == 0:
+                    return self.min_value
+                # Geometric midpoint of the bucket
+                return min(self.min_value * self.growth ** (index - 0.5), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        snap = {"count": self.count}
+        if self.count:
+            snap["mean"] = round(self.total / self.count, 1)
+            snap["max"] = round(self.max, 1)
+            for q in QUANTILES:
+                snap[f"p{int(q * 100)}"] = round(self.quantile(q), 1)
+        return snap
+
+
+class ScoreHistogram:
+    """Exact histogram of integer match scores 0-100 plus recommendation counts"""
+
+    def __init__(self):
+        self.buckets = [0] * 101
+        self.count = 0
+        self.total = 0
+        self.recommendations: Dict[str, int] = {}
+
+    def record(self, score: float, recommendation: Optional[str] = None):
+        score = int(min(max(round(score or 0), 0), 100))
+        self.buckets[score] += 1
+        self.count += 1
+        self.total += score
+        if recommendation:
+            self.recommendations[recommendation] = self.recommendations.get(recommendation, 0) + 1
+
+    def quantile(self, q: float) -> int:
+        rank = q * (self.count - 1)
+        seen = 0
+        for score, n in enumerate(self.buckets):
+            seen += n
+            if seen > rank:
+                return score
+        return 100
+
+    def snapshot(self) -> Dict[str, Any]:
+        snap = {"count": self.count}
+        if self.count:
+            snap["mean"] = round(self.total / self.count, 2)
+            for q in QUANTILES:
+                snap[f"p{int(q * 100)}"] = self.quantile(q)
+            # 10-point bands keep the distribution compact; the last band includes 100
+            snap["distribution"] = {f"{band}-{band + 9}": sum(self.buckets[band:band + 10]) for band in range(0, 90, 10)}
+            snap["distribution"]["90-100"] = sum(self.buckets[90:])
+            snap["recommendations"] = dict(self.recommendations)
+        return snap
+
+
+class AnalyticsRecorder:
+    """Thread-safe aggregate of all completed analyses"""
+
+    def __init__(self, max_jds: int = ANALYTICS_MAX_JDS, time_buckets: int = ANALYTICS_TIME_BUCKETS):
+        self.max_jds = max_jds
+        self.started_at = datetime.now().isoformat()
+        self.scores = ScoreHistogram()
+        self.processing_ms = LatencyHistogram()
+        self.extraction_ms = LatencyHistogram()
+        self.extraction_backends: Dict[str, int] = {}
+        self.errors = 0
+        self.counters: Dict[str, int] = {}
+        self._per_jd: "OrderedDict[str, ScoreHistogram]" = OrderedDict()
+        self._timeline = [None] * time_buckets
+        self._lock = threading.Lock()
+
+    def _time_bucket(self, now: float) -> Dict[str, Any]:
+        epoch = int(now // ANALYTICS_BUCKET_SECONDS)
+        slot = epoch % len(self._timeline)
+        bucket = self._timeline[slot]
+        if bucket is None or bucket["epoch"] != epoch:
+            bucket = {"epoch": epoch, "count": 0, "score_total": 0, "min": 100, "max": 0}
+            self._timeline[slot] = bucket
+        return bucket
+
+    def record_analysis(self, jd_hash: str, match_score: float, recommendation: Optional[str] = None,
+                        processing_time_ms: Optional[float] = None, error: bool = False):
+        """Record one completed analysis"""
+        with self._lock:
+            if error:
+                self.errors += 1
+                return
+            self.scores.record(match_score, recommendation)
+
+            key = jd_hash[:16]
+            jd_scores = self._per_jd.get(key)
+            if jd_scores is None:
+                jd_scores = self._per_jd[key] = ScoreHistogram()
+                if len(self._per_jd) > self.max_jds:
+                    self._per_jd.popitem(last=False)
+            else:
+                self._per_jd.move_to_end(key)
+            jd_scores.record(match_score, recommendation)
+
+            if processing_time_ms is not None:
+                self.processing_ms.record(processing_time_ms)
+
+            score = int(min(max(round(match_score or 0), 0), 100))
+            bucket = self._time_bucket(time.time())
+            bucket["count"] += 1
+            bucket["score_total"] += score
+            bucket["min"] = min(bucket["min"], score)
+            bucket["max"] = max(bucket["max"], score)
+
+    def record_extraction(self, extraction_time_ms: float, backend: Optional[str] = None):
+        """Record one completed text extraction"""
+        with self._lock:
+            self.extraction_ms.record(extraction_time_ms)
+            if backend:
+                self.extraction_backends[backend] = self.extraction_backends.get(backend, 0) + 1
+
+    def increment(self, name: str, amount: int = 1):
+        """Bump a named counter (for example coalesced requests)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _timeline_snapshot(self) -> List[Dict[str, Any]]:
+        current_epoch = int(time.time() // ANALYTICS_BUCKET_SECONDS)
+        oldest_epoch = current_epoch - len(self._timeline) + 1
+        points = [b for b in self._timeline if b and b["epoch"] >= oldest_epoch]
+        points.sort(key=lambda b: b["epoch"])
+        return [
+            {
+                "hour": datetime.fromtimestamp(b["epoch"] * ANALYTICS_BUCKET_SECONDS).isoformat(),
+                "count": b["count"],
+                "mean_score": round(b["score_total"] / b["count"], 2),
+                "min_score": b["min"],
+                "max_score": b["max"],
+            }
+            for b in points
+        ]
+
+    def snapshot(self, jd_hash: Optional[str] = None) -> Dict[str, Any]:
+        """Current aggregates; cost depends only on the fixed sketch sizes"""
+        with self._lock:
+            snap = {
+                "since": self.started_at,
+                "analyses": self.scores.count,
+                "errors": self.errors,
+                "scores": self.scores.snapshot(),
+                "processing_time_ms": self.processing_ms.snapshot(),
+                "extraction_time_ms": self.extraction_ms.snapshot(),
+                "extraction_backends": dict(self.extraction_backends),
+                "counters": dict(self.counters),
+                "timeline": self._timeline_snapshot(),
+                "tracked_job_descriptions": len(self._per_jd),
+            }
+            if jd_hash:
+                jd_scores = self._per_jd.get(jd_hash[:16])
+                snap["job_descriptions"] = {jd_hash[:16]: jd_scores.snapshot()} if jd_scores else {}
+            else:
+                snap["job_descriptions"] = {
+                    h: {"count": s.count, "mean": round(s.total / s.count, 2) if s.count else 0}
+                    for h, s in self._per_jd.items()
+                }
+            return snap
+
+
+analytics = AnalyticsRecorder()
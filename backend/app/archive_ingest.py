@@ -0,0 +1,210 @@
+"""
+Streaming ZIP/TAR archive ingestion for bulk resume uploads
+"""
+import io
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from werkzeug.datastructures import FileStorage
+
+# Archive limits (override via environment)
+ARCHIVE_MAX_UPLOAD_BYTES = int(os.getenv('ARCHIVE_MAX_UPLOAD_BYTES', 512 * 1024 * 1024))  # 512MB request cap
+ARCHIVE_MAX_MEMBER_BYTES = int(os.getenv('ARCHIVE_MAX_MEMBER_BYTES', 10 * 1024 * 1024))  # same as single upload cap
+ARCHIVE_MAX_TOTAL_BYTES = int(os.getenv('ARCHIVE_MAX_TOTAL_BYTES', 2 * 1024 * 1024 * 1024))  # 2GB decompressed
+ARCHIVE_MAX_COMPRESSION_RATIO = float(os.getenv('ARCHIVE_MAX_COMPRESSION_RATIO', 100))
+ARCHIVE_MAX_MEMBERS = int(os.getenv('ARCHIVE_MAX_MEMBERS', 5000))
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+class ArchiveLimitError(ValueError):
+    """Raised when an archive as a whole violates the configured limits"""
+
+
+class _CountingReader(io.RawIOBase):
+    """Read-only wrapper that counts the bytes consumed from the underlying stream"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._stream.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._stream.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._stream.tell()
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.bytes_read += n
+        return n
+
+
+def is_archive_filename(filename: str) -> bool:
+    """Check whether a filename looks like a supported archive"""
+    return bool(filename) and filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_ignored_member(name: str) -> bool:
+    """Skip OS metadata entries that archivers commonly add"""
+    base = posixpath.basename(name.rstrip('/'))
+    return not base or base.startswith('.') or name.startswith('__MACOSX/')
+
+
+def _read_bounded(source: BinaryIO, limit: int) -> Optional[io.BytesIO]:
+    """
+    Read a decompressed member into memory, stopping as soon as it exceeds the limit
+
+    Returns:
+        BytesIO with the member content, or None if the limit was exceeded
+    """
+    buffer = io.BytesIO()
+    while True:
+        chunk = source.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        if buffer.tell() + len(chunk) > limit:
+            return None
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+class _ArchiveBudget:
+    """Tracks member count, total decompressed size and overall compression ratio"""
+
+    def __init__(self, counter: _CountingReader):
+        self.counter = counter
+        self.members = 0
+        self.total_bytes = 0
+
+    def start_member(self):
+        self.members += 1
+        if self.members > ARCHIVE_MAX_MEMBERS:
+            raise ArchiveLimitError(f"Archive has more than {ARCHIVE_MAX_MEMBERS} members")
+
+    def add(self, size: int):
+        self.total_bytes += size
+        if self.total_bytes > ARCHIVE_MAX_TOTAL_BYTES:
+            raise ArchiveLimitError(
+                f"Archive decompresses to more than {ARCHIVE_MAX_TOTAL_BYTES} bytes"
+            )
+        consumed = max(self.counter.bytes_read, 1)
+        if self.total_bytes > _READ_CHUNK_SIZE and self.total_bytes / consumed > ARCHIVE_MAX_COMPRESSION_RATIO:
+            raise ArchiveLimitError(
+                f"Archive compression ratio exceeds {ARCHIVE_MAX_COMPRESSION_RATIO:g}:1"
+            )
+
+
+def _member_entry(name: str, data: Optional[io.BytesIO] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    """Build the dict yielded for each archive member"""
+    filename = posixpath.basename(name)
+    if error:
+        return {"filename": filename, "error": error}
+    return {
+        "filename": filename,
+        "file": FileStorage(stream=data, filename=filename, content_type="application/pdf"),
+    }
+
+
+def _iter_zip_members(counter: _CountingReader) -> Iterator[Dict[str, Any]]:
+    budget = _ArchiveBudget(counter)
+    with zipfile.ZipFile(counter) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or _is_ignored_member(info.filename):
+                continue
+            budget.start_member()
+            if not info.filename.lower().endswith('.pdf'):
+                yield _member_entry(info.filename, error="Skipped non-PDF archive member")
+                continue
+            if info.file_size > ARCHIVE_MAX_MEMBER_BYTES:
+                yield _member_entry(info.filename, error=f"Member exceeds {ARCHIVE_MAX_MEMBER_BYTES} bytes")
+                continue
+            if info.compress_size and info.file_size / info.compress_size > ARCHIVE_MAX_COMPRESSION_RATIO:
+                yield _member_entry(info.filename, error="Member compression ratio too high")
+                continue
+            # Header sizes can lie, so the decompressed stream is bounded as well
+            try:
+                with archive.open(info) as source:
+                    data = _read_bounded(source, ARCHIVE_MAX_MEMBER_BYTES)
+            except NotImplementedError:
+                yield _member_entry(info.filename, error="Member uses an unsupported compression method")
+                continue
+            except RuntimeError:
+                # zipfile raises RuntimeError for members that need a password
+                yield _member_entry(info.filename, error="Member is encrypted")
+                continue
+            if data is None:
+                yield _member_entry(info.filename, error=f"Member exceeds {ARCHIVE_MAX_MEMBER_BYTES} bytes")
+                continue
+            budget.add(len(data.getbuffer()))
+            yield _member_entry(info.filename, data)
+
+
+def _iter_tar_members(counter: _CountingReader) -> Iterator[Dict[str, Any]]:
+    budget = _ArchiveBudget(counter)
+    # Stream mode ("r|*") never seeks backwards, so members are decompressed one at a time
+    with tarfile.open(fileobj=counter, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile() or _is_ignored_member(member.name):
+                continue
+            budget.start_member()
+            if not member.name.lower().endswith('.pdf'):
+                yield _member_entry(member.name, error="Skipped non-PDF archive member")
+                continue
+            if member.size > ARCHIVE_MAX_MEMBER_BYTES:
+                yield _member_entry(member.name, error=f"Member exceeds {ARCHIVE_MAX_MEMBER_BYTES} bytes")
+                continue
+            source = archive.extractfile(member)
+            data = _read_bounded(source, ARCHIVE_MAX_MEMBER_BYTES)
+            if data is None:
+                yield _member_entry(member.name, error=f"Member exceeds {ARCHIVE_MAX_MEMBER_BYTES} bytes")
+                continue
+            budget.add(len(data.getbuffer()))
+            yield _member_entry(member.name, data)
+
+
+def iter_archive_members(stream: BinaryIO, filename: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily iterate over the PDF members of a ZIP or TAR archive
+
+    Members are decompressed one at a time into a bounded in-memory buffer, so
+    memory use depends on the member size limit rather than the archive size.
+
+    Args:
+        stream: Binary stream of the uploaded archive
+        filename: Original archive filename (used to pick the format)
+
+    Yields:
+        Dict with "filename" and either "file" (a FileStorage ready for
+        process_single_file) or "error" for members that were rejected
+
+    Raises:
+        ArchiveLimitError: If the archive exceeds total size, member count or ratio limits
+        ValueError: If the archive format is not supported or the archive is corrupt
+    """
+    counter = _CountingReader(stream)
+    lower = (filename or '').lower()
+
+    try:
+        if lower.endswith('.zip'):
+            yield from _iter_zip_members(counter)
+        elif lower.endswith(ARCHIVE_EXTENSIONS):
+            yield from _iter_tar_members(counter)
+        else:
+            raise ValueError("Unsupported archive type. Please upload a ZIP or TAR archive.")
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        raise ValueError(f"Invalid archive: {str(e)}")
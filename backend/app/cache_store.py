@@ -0,0 +1,146 @@
+"""
+Response cache storage for successful resume analyses
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Response cache configuration
+CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'response_cache')
+CACHE_FILE = os.path.join(CACHE_FOLDER, 'resume_responses.json')
+
+# Ensure cache folder exists
+os.makedirs(CACHE_FOLDER, exist_ok=True)
+
+# Serializes the load-modify-write in save_response_to_cache between threads
+_cache_write_lock = threading.Lock()
+
+@contextmanager
+def _locked_cache():
+    """Hold the cache for writing, across threads and (where fcntl exists) processes"""
+    with _cache_write_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(CACHE_FILE + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_cache(responses):
+    """Replace the cache file atomically so readers never see a partial write"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(CACHE_FILE), prefix='.resume_responses_', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(responses, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, CACHE_FILE)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+def load_cached_responses():
+    """Load cached responses from file"""
+    try:
+        if os.path.exists(CACHE_FILE):
+            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+                responses = json.load(f)
+                logger.debug(f"📂 Loaded {len(responses)} cached responses")
+                return responses
+        else:
+            logger.debug("📂 No cache file found, starting with empty cache")
+            return []
+    except Exception as e:
+        logger.error(f"❌ Error loading cached responses: {str(e)}")
+        return []
+
+def save_response_to_cache(response_data):
+    """Save a successful response to cache"""
+    try:
+        # Create a cache entry
+        cache_entry = {
+            'id': hashlib.md5(f"{response_data.get('candidate_name', '')}{response_data.get('filename', '')}{datetime.now().isoformat()}".encode()).hexdigest()[:8],
+            'timestamp': datetime.now().isoformat(),
+            'candidate_name': response_data.get('candidate_name', 'Unknown Candidate'),
+            'filename': response_data.get('filename', 'unknown.pdf'),
+            'match_score': response_data.get('match_score', 0),
+            'summary': response_data.get('summary', 'No summary available'),
+            'strengths': response_data.get('strengths', ['None identified']),
+            'improvement_areas': response_data.get('improvement_areas', ['None identified']),
+            'reasoning': response_data.get('reasoning', 'No reasoning provided'),
+            'recommendation': response_data.get('recommendation', 'Unable to determine'),
+            'processing_time': response_data.get('processing_time'),
+            'processing_time_ms': response_data.get('processing_time_ms'),
+        }
+        
+        # Concurrent writers would otherwise each load the same list and drop each other's entries
+        with _locked_cache():
+            # Load existing responses
+            cached_responses = load_cached_responses()
+            
+            # Add to cache
+            cached_responses.append(cache_entry)
+            
+            # Keep only the last 100 responses to prevent file from growing too large
+            if len(cached_responses) > 100:
+                cached_responses = cached_responses[-100:]
+            
+            # Save back to file
+            _write_cache(cached_responses)
+        
+        logger.info(f"💾 Saved response to cache - Total cached: {len(cached_responses)}")
+        logger.debug(f"💾 Cached entry: {cache_entry['candidate_name']} - {cache_entry['match_score']}%")
+        
+    except Exception as e:
+        logger.error(f"❌ Error saving response to cache: {str(e)}")
+        logger.error(traceback.format_exc())
+
+def get_random_cached_response(filename):
+    """Get a random cached response for mock mode"""
+    try:
+        cached_responses = load_cached_responses()
+        
+        if not cached_responses:
+            logger.warning("⚠️ No cached responses available for mock mode")
+            return None
+        
+        # Select a random response
+        selected_response = random.choice(cached_responses)
+        
+        # Modify it to use the current filename and add some randomization
+        mock_response = selected_response.copy()
+        mock_response['filename'] = filename
+        mock_response['timestamp'] = datetime.now().isoformat()
+        
+        # Add some variation to the score (±5 points)
+        original_score = mock_response['match_score']
+        variation = random.randint(-5, 5)
+        mock_response['match_score'] = max(0, min(100, original_score + variation))
+        
+        # Add mock identifier to candidate name
+        mock_response['candidate_name'] = f"Mock-{mock_response['candidate_name']}"
+        
+        logger.info(f"🎭 Using cached response for mock mode: {mock_response['candidate_name']} - {mock_response['match_score']}%")
+        logger.debug(f"🎭 Original response ID: {selected_response.get('id', 'Unknown')}")
+        
+        return mock_response
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting random cached response: {str(e)}")
+        logger.error(traceback.format_exc())
+        return None
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline command-line batch screener
+
+Screens a directory or glob of PDF resumes against a job description without
+the web app, writing results incrementally and checkpointing progress so an
+interrupted run can be resumed.
+
+Usage:
+    python -m app.cli --jd job.txt resumes/ --output results.jsonl --csv results.csv --workers 8
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Set
+
+from .pipeline import process_resume_path
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = [
+    "filename", "path", "status", "candidate_name", "match_score",
+    "recommendation", "summary", "message", "processing_time_ms", "timestamp",
+]
+
+
+def iter_resume_paths(inputs: List[str], recursive: bool = False) -> Iterator[str]:
+    """
+    Expand directories, glob patterns and file paths into PDF paths
+
+    Args:
+        inputs: Directories, glob patterns or individual files
+        recursive: Descend into subdirectories of directory inputs
+
+    Yields:
+        Absolute PDF paths in a stable order, without duplicates
+    """
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(item, recursive=True) or [item]
+        for path in sorted(candidates):
+            if not os.path.isfile(path) or not path.lower().endswith('.pdf'):
+                continue
+            path = os.path.abspath(path)
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def file_sha256(path: str) -> str:
+    """Hash a file's content in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_checkpoint(checkpoint_path: str) -> Set[str]:
+    """Load the keys of files already completed in a previous run"""
+    done = set()
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                done.add(json.loads(line)["key"])
+            except (json.JSONDecodeError, KeyError):
+                # A torn final line from an interrupted run is ignored
+                continue
+    return done
+
+
+class ResultWriter:
+    """Appends results to JSONL/CSV outputs and records completed files in the checkpoint"""
+
+    def __init__(self, output_path: str, checkpoint_path: str, csv_path: str = None):
+        self.output = open(output_path, 'a', encoding='utf-8')
+        self.checkpoint = open(checkpoint_path, 'a', encoding='utf-8')
+        self.csv_file = None
+        self.csv_writer = None
+        if csv_path:
+            write_header = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+            self.csv_file = open(csv_path, 'a', encoding='utf-8', newline='')
+            self.csv_writer = csv.DictWriter(self.csv_file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+            if write_header:
+                self.csv_writer.writeheader()
+
+    def write(self, key: str, path: str, result: Dict[str, Any]):
+        record = dict(result, path=path)
+        self.output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.output.flush()
+        if self.csv_writer:
+            self.csv_writer.writerow(record)
+            self.csv_file.flush()
+
+        # Only successful analyses are checkpointed so failures are retried on resume
+        if result.get("status") == "success":
+            self.checkpoint.write(json.dumps({"key": key, "path": path, "timestamp": datetime.now().isoformat()}) + '\n')
+            self.checkpoint.flush()
+            os.fsync(self.checkpoint.fileno())
+
+    def close(self):
+        for f in (self.output, self.checkpoint, self.csv_file):
+            if f:
+                f.close()
+
+
+def screen_files(paths: Iterator[str], job_description: str, writer: ResultWriter,
+                 done_keys: Set[str], workers: int = 4, mock: bool = False,
+                 record: bool = False) -> Dict[str, int]:
+    """
+    Screen resumes with bounded parallelism, writing each result as it completes
+
+    Results only go to the writer unless record is set, in which case they are also
+    added to the server's result history, analytics and response cache.
+
+    Returns:
+        Counts of processed, skipped, successful and failed files
+    """
+    jd_hash = hashlib.sha256(job_description.encode('utf-8')).hexdigest()[:16]
+    stats = {"processed": 0, "skipped": 0, "success": 0, "error": 0}
+    max_in_flight = workers * 2
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def collect(done):
+            for future in done:
+                key, path = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {
+                        "status": "error",
+                        "message": f"Error processing file: {str(e)}",
+                        "filename": os.path.basename(path)
+                    }
+                writer.write(key, path, result)
+                stats["processed"] += 1
+                stats[result.get("status", "error")] = stats.get(result.get("status", "error"), 0) + 1
+                logger.info(f"📄 {stats['processed']} done - {os.path.basename(path)}: {result.get('status')} {result.get('match_score', '')}")
+
+        for path in paths:
+            key = f"{file_sha256(path)}:{jd_hash}"
+            if key in done_keys:
+                stats["skipped"] += 1
+                continue
+            done_keys.add(key)
+            future = executor.submit(process_resume_path, path, os.path.basename(path), job_description, mock,
+                                     record=record)
+            pending[future] = (key, path)
+            if len(pending) >= max_in_flight:
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                collect(done)
+
+        collect(list(pending))
+
+    return stats
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Screen a folder of PDF resumes against a job description")
+    parser.add_argument("inputs", nargs="+", help="Directories, glob patterns or PDF files to screen")
+    parser.add_argument("--jd", required=True, help="Path to a text file containing the job description")
+    parser.add_argument("-o", "--output", default="screening_results.jsonl", help="JSONL results file (appended)")
+    parser.add_argument("--csv", help="Optional CSV results file (appended)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Number of files analyzed in parallel")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Recurse into subdirectories")
+    parser.add_argument("--mock", action="store_true", help="Use cached responses instead of calling the AI")
+    parser.add_argument("--record", action="store_true",
+                        help="Also add results to the server's result history and response cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    with open(args.jd, 'r', encoding='utf-8') as f:
+        job_description = f.read().strip()
+    if not job_description:
+        logger.error("❌ Job description file is empty")
+        return 2
+
+    checkpoint_path = args.checkpoint or f"{args.output}.checkpoint"
+    done_keys = load_checkpoint(checkpoint_path)
+    if done_keys:
+        logger.info(f"♻️ Resuming - {len(done_keys)} files already completed in {checkpoint_path}")
+
+    writer = ResultWriter(args.output, checkpoint_path, args.csv)
+    start_time = time.time()
+    try:
+        stats = screen_files(
+            iter_resume_paths(args.inputs, args.recursive),
+            job_description,
+            writer,
+            done_keys,
+            workers=max(1, args.workers),
+            mock=args.mock,
+            record=args.record,
+        )
+    except KeyboardInterrupt:
+        logger.warning("⚠️ Interrupted - rerun the same command to resume from the checkpoint")
+        return 130
+    finally:
+        writer.close()
+
+    elapsed = time.time() - start_time
+    logger.info(
+        f"🏁 Finished in {elapsed:.1f}s - processed: {stats['processed']}, skipped: {stats['skipped']}, "
+        f"success: {stats['success']}, failed: {stats['error']}"
+    )
+    return 0 if stats["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
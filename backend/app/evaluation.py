@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Offline latency-vs-quality evaluation of analyzer variants
+
+Runs a labeled set of resume / job description pairs through configurable
+analyzer variants (model, temperature, top_p, max_tokens, prompt) and reports,
+for each variant, agreement with the labeled scores, rank correlation, latency
+percentiles and token usage.
+
+LLM calls go through a recording client:
+- "replay" serves recorded responses only, so runs need no network access;
+  latency is the latency recorded with each response
+- "record" replays what is recorded and calls the API (and records) the rest
+- "live" always calls the API and records nothing
+
+Cases file (JSONL), paths relative to the file:
+    {"id": "c1", "jd_path": "jd.txt", "resume_path": "a.pdf", "label_score": 85}
+    {"id": "c2", "job_description": "...", "resume_text": "...", "label_score": 40,
+     "label_recommendation": "Weak Match"}
+
+Variants file (JSON list):
+    [{"name": "turbo", "model": "qwen-turbo"},
+     {"name": "flash-short", "model": "qwen-flash", "max_tokens": 800, "prompt_file": "short.txt"},
+     {"name": "flash-score", "model": "qwen-flash", "mode": "score", "temperature": 0}]
+
+Usage:
+    python -m app.evaluation --cases cases.jsonl --variants variants.json --backend record --recordings rec.jsonl
+    python -m app.evaluation --cases cases.jsonl --variants variants.json --output report.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from .model_router import LLM_PRIMARY_MODEL
+from .pipeline import extract_resume
+from .qwen_analyzer import FULL_ANALYSIS, LLM_TEMPERATURE, LLM_TOP_P, SCORE_ONLY, QwenAnalyzer, get_llm_client
+
+logger = logging.getLogger(__name__)
+
+LIVE = 'live'
+RECORD = 'record'
+REPLAY = 'replay'
+BACKENDS = (LIVE, RECORD, REPLAY)
+
+DEFAULT_RECORDINGS = 'eval_recordings.jsonl'
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode for a call that was never recorded"""
+
+
+class RecordingClient:
+    """
+    OpenAI-compatible client that records responses to, or replays them from, a JSONL file
+
+    Calls are keyed by model, messages and sampling parameters. The latency of
+    each call (measured, or recorded for replayed calls) is accumulated per
+    thread; take_latency_ms returns and resets it.
+    """
+
+    def __init__(self, backend: str, recordings_path: Optional[str] = None, inner=None):
+        self.backend = backend
+        self.recordings_path = recordings_path
+        self.inner = inner
+        self.hits = 0
+        self.misses = 0
+        self._recordings: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        if backend != LIVE and recordings_path and os.path.exists(recordings_path):
+            with open(recordings_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        self._recordings[record["key"]] = record
+        logger.info(f"📼 {backend} backend with {len(self._recordings)} recorded response(s)")
+
+    @staticmethod
+    def call_key(**kwargs) -> str:
+        params = {k: kwargs.get(k) for k in ("model", "messages", "temperature", "top_p", "max_tokens")}
+        return hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _response(record: Dict[str, Any]):
+        usage = record.get("usage")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=record["content"]))],
+            usage=SimpleNamespace(**usage) if usage else None,
+        )
+
+    def _add_latency(self, latency_ms: float):
+        self._local.latency_ms = getattr(self._local, 'latency_ms', 0.0) + latency_ms
+
+    def take_latency_ms(self) -> float:
+        latency_ms = getattr(self._local, 'latency_ms', 0.0)
+        self._local.latency_ms = 0.0
+        return latency_ms
+
+    def create(self, **kwargs):
+        key = self.call_key(**kwargs)
+        if self.backend != LIVE:
+            with self._lock:
+                record = self._recordings.get(key)
+            if record is not None:
+                with self._lock:
+                    self.hits += 1
+                self._add_latency(record["latency_ms"])
+                return self._response(record)
+            if self.backend == REPLAY:
+                with self._lock:
+                    self.misses += 1
+                raise ReplayMissError(f"No recorded response for this {kwargs.get('model')} call")
+
+        start = time.perf_counter()
+        response = self.inner.chat.completions.create(**kwargs)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self._add_latency(latency_ms)
+        if self.backend == RECORD:
+            usage = getattr(response, "usage", None)
+            record = {
+                "key": key,
+                "model": kwargs.get("model"),
+                "content": response.choices[0].message.content,
+                "usage": {
+                    "prompt_tokens": usage.prompt_tokens,
+                    "completion_tokens": usage.completion_tokens,
+                    "total_tokens": usage.total_tokens,
+                } if usage is not None else None,
+                "latency_ms": latency_ms,
+            }
+            with self._lock:
+                self._recordings[key] = record
+                self.misses += 1
+                with open(self.recordings_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return response
+
+
+def load_cases(path: str) -> List[Dict[str, Any]]:
+    """
+    Load labeled cases, reading job description files and extracting resume PDFs
+
+    Returns:
+        List of {"id", "job_description", "resume_text", "label_score", "label_recommendation"}
+
+    Raises:
+        ValueError: A case is missing its job description, resume or label
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jd_files: Dict[str, str] = {}
+    cases = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            raw = json.loads(line)
+            case_id = str(raw.get("id", line_no))
+
+            job_description = raw.get("job_description")
+            if job_description is None and raw.get("jd_path"):
+                jd_path = os.path.join(base, raw["jd_path"])
+                if jd_path not in jd_files:
+                    with open(jd_path, 'r', encoding='utf-8') as jd_file:
+                        jd_files[jd_path] = jd_file.read().strip()
+                job_description = jd_files[jd_path]
+
+            resume_text = raw.get("resume_text")
+            if resume_text is None and raw.get("resume_path"):
+                resume_path = os.path.join(base, raw["resume_path"])
+                extracted = extract_resume(resume_path, os.path.basename(resume_path))
+                if extracted["status"] != "success":
+                    raise ValueError(f"Case {case_id}: {extracted['message']}")
+                resume_text = extracted["text"]
+
+            if not job_description or not resume_text or raw.get("label_score") is None:
+                raise ValueError(f"Case {case_id} needs a job description, a resume and a label_score")
+            cases.append({
+                "id": case_id,
+                "job_description": job_description,
+                "resume_text": resume_text,
+                "label_score": float(raw["label_score"]),
+                "label_recommendation": raw.get("label_recommendation"),
+            })
+    return cases
+
+
+def load_variants(path: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Load analyzer variants; without a file, evaluate the production settings only
+
+    Raises:
+        ValueError: Variant names are missing or repeated, or a mode is unknown
+    """
+    if not path:
+        return [{"name": "default", "model": LLM_PRIMARY_MODEL}]
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, 'r', encoding='utf-8') as f:
+        variants = json.load(f)
+    names = set()
+    for variant in variants:
+        name = variant.get("name")
+        if not name or name in names:
+            raise ValueError(f"Every variant needs a unique name (got {name!r})")
+        names.add(name)
+        if variant.get("mode", FULL_ANALYSIS) not in (FULL_ANALYSIS, SCORE_ONLY):
+            raise ValueError(f"Variant {name}: mode must be '{FULL_ANALYSIS}' or '{SCORE_ONLY}'")
+        if variant.get("prompt_file"):
+            with open(os.path.join(base, variant["prompt_file"]), 'r', encoding='utf-8') as prompt_file:
+                variant["prompt_template"] = prompt_file.read()
+    return variants
+
+
+def _ranks(values: List[float]) -> List[float]:
+    # Average ranks, so ties share a rank
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def spearman(xs: List[float], ys: List[float]) -> Optional[float]:
+    """Spearman rank correlation, or None when it is undefined"""
+    if len(xs) < 2:
+        return None
+    rx, ry = _ranks(xs), _ranks(ys)
+    mean_x, mean_y = sum(rx) / len(rx), sum(ry) / len(ry)
+    cov = sum((a - mean_x) * (b - mean_y) for a, b in zip(rx, ry))
+    var_x = sum((a - mean_x) ** 2 for a in rx)
+    var_y = sum((b - mean_y) ** 2 for b in ry)
+    if not var_x or not var_y:
+        return None
+    return cov / math.sqrt(var_x * var_y)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (q in 0..1)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def run_variant(variant: Dict[str, Any], cases: List[Dict[str, Any]], client: RecordingClient,
+                workers: int = 4) -> List[Dict[str, Any]]:
+    """
+    Analyze every case with one variant
+
+    Returns:
+        Per-case outcomes with the predicted score, latency and token usage
+    """
+    analyzer = QwenAnalyzer(
+        client=client,
+        model=variant.get("model") or LLM_PRIMARY_MODEL,
+        temperature=variant.get("temperature", LLM_TEMPERATURE),
+        top_p=variant.get("top_p", LLM_TOP_P),
+        max_tokens=variant.get("max_tokens"),
+        prompt_template=variant.get("prompt_template"),
+    )
+    mode = variant.get("mode", FULL_ANALYSIS)
+
+    def run_case(case):
+        client.take_latency_ms()
+        result = analyzer.analyze_resume_match(case["job_description"], case["resume_text"], mode)
+        usage = result.get("token_usage") or {}
+        return {
+            "id": case["id"],
+            "jd_hash": hashlib.sha256(case["job_description"].encode('utf-8')).hexdigest()[:16],
+            "label_score": case["label_score"],
+            "label_recommendation": case["label_recommendation"],
+            "score": result.get("match_score"),
+            "recommendation": result.get("recommendation"),
+            "error": result.get("error"),
+            "latency_ms": round(client.take_latency_ms(), 1),
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(run_case, cases))
+
+
+def summarize_variant(name: str, outcomes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Quality, latency and token metrics of one variant's outcomes"""
+    scored = [o for o in outcomes if not o["error"] and isinstance(o["score"], (int, float))]
+    labels = [o["label_score"] for o in scored]
+    scores = [float(o["score"]) for o in scored]
+    errors = [abs(s - l) for s, l in zip(scores, labels)]
+
+    # Rank correlation across everything, and within each job description's candidates
+    per_jd = {}
+    for o in scored:
+        per_jd.setdefault(o["jd_hash"], []).append(o)
+    jd_correlations = [
+        spearman([o["label_score"] for o in group], [float(o["score"]) for o in group])
+        for group in per_jd.values() if len(group) >= 3
+    ]
+    jd_correlations = [c for c in jd_correlations if c is not None]
+
+    labeled_recommendations = [o for o in scored if o["label_recommendation"]]
+    latencies = [o["latency_ms"] for o in outcomes if not o["error"]]
+    with_usage = [o for o in outcomes if o["total_tokens"] is not None]
+
+    def mean_of(field):
+        return sum(o[field] or 0 for o in with_usage) / len(with_usage) if with_usage else None
+
+    return {
+        "variant": name,
+        "cases": len(outcomes),
+        "errors": len(outcomes) - len(scored),
+        "score": {
+            "mae": _round(sum(errors) / len(errors) if errors else None, 2),
+            "bias": _round(sum(s - l for s, l in zip(scores, labels)) / len(scores) if scores else None, 2),
+            "within_10": _round(sum(1 for e in errors if e <= 10) / len(errors) if errors else None),
+            "recommendation_accuracy": _round(
+                sum(1 for o in labeled_recommendations if o["recommendation"] == o["label_recommendation"])
+                / len(labeled_recommendations) if labeled_recommendations else None
+            ),
+        },
+        "rank": {
+            "spearman": _round(spearman(labels, scores)),
+            "spearman_per_jd": _round(sum(jd_correlations) / len(jd_correlations) if jd_correlations else None),
+            "jd_groups": len(jd_correlations),
+        },
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 0.5), 1),
+            "p90": _round(percentile(latencies, 0.9), 1),
+            "p99": _round(percentile(latencies, 0.99), 1),
+            "mean": _round(sum(latencies) / len(latencies) if latencies else None, 1),
+        },
+        "tokens": {
+            "prompt_mean": _round(mean_of("prompt_tokens"), 1),
+            "completion_mean": _round(mean_of("completion_tokens"), 1),
+            "total_mean": _round(mean_of("total_tokens"), 1),
+            "total": sum(o["total_tokens"] or 0 for o in with_usage),
+        },
+    }
+
+
+def pick_fastest(summaries: List[Dict[str, Any]], max_rank_drop: float) -> Optional[str]:
+    """
+    Fastest variant (by p50 latency) whose rank correlation is within max_rank_drop of the best
+
+    Rank quality is per-JD Spearman when available, overall Spearman otherwise.
+    """
+    def quality(summary):
+        rank = summary["rank"]
+        return rank["spearman_per_jd"] if rank["spearman_per_jd"] is not None else rank["spearman"]
+
+    rated = [s for s in summaries if quality(s) is not None and s["latency_ms"]["p50"] is not None]
+    if not rated:
+        return None
+    best = max(quality(s) for s in rated)
+    eligible = [s for s in rated if quality(s) >= best - max_rank_drop]
+    return min(eligible, key=lambda s: s["latency_ms"]["p50"])["variant"]
+
+
+def format_table(summaries: List[Dict[str, Any]]) -> str:
+    """Plain-text comparison table of variant summaries"""
+    def cell(value):
+        return "-" if value is None else str(value)
+
+    header = ["variant", "cases", "errors", "MAE", "within10", "spearman", "per-JD",
+              "p50 ms", "p90 ms", "p99 ms", "tokens/call"]
+    rows = [[
+        s["variant"], s["cases"], s["errors"], s["score"]["mae"], s["score"]["within_10"],
+        s["rank"]["spearman"], s["rank"]["spearman_per_jd"], s["latency_ms"]["p50"],
+        s["latency_ms"]["p90"], s["latency_ms"]["p99"], s["tokens"]["total_mean"],
+    ] for s in summaries]
+    widths = [max(len(cell(v)) for v in column) for column in zip(header, *rows)]
+    lines = ["  ".join(cell(v).ljust(w) for v, w in zip(row, widths)) for row in [header] + rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Compare analyzer variants on a labeled resume set")
+    parser.add_argument("--cases", required=True, help="JSONL file of labeled resume / job description pairs")
+    parser.add_argument("--variants", help="JSON file listing the analyzer variants (default: production settings)")
+    parser.add_argument("--backend", choices=BACKENDS, default=REPLAY, help="How LLM calls are served")
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS, help="Recorded responses (JSONL)")
+    parser.add_argument("-o", "--output", help="Write the full report (summaries and per-case outcomes) as JSON")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Cases analyzed in parallel per variant")
+    parser.add_argument("--max-rank-drop", type=float, default=0.05,
+                        help="Rank correlation a variant may lose against the best and still be recommended")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    try:
+        cases = load_cases(args.cases)
+        variants = load_variants(args.variants)
+    except (OSError, ValueError) as e:
+        logger.error(f"❌ {e}")
+        return 2
+    if not cases:
+        logger.error("❌ No cases to evaluate")
+        return 2
+
+    inner = None
+    if args.backend != REPLAY:
+        if not os.environ.get("API_KEY"):
+            logger.error(f"❌ The {args.backend} backend needs API_KEY; use --backend replay to run offline")
+            return 2
+        inner = get_llm_client(os.environ["API_KEY"])
+    client = RecordingClient(args.backend, args.recordings, inner)
+
+    summaries, outcomes = [], {}
+    for variant in variants:
+        logger.info(f"🧪 Evaluating {variant['name']} on {len(cases)} case(s)")
+        outcomes[variant["name"]] = run_variant(variant, cases, client, args.workers)
+        summaries.append(summarize_variant(variant["name"], outcomes[variant["name"]]))
+
+    recommended = pick_fastest(summaries, args.max_rank_drop)
+    print(format_table(summaries))
+    if recommended:
+        print(f"\nFastest variant within {args.max_rank_drop} rank correlation of the best: {recommended}")
+    if args.backend == REPLAY and client.misses:
+        logger.warning(f"⚠️ {client.misses} call(s) had no recorded response; rerun with --backend record")
+
+    if args.output:
+        report = {
+            "backend": args.backend,
+            "cases": len(cases),
+            "summaries": summaries,
+            "recommended": recommended,
+            "outcomes": outcomes,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"📝 Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
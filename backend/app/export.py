@@ -0,0 +1,273 @@
+"""
+Streaming CSV and XLSX export of screening results
+
+Exports are generators that yield the file in chunks of about
+EXPORT_CHUNK_BYTES, so a response can be streamed (chunked transfer) and the
+server only ever holds one chunk plus the row being written, however many
+results are exported. The XLSX writer produces a minimal workbook (one sheet,
+inline strings) through zipfile writing to a write-only sink, so no
+spreadsheet library is needed.
+"""
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from flask import Response, stream_with_context
+
+EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', 64 * 1024))
+
+EXPORT_COLUMNS = [
+    "filename", "candidate_name", "match_score", "recommendation", "summary",
+    "strengths", "improvement_areas", "status", "message", "timestamp",
+]
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+EXPORT_FORMATS = {
+    "csv": 'text/csv',
+    "xlsx": XLSX_MIMETYPE,
+}
+
+SORT_ORDERS = ("desc", "asc")
+
+# Excel's limit on the length of a cell's text
+_MAX_CELL_CHARS = 32767
+# Characters that are not allowed anywhere in an XML document
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Leading characters that make a spreadsheet treat a CSV cell as a formula
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def parse_export_options(args) -> Dict[str, Any]:
+    """
+    Read export options from request arguments
+
+    Args:
+        args: Mapping with optional "format" (csv or xlsx), "columns" (comma-separated),
+            "sort" (match_score) and "order" (desc or asc)
+
+    Returns:
+        Dict with "format", "columns" and "sort" (None, "desc" or "asc")
+
+    Raises:
+        ValueError: An option has an unsupported value
+    """
+    fmt = (args.get('format') or 'csv').strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}', use one of: {', '.join(EXPORT_FORMATS)}")
+
+    columns = [c.strip() for c in (args.get('columns') or '').split(',') if c.strip()]
+    columns = list(dict.fromkeys(columns)) or list(EXPORT_COLUMNS)
+
+    sort = (args.get('sort') or '').strip().lower()
+    if sort and sort != 'match_score':
+        raise ValueError("Exports can only be sorted by match_score")
+    order = (args.get('order') or 'desc').strip().lower()
+    if order not in SORT_ORDERS:
+        raise ValueError("order must be 'desc' or 'asc'")
+
+    return {"format": fmt, "columns": columns, "sort": order if sort else None}
+
+
+def score_sort_key(result: Dict[str, Any], order: str) -> tuple:
+    """Sort key that orders by match_score and keeps results without a score last"""
+    score = result.get("match_score")
+    if not isinstance(score, (int, float)):
+        return (1, 0)
+    return (0, -score if order == "desc" else score)
+
+
+def sort_results(results: Iterable[Dict[str, Any]], order: Optional[str]) -> Iterable[Dict[str, Any]]:
+    """Sort in-memory results by match_score ("desc" or "asc"); None keeps their order"""
+    if order is None:
+        return results
+    return sorted(results, key=lambda r: score_sort_key(r, order))
+
+
+def cell_value(value) -> Any:
+    """Flatten a result field into a single spreadsheet cell"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, (int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(item) for item in value)
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _csv_cell(value) -> Any:
+    value = cell_value(value)
+    # Resume content is untrusted, so text that a spreadsheet would run as a formula is quoted
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(results: Iterable[Dict[str, Any]], columns: List[str],
+             chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Write results as CSV
+
+    Yields:
+        UTF-8 chunks, starting with a byte order mark so Excel detects the encoding
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    for result in results:
+        writer.writerow([_csv_cell(result.get(column)) for column in columns])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object that collects what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Results" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews>'
+    '<sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _column_letter(index: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _xlsx_row(row_number: int, values: List[Any], letters: List[str]) -> str:
+    cells = []
+    for letter, value in zip(letters, values):
+        ref = f'{letter}{row_number}'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        elif value != "":
+            text = escape(_ILLEGAL_XML_CHARS.sub('', str(value))[:_MAX_CELL_CHARS])
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+
+def iter_xlsx(results: Iterable[Dict[str, Any]], columns: List[str],
+              chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Write results as a single-sheet XLSX workbook with a frozen header row
+
+    Yields:
+        Chunks of the zip container as it is written
+    """
+    sink = _ChunkSink()
+    letters = [_column_letter(i) for i in range(len(columns))]
+    # The sink cannot seek, so zipfile streams each member with a data descriptor
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, xml)
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row(1, columns, letters)).encode('utf-8'))
+            for row_number, result in enumerate(results, start=2):
+                values = [cell_value(result.get(column)) for column in columns]
+                sheet.write(_xlsx_row(row_number, values, letters).encode('utf-8'))
+                if sink.size >= chunk_bytes:
+                    yield sink.drain()
+            sheet.write(_SHEET_TAIL.encode('utf-8'))
+    yield sink.drain()
+
+
+EXPORT_WRITERS = {
+    "csv": iter_csv,
+    "xlsx": iter_xlsx,
+}
+
+
+def export_response(results: Iterable[Dict[str, Any]], options: Dict[str, Any], basename: str) -> Response:
+    """
+    Stream results as a file download
+
+    Args:
+        results: Results to export (any iterable; generators are consumed lazily)
+        options: Parsed export options from parse_export_options
+        basename: Download filename without extension
+
+    Returns:
+        A streamed Flask response without Content-Length, so it is sent chunked
+    """
+    fmt = options["format"]
+    body = EXPORT_WRITERS[fmt](results, options["columns"])
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[fmt], headers={
+        "Content-Disposition": f'attachment; filename="{basename}.{fmt}"',
+        "Cache-Control": "no-store",
+    })
@@ -0,0 +1,298 @@
+"""
+Sandboxed PDF validation and text extraction
+
+Untrusted PDFs are parsed in a pool of separate worker processes, so a
+malformed or adversarial file cannot pin a server thread or exhaust the
+server's memory. Each worker runs with:
+
+- an address-space limit (EXTRACT_SANDBOX_MEMORY_MB, RLIMIT_AS)
+- a per-file CPU time limit (EXTRACT_SANDBOX_CPU_SECONDS, RLIMIT_CPU)
+- a per-file wall-clock limit (EXTRACT_TIMEOUT_SECONDS) enforced by the parent
+
+A worker that breaks a limit is killed and replaced, and the file fails with
+error_code "extraction_timeout" or "resource_limit"; the rest of the batch is
+unaffected. Workers are also recycled after EXTRACT_SANDBOX_MAX_TASKS files.
+
+Workers are plain subprocesses (python -m app.extraction_sandbox) rather than
+multiprocessing children, so they never re-import the server's main module.
+The sandbox needs POSIX pipes and resource limits; on other platforms, or with
+EXTRACT_SANDBOX=false, extraction runs in-process.
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .pdf_extractor import (
+    EXTRACTION_TIMEOUT,
+    RESOURCE_LIMIT,
+    ExtractionLimitError,
+    extract_text_from_pdf,
+    validate_pdf_file,
+)
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_SANDBOX = os.getenv('EXTRACT_SANDBOX', 'true').lower() == 'true' and os.name == 'posix'
+EXTRACT_SANDBOX_WORKERS = int(os.getenv('EXTRACT_SANDBOX_WORKERS', 4))
+EXTRACT_TIMEOUT_SECONDS = float(os.getenv('EXTRACT_TIMEOUT_SECONDS', 20))
+EXTRACT_SANDBOX_CPU_SECONDS = int(os.getenv('EXTRACT_SANDBOX_CPU_SECONDS', 15))
+EXTRACT_SANDBOX_MEMORY_MB = int(os.getenv('EXTRACT_SANDBOX_MEMORY_MB', 1024))
+EXTRACT_SANDBOX_MAX_TASKS = int(os.getenv('EXTRACT_SANDBOX_MAX_TASKS', 200))
+
+
+def validate_and_extract(file_path: str) -> Dict[str, Any]:
+    """
+    Validate a PDF and extract its text in the current process
+
+    Returns:
+        The extract_text_from_pdf result, or {"validation_error": message} for invalid files
+    """
+    is_valid, error_msg = validate_pdf_file(file_path)
+    if not is_valid:
+        return {"validation_error": error_msg}
+    return extract_text_from_pdf(file_path)
+
+
+def _limit_error(message: str, code: str = RESOURCE_LIMIT) -> Dict[str, Any]:
+    return {"text": "", "error": message, "error_code": code, "backend": None, "extraction_time": None}
+
+
+_cpu_limit_hit = False
+
+
+def _on_cpu_limit(signum, frame):
+    global _cpu_limit_hit
+    _cpu_limit_hit = True
+    raise ExtractionLimitError("CPU time limit exceeded while extracting text")
+
+
+def _worker_main(cpu_seconds: int, memory_mb: int):
+    """
+    Worker process loop: read a PDF path per line on stdin, write one JSON result per line
+
+    Results go to the original stdout; anything a parser prints goes to stderr.
+    """
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    sys.stdout = sys.stderr
+    if resource is not None:
+        if memory_mb:
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    global _cpu_limit_hit
+    for line in sys.stdin:
+        file_path = line.rstrip('\n')
+        if not file_path:
+            return
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the whole process, so move the soft limit past this file's allowance
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.getrlimit(resource.RLIMIT_CPU)[1]))
+        try:
+            result = validate_and_extract(file_path)
+        except ExtractionLimitError as e:
+            result = _limit_error(str(e), e.code)
+        except MemoryError:
+            result = _limit_error("Memory limit exceeded while extracting text")
+        if _cpu_limit_hit and result.get("error_code") != RESOURCE_LIMIT:
+            # The limit exception was swallowed somewhere inside the parser
+            result = _limit_error("CPU time limit exceeded while extracting text")
+        _cpu_limit_hit = False
+        # A worker that hit a limit may be left in a bad state; the parent replaces it
+        out.write(json.dumps({"result": result, "recycle": result.get("error_code") == RESOURCE_LIMIT},
+                             ensure_ascii=False, default=str) + '\n')
+        out.flush()
+
+
+class _SandboxWorker:
+    """One worker process, started as python -m app.extraction_sandbox"""
+
+    def __init__(self, cpu_seconds: int, memory_mb: int):
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get('PYTHONPATH')])))
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', __name__, '--cpu-seconds', str(cpu_seconds), '--memory-mb', str(memory_mb)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=package_root, env=env
+        )
+        self.tasks = 0
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, file_path: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Send one file and wait for its result
+
+        Returns:
+            The worker's message, or None if the timeout passed first
+
+        Raises:
+            EOFError: The worker died before answering
+        """
+        self.process.stdin.write(file_path.encode('utf-8') + b'\n')
+        self.process.stdin.flush()
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        line = self.process.stdout.readline()
+        if not line:
+            raise EOFError("Extraction worker exited")
+        return json.loads(line)
+
+    def kill(self):
+        if self.is_alive():
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class ExtractionSandbox:
+    """Pool of limited extraction worker processes, started on first use"""
+
+    def __init__(self, workers: int = EXTRACT_SANDBOX_WORKERS, timeout_seconds: float = EXTRACT_TIMEOUT_SECONDS,
+                 cpu_seconds: int = EXTRACT_SANDBOX_CPU_SECONDS, memory_mb: int = EXTRACT_SANDBOX_MEMORY_MB,
+                 max_tasks: int = EXTRACT_SANDBOX_MAX_TASKS):
+        self.workers = max(1, workers)
+        self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.max_tasks = max_tasks
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._idle: List[_SandboxWorker] = []
+        self._all: List[_SandboxWorker] = []
+        self._lock = threading.Lock()
+        self.stats = {"files": 0, "timeouts": 0, "resource_limits": 0, "crashes": 0, "recycled": 0, "started": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _checkout(self) -> _SandboxWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+                self._all.remove(worker)
+            self.stats["started"] += 1
+        worker = _SandboxWorker(self.cpu_seconds, self.memory_mb)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _retire(self, worker: _SandboxWorker):
+        worker.kill()
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+            self.stats["recycled"] += 1
+
+    def _checkin(self, worker: _SandboxWorker):
+        worker.tasks += 1
+        if self.max_tasks and worker.tasks >= self.max_tasks:
+            self._retire(worker)
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def run(self, file_path: str) -> Dict[str, Any]:
+        """
+        Validate and extract a PDF in a worker process
+
+        Returns:
+            Same as validate_and_extract; limit violations come back as an "error"
+            with "error_code" EXTRACTION_TIMEOUT or RESOURCE_LIMIT
+        """
+        with self._slots:
+            self._count("files")
+            worker = self._checkout()
+            start = time.monotonic()
+            try:
+                message = worker.request(os.path.abspath(file_path), self.timeout_seconds)
+                if message is None:
+                    logger.warning(f"⏰ Extraction of {os.path.basename(file_path)} exceeded {self.timeout_seconds}s - killing worker")
+                    self._count("timeouts")
+                    self._retire(worker)
+                    return _limit_error(
+                        f"Extraction did not finish within {self.timeout_seconds:g}s", EXTRACTION_TIMEOUT
+                    )
+            except (EOFError, OSError, ValueError):
+                # The worker died mid-file: killed for CPU time, out of memory, or crashed in a parser
+                exitcode = worker.process.poll()
+                logger.warning(f"💥 Extraction worker died on {os.path.basename(file_path)} (exit code {exitcode})")
+                self._count("crashes")
+                self._retire(worker)
+                return _limit_error(f"Extraction worker was terminated (exit code {exitcode})")
+
+            result = message["result"]
+            if result.get("error_code") == RESOURCE_LIMIT:
+                self._count("resource_limits")
+                logger.warning(f"🚧 {os.path.basename(file_path)} hit a resource limit: {result['error']}")
+            if message.get("recycle"):
+                self._retire(worker)
+            else:
+                self._checkin(worker)
+            logger.debug(f"🧱 Sandboxed extraction took {(time.monotonic() - start) * 1000:.1f}ms")
+            return result
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self.stats,
+                enabled=EXTRACT_SANDBOX,
+                workers=self.workers,
+                alive=sum(1 for w in self._all if w.is_alive()),
+                idle=len(self._idle),
+                timeout_seconds=self.timeout_seconds,
+                cpu_seconds=self.cpu_seconds if resource is not None else None,
+                memory_mb=self.memory_mb if resource is not None else None,
+            )
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._all, self._idle = list(self._all), [], []
+        for worker in workers:
+            worker.kill()
+
+
+extraction_sandbox = ExtractionSandbox()
+atexit.register(extraction_sandbox.shutdown)
+
+
+def extract_pdf(file_path: str) -> Dict[str, Any]:
+    """Validate and extract a PDF, in the sandbox unless EXTRACT_SANDBOX is off"""
+    if EXTRACT_SANDBOX:
+        return extraction_sandbox.run(file_path)
+    return validate_and_extract(file_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction sandbox worker (started by the server)")
+    parser.add_argument("--cpu-seconds", type=int, default=EXTRACT_SANDBOX_CPU_SECONDS)
+    parser.add_argument("--memory-mb", type=int, default=EXTRACT_SANDBOX_MEMORY_MB)
+    args = parser.parse_args()
+    _worker_main(args.cpu_seconds, args.memory_mb)
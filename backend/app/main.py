@@ -1,22 +1,73 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, Request, Response, request, jsonify, send_from_directory, send_file, g
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
 import tempfile
-from .pdf_extractor import extract_text_from_pdf, validate_pdf_file
-from .qwen_analyzer import analyze_resume_job_match_qwen
+from .pipeline import (
+    process_resume_path,
+    pending_result,
+    extract_resume,
+    analyze_resume,
+    analyze_extracted,
+    generate_details,
+)
+from .extraction_sandbox import extraction_sandbox
+from .prestage import STAGED_FILE_EXPIRED, StagedFile, prestage_store
+from .qwen_analyzer import FULL_ANALYSIS, SCORE_ONLY
+from .two_phase import DETAIL_FIELDS, TWO_PHASE_DETAIL_TOP_K, detail_store
+from .cache_store import (
+    CACHE_FOLDER,
+    CACHE_FILE,
+    load_cached_responses,
+)
+from .sessions import session_store, content_hash
+from .multi_jd import MULTI_JD_MAX_ROLES, parse_job_descriptions, build_score_matrix
+from .scheduler import scheduler, INTERACTIVE, BULK, INTERACTIVE_MAX_FILES
+from .analytics import analytics
+from .singleflight import inflight_analyses
+from .model_router import model_router
+from .warmup import warmup, WARMUP_ON_STARTUP
+from .admission import admission
+from .token_usage import TOKEN_BUDGET_EXCEEDED, TOKEN_REQUEST_BUDGET, RequestTokenBudget, token_ledger
+from .work_queue import work_queue
+from .profiling import (
+    PROFILE_HEADER,
+    profile_store,
+    requested_mode,
+    start_profile,
+    stop_profile,
+    wrap_for_current_profile,
+)
+from .response_shaping import (
+    FastJSONProvider,
+    compress_response,
+    make_json_response,
+    parse_fields,
+    shape_batch_response,
+)
+from .export import export_response, parse_export_options
+from .result_history import InvalidQueryError, parse_history_filters, parse_history_query, result_history
+from .archive_ingest import (
+    ARCHIVE_MAX_UPLOAD_BYTES,
+    ArchiveLimitError,
+    is_archive_filename,
+    iter_archive_members,
+)
 from datetime import datetime
 import requests
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
 import threading
+import time
 import logging
 import traceback
 import sys
 import json
+import itertools
 import random
 import hashlib
+import hmac
 
 
 # Configure detailed logging
@@ -35,7 +86,19 @@ logger = logging.getLogger(__name__)
 # Get static files path
 static_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "public")
 
+class ResumeRequest(Request):
+    """Request class that raises the upload cap for bulk archive uploads"""
+
+    @property
+    def max_content_length(self):
+        if self.path == '/api/upload-archive':
+            return ARCHIVE_MAX_UPLOAD_BYTES
+        return super().max_content_length
+
 app = Flask(__name__, static_folder=static_path, static_url_path='/static')
+app.request_class = ResumeRequest
+# jsonify (error paths included) uses the same encoder and compression as batch responses
+app.json = FastJSONProvider(app)
 
 # Enable Flask debug logging
 app.logger.setLevel(logging.DEBUG)
@@ -62,6 +125,44 @@ def log_response_info(response):
     logger.info(f"✅ RESPONSE: {response.status_code} - {response.content_length or 0} bytes")
     return response
 
+# Runs before the logging hook above (after_request hooks run in reverse order)
+@app.after_request
+def compress_json_response(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
+def is_admin_request():
+    """True when ADMIN_TOKEN is configured and the request carries it in X-Admin-Token"""
+    admin_token = os.getenv('ADMIN_TOKEN')
+    if not admin_token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', '').encode(), admin_token.encode())
+
+# Opt-in profiling: X-Profile header or ?profile= flag (admin requests only), or PROFILE_SAMPLE_RATE
+@app.before_request
+def start_request_profile():
+    if not request.path.startswith('/api/') or request.path.startswith('/api/admin/'):
+        return
+    if is_admin_request():
+        requested = requested_mode(request.headers.get(PROFILE_HEADER), request.args.get('profile'))
+    else:
+        requested = requested_mode(None, None)
+    if requested:
+        g.profile = start_profile(request.path, *requested)
+
+@app.after_request
+def add_profile_header(response):
+    if 'profile' in g:
+        response.headers['X-Profile-Id'] = g.profile[0].id
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc=None):
+    if 'profile' in g:
+        stop_profile(*g.pop('profile'))
+
+# Worker tasks run under the submitting request's profile
+scheduler.task_wrapper = wrap_for_current_profile
+
 # CORS configuration for frontend communication
 # For production, you might want to be more specific about allowed origins
 
@@ -80,7 +181,8 @@ allowed_origins = os.getenv('ALLOWED_ORIGINS', '').split(',') if os.getenv('ALLO
 CORS(app, 
      origins=allowed_origins,
      supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", PROFILE_HEADER],
+     expose_headers=["X-Profile-Id", "Retry-After"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
 
 # Configuration
@@ -88,107 +190,20 @@ app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB limit
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'pdf'}
 
-# Response cache configuration
-CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'response_cache')
-CACHE_FILE = os.path.join(CACHE_FOLDER, 'resume_responses.json')
+MAX_MATCH_SCORE = 100
+# top_k stops early once K finished results score at least this much (100 = only when provably final)
+TOP_K_SETTLE_SCORE = min(int(os.getenv('TOP_K_SETTLE_SCORE', 85)), MAX_MATCH_SCORE)
+
+ARCHIVE_MAX_IN_FLIGHT = int(os.getenv('ARCHIVE_MAX_IN_FLIGHT', 10))
 
-# Ensure cache folder exists
-os.makedirs(CACHE_FOLDER, exist_ok=True)
+# Warm up in the background so the first requests do not pay cold-start costs
+if WARMUP_ON_STARTUP:
+    warmup.start()
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def load_cached_responses():
-    """Load cached responses from file"""
-    try:
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, 'r', encoding='utf-8') as f:
-                responses = json.load(f)
-                logger.debug(f"📂 Loaded {len(responses)} cached responses")
-                return responses
-        else:
-            logger.debug("📂 No cache file found, starting with empty cache")
-            return []
-    except Exception as e:
-        logger.error(f"❌ Error loading cached responses: {str(e)}")
-        return []
-
-def save_response_to_cache(response_data):
-    """Save a successful response to cache"""
-    try:
-        # Load existing responses
-        cached_responses = load_cached_responses()
-        
-        # Create a cache entry
-        cache_entry = {
-            'id': hashlib.md5(f"{response_data.get('candidate_name', '')}{response_data.get('filename', '')}{datetime.now().isoformat()}".encode()).hexdigest()[:8],
-            'timestamp': datetime.now().isoformat(),
-            'candidate_name': response_data.get('candidate_name', 'Unknown Candidate'),
-            'filename': response_data.get('filename', 'unknown.pdf'),
-            'match_score': response_data.get('match_score', 0),
-            'summary': response_data.get('summary', 'No summary available'),
-            'strengths': response_data.get('strengths', ['None identified']),
-            'improvement_areas': response_data.get('improvement_areas', ['None identified']),
-            'reasoning': response_data.get('reasoning', 'No reasoning provided'),
-            'recommendation': response_data.get('recommendation', 'Unable to determine'),
-            'processing_time': response_data.get('processing_time'),
-            'processing_time_ms': response_data.get('processing_time_ms'),
-        }
-        
-        # Add to cache
-        cached_responses.append(cache_entry)
-        
-        # Keep only the last 100 responses to prevent file from growing too large
-        if len(cached_responses) > 100:
-            cached_responses = cached_responses[-100:]
-        
-        # Save back to file
-        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cached_responses, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"💾 Saved response to cache - Total cached: {len(cached_responses)}")
-        logger.debug(f"💾 Cached entry: {cache_entry['candidate_name']} - {cache_entry['match_score']}%")
-        
-    except Exception as e:
-        logger.error(f"❌ Error saving response to cache: {str(e)}")
-        logger.error(traceback.format_exc())
-
-def get_random_cached_response(filename):
-    """Get a random cached response for mock mode"""
-    try:
-        cached_responses = load_cached_responses()
-        
-        if not cached_responses:
-            logger.warning("⚠️ No cached responses available for mock mode")
-            return None
-        
-        # Select a random response
-        selected_response = random.choice(cached_responses)
-        
-        # Modify it to use the current filename and add some randomization
-        mock_response = selected_response.copy()
-        mock_response['filename'] = filename
-        mock_response['timestamp'] = datetime.now().isoformat()
-        
-        # Add some variation to the score (±5 points)
-        original_score = mock_response['match_score']
-        variation = random.randint(-5, 5)
-        mock_response['match_score'] = max(0, min(100, original_score + variation))
-        
-        # Add mock identifier to candidate name
-        mock_response['candidate_name'] = f"Mock-{mock_response['candidate_name']}"
-        
-        logger.info(f"🎭 Using cached response for mock mode: {mock_response['candidate_name']} - {mock_response['match_score']}%")
-        logger.debug(f"🎭 Original response ID: {selected_response.get('id', 'Unknown')}")
-        
-        return mock_response
-        
-    except Exception as e:
-        logger.error(f"❌ Error getting random cached response: {str(e)}")
-        logger.error(traceback.format_exc())
-        return None
-
 @app.route("/")
 def read_root():
     """Serve the main HTML file"""
@@ -197,12 +212,13 @@ def read_root():
 
 
 
-def process_single_file(file, job_description, mock=False):
+def _run_on_saved_upload(file, handler):
     """
-    Process a single resume file
+    Validate an uploaded file, save it to a temporary path and run handler(temp_path, filename)
+
+    The temporary file is always removed afterwards.
     """
     thread_id = threading.current_thread().ident
-    logger.info(f"🚀 [Thread-{thread_id}] Starting processing file: {file.filename}")
     
     try:
         logger.debug(f"📋 [Thread-{thread_id}] File details - Name: {file.filename}, Content-Type: {file.content_type}, Size: {file.content_length}")
@@ -224,118 +240,11 @@ def process_single_file(file, job_description, mock=False):
         file.save(temp_path)
         logger.info(f"✅ [Thread-{thread_id}] File saved successfully")
         
-        # Validate PDF file
-        logger.debug(f"🔍 [Thread-{thread_id}] Validating PDF structure...")
-        is_valid, error_msg = validate_pdf_file(temp_path)
-        if not is_valid:
-            logger.error(f"❌ [Thread-{thread_id}] PDF validation failed: {error_msg}")
-            os.remove(temp_path)
-            return {
-                "status": "error",
-                "message": f"Invalid PDF file: {error_msg}",
-                "filename": filename
-            }
-        logger.info(f"✅ [Thread-{thread_id}] PDF validation passed")
-        
-        # Extract text from PDF
-        logger.debug(f"📄 [Thread-{thread_id}] Extracting text from PDF...")
-        extraction_result = extract_text_from_pdf(temp_path)
-        
-        if extraction_result.get("error"):
-            logger.error(f"❌ [Thread-{thread_id}] Text extraction failed: {extraction_result['error']}")
-            os.remove(temp_path)
-            return {
-                "status": "error",
-                "message": f"Failed to extract text from PDF: {extraction_result['error']}",
-                "filename": filename
-            }
-        
-        # Analyze the extracted text with AI
-        extracted_text = extraction_result["text"]
-        text_length = len(extracted_text)
-        logger.info(f"✅ [Thread-{thread_id}] Text extracted successfully - {text_length} characters")
-        
-        # Call AI for intelligent analysis
-        try:
-            if not mock:
-                logger.info(f"🤖 [Thread-{thread_id}] Starting AI analysis with Qwen...")
-                logger.debug(f"📊 [Thread-{thread_id}] Job description length: {len(job_description)} chars")
-                logger.debug(f"📊 [Thread-{thread_id}] Resume text length: {text_length} chars")
-                
-                ai_analysis = analyze_resume_job_match_qwen(job_description, extracted_text)
-                
-                logger.info(f"✅ [Thread-{thread_id}] AI analysis completed successfully")
-                logger.debug(f"📊 [Thread-{thread_id}] Analysis result - Candidate: {ai_analysis.get('candidate_name', 'Unknown')}, Score: {ai_analysis.get('match_score', 0)}")
-            else:
-                logger.info(f"🎭 [Thread-{thread_id}] Mock mode - attempting to use cached response")
-                
-                # Try to get a cached response first
-                cached_response = get_random_cached_response(filename)
-                
-                if cached_response:
-                    logger.info(f"✅ [Thread-{thread_id}] Using cached response: {cached_response['candidate_name']}")
-                    ai_analysis = cached_response
-                else:
-                    logger.warning(f"⚠️ [Thread-{thread_id}] No cached responses available, using fallback mock data")
-                    # Fallback mock data if no cache available
-                    ai_analysis = {
-                        'candidate_name': f'Test Candidate {filename}',
-                        'match_score': 75 + (hash(filename) % 25), # Random score between 75-99
-                        'reasoning': f"Mock analysis for {filename}",
-                        'strengths': ['Mock strength 1', 'Mock strength 2'],
-                        'improvement_areas': ['Mock improvement 1', 'Mock improvement 2'],
-                        'recommendation': 'Strong Match',
-                        'summary': f'Mock summary for {filename}',
-                        'timestamp': datetime.now().isoformat(),
-                        'error': None
-                    }
-
-        except Exception as e:
-            logger.error(f"❌ [Thread-{thread_id}] AI analysis failed: {str(e)}")
-            logger.error(f"🔍 [Thread-{thread_id}] Full traceback:")
-            logger.error(traceback.format_exc())
-            
-            # Fallback to basic analysis if AI analysis fails
-            ai_analysis = {
-                'candidate_name': f'Unknown - {filename}',
-                'match_score': 0,
-                'summary': 'Failed to analyze',
-                'strengths': ['None identified'],
-                'improvement_areas': ['None identified'],
-                'reasoning': 'No reasoning provided',
-                'recommendation': 'Unable to determine',
-                'error': str(e)
-            }
+        result = handler(temp_path, filename)
         
         # Clean up temporary file
         logger.debug(f"🗑️ [Thread-{thread_id}] Cleaning up temporary file: {temp_path}")
         os.remove(temp_path)
-        logger.info(f"✅ [Thread-{thread_id}] File processing completed successfully for: {filename}")
-        
-        result = {
-            "status": "success",
-            "filename": filename,
-            "candidate_name": ai_analysis.get('candidate_name', f'No name - {filename}'),
-            "match_score": ai_analysis.get('match_score', 0),
-            "summary": ai_analysis.get('summary', 'No summary available'),
-            "strengths": ai_analysis.get('strengths', ['None identified']),
-            "improvement_areas": ai_analysis.get('improvement_areas', ['None identified']),
-            "reasoning": ai_analysis.get('reasoning', 'No reasoning provided'),
-            "recommendation": ai_analysis.get('recommendation', 'Unable to determine'),
-            "timestamp": datetime.now().isoformat(),
-            "processing_time": ai_analysis.get('processing_time'),
-            "processing_time_ms": ai_analysis.get('processing_time_ms'),
-            "timing_breakdown": ai_analysis.get('timing_breakdown'),
-        }
-        
-        # Save successful real analysis results to cache (not mock results)
-        if not mock and not ai_analysis.get('error'):
-            logger.debug(f"💾 [Thread-{thread_id}] Saving successful result to cache")
-            save_response_to_cache(result)
-        elif mock:
-            logger.debug(f"🎭 [Thread-{thread_id}] Mock result - not saving to cache")
-        
-        logger.debug(f"📊 [Thread-{thread_id}] Returning result: {result['candidate_name']} - {result['match_score']}%")
         return result
 
     except Exception as e:
@@ -354,17 +263,387 @@ def process_single_file(file, job_description, mock=False):
             "filename": file.filename
         }
 
+def process_single_file(file, job_description, mock=False, cancel_event=None, token_budget=None, mode=FULL_ANALYSIS):
+    """
+    Process a single resume file (an upload or a pre-staged StagedFile)
+    """
+    thread_id = threading.current_thread().ident
+    logger.info(f"🚀 [Thread-{thread_id}] Starting processing file: {file.filename}")
+    
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info(f"⏹️ [Thread-{thread_id}] Batch cancelled before processing: {file.filename}")
+        return pending_result(file.filename, "Cancelled before processing")
+    
+    start_time = time.time()
+    if isinstance(file, StagedFile):
+        # Extraction already ran (or is running) since the file was pre-staged
+        result = analyze_extracted(file.result(), job_description, mock, cancel_event, token_budget, mode)
+    else:
+        result = _run_on_saved_upload(
+            file,
+            lambda temp_path, filename: process_resume_path(
+                temp_path, filename, job_description, mock, cancel_event, token_budget, mode
+            )
+        )
+    if result["status"] != "pending":
+        admission.observe_file((time.time() - start_time) * 1000)
+    
+    if result["status"] == "success":
+        logger.info(f"✅ [Thread-{thread_id}] File processing completed successfully for: {result['filename']}")
+        logger.debug(f"📊 [Thread-{thread_id}] Returning result: {result['candidate_name']} - {result['match_score']}%")
+    return result
+
+def run_observed(fn, *args):
+    """
+    Run one admitted unit of scheduler work and feed its service time to admission control
+
+    Results that did no work (pending, or details served from the cache) are not observed.
+    """
+    start_time = time.time()
+    result = fn(*args)
+    if result is not None and result.get("status") != "pending" and not result.get("cached"):
+        admission.observe_file((time.time() - start_time) * 1000)
+    return result
+
+def extract_single_file(file):
+    """
+    Validate and extract the text of a single resume file without analyzing it
+    """
+    thread_id = threading.current_thread().ident
+    logger.info(f"📄 [Thread-{thread_id}] Extracting file: {file.filename}")
+    return _run_on_saved_upload(file, extract_resume)
+
+def get_request_tenant():
+    """
+    Identify the tenant a request is scheduled under
+
+    Uses the API key, then an explicit user or session id, then the client address.
+    """
+    api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
+    if api_key:
+        return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:12]}"
+    user_id = request.headers.get('X-User-Id') or request.values.get('session_id')
+    if user_id:
+        return f"user:{user_id}"
+    return f"ip:{request.headers.get('X-Forwarded-For', request.remote_addr or 'unknown').split(',')[0].strip()}"
+
+def admit_batch(files):
+    """
+    Admit a batch of scheduler work, or shed it when the server is too busy
+
+    Args:
+        files: Number of files (analyses) the batch will run
+
+    Returns:
+        Tuple of (AdmissionTicket, None), or (None, 429 response with Retry-After) when shed
+    """
+    ticket, retry_after = admission.try_admit(files)
+    if ticket is not None:
+        return ticket, None
+    response = jsonify({
+        "status": "error",
+        "message": "Server is busy, please retry later",
+        "retry_after": retry_after
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return None, (response, 429)
+
+def get_request_token_budget(tenant):
+    """
+    Token budget of the current request
+
+    TOKEN_REQUEST_BUDGET applies by default; a token_budget parameter can lower it.
+
+    Returns:
+        Tuple of (RequestTokenBudget, error response or None when the tenant's daily budget is spent)
+    """
+    limit = TOKEN_REQUEST_BUDGET
+    requested = request.values.get('token_budget', type=int)
+    if requested and requested > 0:
+        limit = min(limit, requested) if limit else requested
+    budget = RequestTokenBudget(tenant, limit)
+    if budget.daily_exhausted():
+        logger.warning(f"🪙 Daily token budget exhausted for tenant {tenant}")
+        return budget, (jsonify({
+            "status": "error",
+            "message": "Daily token budget exhausted, please retry tomorrow",
+            "error_code": "token_budget_exceeded"
+        }), 429)
+    return budget, None
+
+def summarize_token_usage(results):
+    """Total the LLM token usage of a batch's results"""
+    summary = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    for result in results:
+        usage = result.get("token_usage")
+        if not usage:
+            continue
+        summary["calls"] += 1
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            summary[field] += usage.get(field) or 0
+    return summary
+
+def _top_k_settled(results, top_k, settle_score=None):
+    """
+    Check whether K good enough candidates have been found
+
+    The top K counts as settled once K completed results score at least
+    settle_score (TOP_K_SETTLE_SCORE by default). A pending file could still
+    score higher, so this trades exactness for latency; with a settle score of
+    MAX_MATCH_SCORE no pending file can displace the top K.
+    """
+    settle_score = TOP_K_SETTLE_SCORE if settle_score is None else settle_score
+    scores = sorted((r.get("match_score") or 0 for r in results if r["status"] == "success"), reverse=True)
+    return len(scores) >= top_k and scores[top_k - 1] >= settle_score
+
+def process_files_concurrently(files, job_description, mock=False, deadline_ms=None, top_k=None, tenant='anonymous',
+                               token_budget=None, mode=FULL_ANALYSIS):
+    """
+    Run process_single_file over a list of uploaded files on the shared scheduler
+
+    Args:
+        files: Uploaded files to process
+        job_description: The job description text
+        mock: Use cached responses instead of calling the AI
+        deadline_ms: Optional time budget; files not finished by then are returned as pending
+        top_k: Optional number of best candidates needed; stops early once they are settled
+        tenant: Fair-share scheduling key for the request
+        token_budget: Token allowance shared by the request's analyses
+        mode: FULL_ANALYSIS, or SCORE_ONLY for the first pass of a two-phase analysis
+
+    Returns:
+        List of per-file result dicts (status "success", "error" or "pending"), in submission order
+    """
+    # Small requests jump ahead of bulk batches in the shared queue
+    priority = INTERACTIVE if len(files) <= INTERACTIVE_MAX_FILES else BULK
+    logger.info(f"🔄 Scheduling {len(files)} files as {priority} work for tenant {tenant}")
+    
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+    cancel_event = threading.Event()
+    
+    # Submit all file processing tasks
+    logger.debug("📋 Submitting all file processing tasks to the scheduler")
+    future_to_index = {
+        scheduler.submit(process_single_file, file, job_description, mock, cancel_event, token_budget, mode,
+                         tenant=tenant, priority=priority): index
+        for index, file in enumerate(files)
+    }
+    
+    logger.info(f"✅ All {len(files)} tasks submitted to the scheduler")
+    
+    # Collect results as they complete, each stored at its file's position
+    results = [None] * len(files)
+    completed_count = 0
+    not_done = set(future_to_index)
+    while not_done:
+        timeout = max(0, deadline - time.monotonic()) if deadline else None
+        done, not_done = wait(not_done, timeout=timeout, return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            index = future_to_index[future]
+            completed_count += 1
+            try:
+                result = future.result()
+                results[index] = result
+                logger.info(f"✅ Task {completed_count}/{len(files)} completed: {result.get('filename', 'Unknown')} - {result.get('status', 'Unknown')}")
+            except Exception as e:
+                logger.error(f"❌ Task {completed_count}/{len(files)} failed: {files[index].filename} - {str(e)}")
+                logger.error(f"🔍 Full traceback:")
+                logger.error(traceback.format_exc())
+                
+                results[index] = {
+                    "status": "error",
+                    "message": f"Error processing file: {str(e)}",
+                    "filename": files[index].filename
+                }
+        
+        if not_done and top_k and _top_k_settled([r for r in results if r is not None], top_k):
+            logger.info(f"🏁 Top-{top_k} ranking settled - cancelling {len(not_done)} remaining task(s)")
+            reason = f"Cancelled after the top {top_k} ranking was settled"
+            break
+        if not_done and deadline and time.monotonic() >= deadline:
+            logger.warning(f"⏰ Deadline of {deadline_ms}ms reached - {len(not_done)} task(s) still pending")
+            reason = "Not completed before the deadline"
+            break
+    
+    if not_done:
+        # Queued tasks are cancelled outright; running ones stop before the AI call
+        cancel_event.set()
+        for future in not_done:
+            future.cancel()
+            index = future_to_index[future]
+            results[index] = pending_result(files[index].filename, reason)
+    
+    return results
+
+def attach_top_details(results, detail_top_k, tenant, deadline=None, token_budget=None):
+    """
+    Generate the full narrative of the best score-only results in place
+
+    Args:
+        results: Per-file results of a score-only pass
+        detail_top_k: Number of top-scoring results that get their details now
+        tenant: Fair-share scheduling key for the request
+        deadline: Optional time.monotonic() deadline; details not ready by then stay pending
+        token_budget: Token allowance of the request, shared with the score-only pass
+    """
+    pending = sorted(
+        (r for r in results if r["status"] == "success" and r.get("details_pending")),
+        key=lambda r: r.get("match_score") or 0, reverse=True
+    )[:detail_top_k]
+    if not pending:
+        return
+    logger.info(f"📝 Generating details for the top {len(pending)} score-only result(s)")
+    futures = {
+        scheduler.submit(run_observed, generate_details, r["detail_id"], token_budget,
+                         tenant=tenant, priority=INTERACTIVE): r
+        for r in pending
+    }
+    for future, result in futures.items():
+        try:
+            details = future.result(timeout=max(0, deadline - time.monotonic()) if deadline else None)
+        except FuturesTimeoutError:
+            # Still available later from /api/results/<detail_id>/details
+            future.cancel()
+            logger.warning(f"⏰ Deadline reached before the details of {result['filename']} were ready")
+            continue
+        except Exception as e:
+            logger.error(f"❌ Detail generation failed for {result['filename']}: {str(e)}")
+            continue
+        if details and not details.get("error"):
+            for field in DETAIL_FIELDS:
+                result[field] = details[field]
+            result["details_pending"] = False
+
+def get_response_options():
+    """
+    Read response-shaping parameters from the request
+
+    fields: "scores", "summary", "full" or a comma-separated list of result fields
+    echo_jd: "false" to leave the job description out of the response
+    compat: "false" to skip duplicating a single result at the top level
+    """
+    return {
+        "fields": parse_fields(request.values.get('fields')),
+        "echo_job_description": request.values.get('echo_jd', 'true').lower() != 'false',
+        "single_result_compat": request.values.get('compat', 'true').lower() != 'false',
+    }
+
+def send_batch_response(response, status_code=200, fields=None):
+    """Serialize a batch response with field selection and negotiated compression"""
+    return make_json_response(
+        shape_batch_response(response, fields),
+        status_code,
+        request.headers.get('Accept-Encoding', '')
+    )
+
+def build_batch_response(results, total_files, job_description, top_k=None,
+                         echo_job_description=True, single_result_compat=True):
+    """
+    Build the upload response payload from per-file processing results
+
+    Args:
+        results: List of per-file result dicts from process_single_file
+        total_files: Number of files that were submitted
+        job_description: The job description the files were screened against
+        top_k: Optional number of best results to return
+        echo_job_description: Include the job description in the response
+        single_result_compat: Duplicate a lone result's fields at the top level
+
+    Returns:
+        Tuple of (response dict, HTTP status code)
+    """
+    # Separate successful, failed and unfinished results
+    successful_results = [r for r in results if r["status"] == "success"]
+    failed_results = [r for r in results if r["status"] == "error"]
+    pending_results = [r for r in results if r["status"] == "pending"]
+    
+    logger.info(f"📊 Processing summary - Success: {len(successful_results)}, Failed: {len(failed_results)}, Pending: {len(pending_results)}")
+    
+    if not successful_results and pending_results:
+        logger.error("⏰ No files completed before the deadline")
+        return {
+            "status": "error",
+            "message": "No files completed before the deadline",
+            "failed_files": failed_results,
+            "pending_results": pending_results
+        }, 504
+    
+    if not successful_results:
+        logger.error("❌ All files failed to process")
+        return {
+            "status": "error",
+            "message": "All files failed to process",
+            "failed_files": failed_results
+        }, 400
+    
+    # Sort successful results by match score (highest first)
+    logger.debug("📊 Sorting results by match score")
+    successful_results.sort(key=lambda x: x.get("match_score", 0), reverse=True)
+    
+    top_candidate = successful_results[0] if successful_results else None
+    if top_candidate:
+        logger.info(f"🏆 Top candidate: {top_candidate['candidate_name']} with {top_candidate['match_score']}% match")
+    
+    if top_k:
+        successful_results = successful_results[:top_k]
+    
+    # Prepare response
+    response = {
+        "status": "success",
+        "message": f"Processed {len(successful_results)} file(s) successfully",
+        "total_files": total_files,
+        "successful_files": len(successful_results),
+        "failed_files": len(failed_results),
+        "results": successful_results,
+        "token_usage": summarize_token_usage(results),
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    if echo_job_description:
+        response["job_description"] = job_description
+    
+    # Add failed files info if any
+    if failed_results:
+        response["failed_results"] = failed_results
+        logger.warning(f"⚠️ {len(failed_results)} files failed: {[f['filename'] for f in failed_results]}")
+    
+    if pending_results:
+        response["pending_files"] = len(pending_results)
+        response["pending_results"] = pending_results
+    
+    # For backward compatibility, if only one file, return single result format
+    if single_result_compat and len(successful_results) == 1 and len(failed_results) == 0 and len(pending_results) == 0:
+        logger.debug("📋 Single file result - using backward compatibility format")
+        result = successful_results[0]
+        response.update({
+            "filename": result["filename"],
+            "candidate_name": result["candidate_name"],
+            "match_score": result["match_score"],
+            "summary": result["summary"],
+            "strengths": result["strengths"],
+            "improvement_areas": result["improvement_areas"],
+            "reasoning": result["reasoning"],
+            "recommendation": result["recommendation"],
+            "processing_time": result.get("processing_time"),
+            "processing_time_ms": result.get("processing_time_ms"),
+            "timing_breakdown": result.get("timing_breakdown"),
+        })
+
+    return response, 200
+
 @app.route("/api/upload-resume", methods=["POST"])
 def upload_resume():
     """
     Upload resume files with job description for AI analysis
-    Supports both single and multiple file uploads
+    Supports both single and multiple file uploads, and "handle" references to pre-staged files
     """
     logger.info("🚀 Starting upload_resume endpoint")
     
     try:
+        handles = request.form.getlist('handle')
         # Check if files were uploaded
-        if 'file' not in request.files:
+        if 'file' not in request.files and not handles:
             logger.warning("❌ No file field in request")
             return jsonify({
                 "status": "error",
@@ -375,121 +654,623 @@ def upload_resume():
         job_description = request.form.get('job_description', '')
         mock = request.form.get('mock', 'false').lower() == 'true'
         # mock = True
+        deadline_ms = request.values.get('deadline_ms', type=int)
+        top_k = request.values.get('top_k', type=int)
+        if (deadline_ms is not None and deadline_ms <= 0) or (top_k is not None and top_k <= 0):
+            return jsonify({
+                "status": "error",
+                "message": "deadline_ms and top_k must be positive integers"
+            }), 400
+        # analysis=two_phase scores every file first and writes details for the top detail_top_k only
+        analysis = request.values.get('analysis', 'full').lower()
+        detail_top_k = request.values.get('detail_top_k', TWO_PHASE_DETAIL_TOP_K, type=int)
+        if analysis not in ('full', 'two_phase') or detail_top_k < 0:
+            return jsonify({
+                "status": "error",
+                "message": "analysis must be 'full' or 'two_phase' and detail_top_k a non-negative integer"
+            }), 400
+        mode = SCORE_ONLY if analysis == 'two_phase' else FULL_ANALYSIS
         
         logger.info(f"📊 Request details - Files: {len(files)}, Job desc length: {len(job_description)}, Mock: {mock}")
         logger.debug(f"📎 File names: {[f.filename for f in files]}")
         
         # Check if files were selected
-        if not files or all(file.filename == '' for file in files):
+        if (not files or all(file.filename == '' for file in files)) and not handles:
             logger.warning("❌ No files selected or all filenames empty")
             return jsonify({
                 "status": "error",
                 "message": "No file selected"
             }), 400
         
-        # Process files concurrently using ThreadPoolExecutor
-        max_workers = min(len(files), 5)
-        logger.info(f"🔄 Starting concurrent processing with {max_workers} workers for {len(files)} files")
+        # Pre-staged files are referenced by handle instead of being uploaded again
+        staged_files, expired_results = prestage_store.resolve(handles)
+        files = [file for file in files if file.filename] + staged_files
+        if handles:
+            logger.info(f"📦 {len(staged_files)} pre-staged file(s), {len(expired_results)} unknown or expired handle(s)")
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all file processing tasks
-            logger.debug("📋 Submitting all file processing tasks to thread pool")
-            future_to_file = {
-                executor.submit(process_single_file, file, job_description, mock): file 
-                for file in files
-            }
-            
-            logger.info(f"✅ All {len(files)} tasks submitted to thread pool")
-            
-            # Collect results as they complete
-            results = []
-            completed_count = 0
-            for future in future_to_file:
+        # Shed the batch if it would wait longer than the admission limit
+        ticket, shed_response = admit_batch(len(files))
+        if ticket is None:
+            return shed_response
+        
+        tenant = get_request_tenant()
+        token_budget, budget_error = get_request_token_budget(tenant)
+        if budget_error:
+            admission.release(ticket)
+            return budget_error
+        
+        deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+        try:
+            results = process_files_concurrently(files, job_description, mock, deadline_ms, top_k, tenant, token_budget,
+                                                 mode)
+            if mode == SCORE_ONLY and detail_top_k:
+                attach_top_details(results, detail_top_k, tenant, deadline, token_budget)
+        finally:
+            admission.release(ticket)
+        results += expired_results
+        
+        logger.info(f"🏁 All concurrent processing completed - {len(results)} results collected")
+        
+        options = get_response_options()
+        response, status_code = build_batch_response(
+            results, len(results), job_description, top_k,
+            options["echo_job_description"], options["single_result_compat"]
+        )
+        if status_code != 200:
+            return send_batch_response(response, status_code)
+        
+        logger.info(f"✅ upload_resume endpoint completed successfully")
+        logger.debug(f"📊 Response size: {len(str(response))} characters")
+        
+        return send_batch_response(response, fields=options["fields"])
+
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in upload_resume endpoint: {str(e)}")
+        logger.error(f"🔍 Full traceback:")
+        logger.error(traceback.format_exc())
+        
+        return jsonify({
+            "status": "error",
+            "message": f"Error processing files: {str(e)}"
+        }), 500
+
+@app.route("/api/prestage", methods=["POST"])
+def prestage_files():
+    """
+    Pre-stage resume files while the job description is still being written
+    Files are validated and extracted in the background; the returned handles
+    can be passed as "handle" fields to /api/upload-resume or a session's files
+    """
+    files = [f for f in request.files.getlist('file') if f.filename]
+    if not files:
+        return jsonify({
+            "status": "error",
+            "message": "No file selected"
+        }), 400
+    
+    staged, failed_results = [], []
+    for file in files:
+        if file.content_type != "application/pdf":
+            failed_results.append({
+                "status": "error",
+                "message": f"File type {file.content_type} not supported. Please upload PDF files only.",
+                "filename": file.filename
+            })
+            continue
+        # The client matches handles to its files by the name it sent and the size
+        staged.append(dict(prestage_store.stage(secure_filename(file.filename), file.read()).describe(),
+                           upload_name=file.filename))
+    
+    logger.info(f"📦 Pre-staged {len(staged)} file(s), rejected {len(failed_results)}")
+    response = {
+        "status": "success" if staged else "error",
+        "message": f"Staged {len(staged)} file(s)",
+        "files": staged,
+        "ttl_seconds": prestage_store.ttl_seconds,
+        "timestamp": datetime.now().isoformat()
+    }
+    if failed_results:
+        response["failed_results"] = failed_results
+    return jsonify(response), 202 if staged else 400
+
+@app.route("/api/prestage/<handle>", methods=["GET"])
+def get_prestaged_file(handle):
+    """Get the extraction status of a pre-staged file"""
+    staged = prestage_store.get(handle)
+    if staged is None:
+        return jsonify({
+            "status": "error",
+            "message": "Staged file not found or expired",
+            "error_code": STAGED_FILE_EXPIRED
+        }), 404
+    return jsonify(dict(staged.describe(), status="success", extraction_status=staged.status))
+
+@app.route("/api/upload-archive", methods=["POST"])
+def upload_archive():
+    """
+    Upload a ZIP or TAR archive of resumes with a job description for AI analysis
+    Members are decompressed one at a time and fed through process_single_file
+    """
+    logger.info("🚀 Starting upload_archive endpoint")
+    
+    try:
+        archive = request.files.get('archive') or request.files.get('file')
+        if archive is None or archive.filename == '':
+            logger.warning("❌ No archive in request")
+            return jsonify({
+                "status": "error",
+                "message": "No archive uploaded"
+            }), 400
+        
+        if not is_archive_filename(archive.filename):
+            logger.warning(f"❌ Unsupported archive type: {archive.filename}")
+            return jsonify({
+                "status": "error",
+                "message": "Unsupported archive type. Please upload a ZIP or TAR archive."
+            }), 400
+        
+        job_description = request.form.get('job_description', '')
+        mock = request.form.get('mock', 'false').lower() == 'true'
+        
+        logger.info(f"📦 Archive: {archive.filename}, Job desc length: {len(job_description)}, Mock: {mock}")
+        
+        results = []
+        total_files = 0
+        tenant = get_request_tenant()
+        token_budget, budget_error = get_request_token_budget(tenant)
+        if budget_error:
+            return budget_error
+        # The member count is unknown until the archive is read, so the batch grows as members are submitted
+        ticket, shed_response = admit_batch(0)
+        if ticket is None:
+            return shed_response
+        pending = {}
+        
+        def collect(done):
+            for future in done:
+                member_name = pending.pop(future)
                 try:
-                    result = future.result()
-                    results.append(result)
-                    completed_count += 1
-                    logger.info(f"✅ Task {completed_count}/{len(files)} completed: {result.get('filename', 'Unknown')} - {result.get('status', 'Unknown')}")
+                    results.append(future.result())
                 except Exception as e:
-                    file = future_to_file[future]
-                    completed_count += 1
-                    logger.error(f"❌ Task {completed_count}/{len(files)} failed: {file.filename} - {str(e)}")
-                    logger.error(f"🔍 Full traceback:")
-                    logger.error(traceback.format_exc())
-                    
+                    logger.error(f"❌ Archive member failed: {member_name} - {str(e)}")
                     results.append({
                         "status": "error",
                         "message": f"Error processing file: {str(e)}",
-                        "filename": file.filename
+                        "filename": member_name
                     })
         
-        logger.info(f"🏁 All concurrent processing completed - {len(results)} results collected")
+        try:
+            for member in iter_archive_members(archive.stream, archive.filename):
+                total_files += 1
+                if member.get("error"):
+                    logger.warning(f"⚠️ Skipping archive member {member['filename']}: {member['error']}")
+                    results.append({
+                        "status": "error",
+                        "message": member["error"],
+                        "filename": member["filename"]
+                    })
+                    continue
+                
+                admission.extend(ticket, 1)
+                future = scheduler.submit(process_single_file, member["file"], job_description, mock, None,
+                                          token_budget, tenant=tenant, priority=BULK)
+                # A finished member stops counting as in flight; the final release covers only the rest
+                future.add_done_callback(lambda _: admission.release_files(ticket, 1))
+                pending[future] = member["filename"]
+                
+                # Bound the number of decompressed members held in memory at once
+                if len(pending) >= ARCHIVE_MAX_IN_FLIGHT:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(list(pending))
+        except (ArchiveLimitError, ValueError) as e:
+            logger.error(f"❌ Archive rejected: {str(e)}")
+            for future in pending:
+                future.cancel()
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+        finally:
+            admission.release(ticket)
         
-        # Separate successful and failed results
-        successful_results = [r for r in results if r["status"] == "success"]
-        failed_results = [r for r in results if r["status"] == "error"]
+        logger.info(f"🏁 Archive processing completed - {len(results)} results from {total_files} members")
         
-        logger.info(f"📊 Processing summary - Success: {len(successful_results)}, Failed: {len(failed_results)}")
+        if total_files == 0:
+            return jsonify({
+                "status": "error",
+                "message": "Archive contains no files"
+            }), 400
+        
+        options = get_response_options()
+        response, status_code = build_batch_response(
+            results, total_files, job_description,
+            echo_job_description=options["echo_job_description"],
+            single_result_compat=options["single_result_compat"]
+        )
+        return send_batch_response(response, status_code, options["fields"])
+
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in upload_archive endpoint: {str(e)}")
+        logger.error(traceback.format_exc())
         
-        if not successful_results:
-            logger.error("❌ All files failed to process")
+        return jsonify({
+            "status": "error",
+            "message": f"Error processing archive: {str(e)}"
+        }), 500
+
+def _parse_top_n(default=None):
+    """Read the optional ?top=N query parameter"""
+    top = request.args.get('top', type=int)
+    if top is None:
+        return default
+    return max(0, top)
+
+@app.route("/api/jobs", methods=["POST"])
+def enqueue_job():
+    """
+    Queue resume files for analysis by standalone workers (python -m app.worker)
+    Returns immediately with a batch id; poll /api/jobs/<batch_id> for results
+    """
+    logger.info("🚀 Starting enqueue_job endpoint")
+    
+    try:
+        files = [f for f in request.files.getlist('file') if f.filename]
+        if not files:
             return jsonify({
                 "status": "error",
-                "message": "All files failed to process",
-                "failed_files": failed_results
+                "message": "No file selected"
             }), 400
         
-        # Sort successful results by match score (highest first)
-        logger.debug("📊 Sorting results by match score")
-        successful_results.sort(key=lambda x: x.get("match_score", 0), reverse=True)
+        job_description = request.form.get('job_description', '')
+        mock = request.form.get('mock', 'false').lower() == 'true'
         
-        top_candidate = successful_results[0] if successful_results else None
-        if top_candidate:
-            logger.info(f"🏆 Top candidate: {top_candidate['candidate_name']} with {top_candidate['match_score']}% match")
+        # Reject non-PDF files now; everything else is up to the workers
+        accepted, rejected = [], []
+        for file in files:
+            if file.content_type != "application/pdf":
+                rejected.append({
+                    "status": "error",
+                    "message": f"File type {file.content_type} not supported. Please upload PDF files only.",
+                    "filename": file.filename
+                })
+            else:
+                accepted.append({"filename": secure_filename(file.filename), "data": file.read()})
+        if not accepted:
+            return jsonify({
+                "status": "error",
+                "message": "All files failed to process",
+                "failed_files": rejected
+            }), 400
         
-        # Prepare response
-        response = {
-            "status": "success",
-            "message": f"Processed {len(successful_results)} file(s) successfully",
-            "total_files": len(files),
-            "successful_files": len(successful_results),
-            "failed_files": len(failed_results),
-            "job_description": job_description,
-            "results": successful_results,
+        tenant = get_request_tenant()
+        token_budget, budget_error = get_request_token_budget(tenant)
+        if budget_error:
+            return budget_error
+        batch_id = work_queue.enqueue_batch(job_description, accepted, {
+            "mock": mock,
+            "tenant": tenant,
+            "token_budget": token_budget.limit,
+        })
+        return jsonify({
+            "status": "queued",
+            "batch_id": batch_id,
+            "total_files": len(accepted),
+            "rejected_files": rejected,
+            "status_url": f"/api/jobs/{batch_id}",
             "timestamp": datetime.now().isoformat()
-        }
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in enqueue_job endpoint: {str(e)}")
+        logger.error(traceback.format_exc())
         
-        # Add failed files info if any
-        if failed_results:
-            response["failed_results"] = failed_results
-            logger.warning(f"⚠️ {len(failed_results)} files failed: {[f['filename'] for f in failed_results]}")
-        
-        # For backward compatibility, if only one file, return single result format
-        if len(successful_results) == 1 and len(failed_results) == 0:
-            logger.debug("📋 Single file result - using backward compatibility format")
-            result = successful_results[0]
-            response.update({
-                "filename": result["filename"],
-                "candidate_name": result["candidate_name"],
-                "match_score": result["match_score"],
-                "summary": result["summary"],
-                "strengths": result["strengths"],
-                "improvement_areas": result["improvement_areas"],
-                "reasoning": result["reasoning"],
-                "recommendation": result["recommendation"],
-                "processing_time": result.get("processing_time"),
-                "processing_time_ms": result.get("processing_time_ms"),
-                "timing_breakdown": result.get("timing_breakdown"),
-            })
+        return jsonify({
+            "status": "error",
+            "message": f"Error queueing files: {str(e)}"
+        }), 500
+
+@app.route("/api/jobs/<batch_id>", methods=["GET"])
+def get_job(batch_id):
+    """
+    Get the progress of a queued batch
+    202 with per-status counts while tasks are outstanding, then the usual batch response
+    """
+    batch = work_queue.get_batch(batch_id)
+    if batch is None:
+        return jsonify({
+            "status": "error",
+            "message": "Batch not found"
+        }), 404
+    
+    if not batch["done"]:
+        return jsonify({
+            "status": "pending",
+            "batch_id": batch_id,
+            "total_files": batch["total"],
+            "counts": batch["counts"],
+            "completed_results": len(batch["results"]),
+            "timestamp": datetime.now().isoformat()
+        }), 202
+    
+    options = get_response_options()
+    response, status_code = build_batch_response(
+        batch["results"], batch["total"], batch["job_description"],
+        echo_job_description=options["echo_job_description"],
+        single_result_compat=options["single_result_compat"]
+    )
+    response["batch_id"] = batch_id
+    if status_code != 200:
+        return send_batch_response(response, status_code)
+    return send_batch_response(response, fields=options["fields"])
+
+@app.route("/api/jobs/<batch_id>/export", methods=["GET"])
+def export_job(batch_id):
+    """
+    Download a finished batch as CSV or XLSX
+    ?format=csv|xlsx, ?columns=a,b,c, ?sort=match_score&order=desc|asc
+    """
+    try:
+        options = parse_export_options(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    counts = work_queue.batch_counts(batch_id)
+    if counts is None:
+        return jsonify({
+            "status": "error",
+            "message": "Batch not found"
+        }), 404
+    if counts["queued"] + counts["leased"]:
+        return jsonify({
+            "status": "error",
+            "message": "Batch is still being processed",
+            "counts": counts
+        }), 409
+    
+    logger.info(f"📤 Exporting batch {batch_id} as {options['format']}")
+    return export_response(
+        work_queue.iter_batch_results(batch_id, options["sort"]), options, f"screening-{batch_id[:8]}"
+    )
+
+@app.route("/api/queue-status", methods=["GET"])
+def get_queue_status():
+    """Get durable work queue depth, expired leases and active workers"""
+    logger.debug("📬 Queue status endpoint called")
+    return jsonify(dict(work_queue.stats(), status="success", timestamp=datetime.now().isoformat()))
+
+@app.route("/api/sessions", methods=["POST"])
+def create_session():
+    """Create a screening session bound to a job description"""
+    payload = request.get_json(silent=True) or request.form
+    job_description = (payload.get('job_description') or '').strip()
+    if not job_description:
+        return jsonify({
+            "status": "error",
+            "message": "job_description is required"
+        }), 400
+    
+    session = session_store.create(job_description)
+    logger.info(f"🗂️ Created screening session {session.id} - Job desc length: {len(job_description)}")
+    
+    return jsonify(dict(session.summary(), status="success")), 201
+
+@app.route("/api/sessions/<session_id>", methods=["GET"])
+def get_session(session_id):
+    """Get a screening session summary with its current top-N ranking"""
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({
+            "status": "error",
+            "message": "Session not found or expired"
+        }), 404
+    
+    return jsonify(dict(
+        session.summary(),
+        status="success",
+        ranking=session.top(_parse_top_n(10)),
+        timestamp=datetime.now().isoformat()
+    ))
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def delete_session(session_id):
+    """Delete a screening session"""
+    if not session_store.delete(session_id):
+        return jsonify({
+            "status": "error",
+            "message": "Session not found or expired"
+        }), 404
+    return jsonify({"status": "success", "session_id": session_id})
+
+@app.route("/api/sessions/<session_id>/ranking", methods=["GET"])
+def get_session_ranking(session_id):
+    """Get the top-N candidates of a session without re-analyzing anything"""
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({
+            "status": "error",
+            "message": "Session not found or expired"
+        }), 404
+    
+    return send_batch_response({
+        "status": "success",
+        "session_id": session.id,
+        "total_candidates": session.size,
+        "ranking": session.top(_parse_top_n()),
+        "timestamp": datetime.now().isoformat()
+    }, fields=parse_fields(request.args.get('fields')))
+
+@app.route("/api/sessions/<session_id>/export", methods=["GET"])
+def export_session(session_id):
+    """
+    Download a session's ranking (followed by its failed files) as CSV or XLSX
+    ?format=csv|xlsx, ?columns=a,b,c, ?sort=match_score&order=desc|asc
+    """
+    try:
+        options = parse_export_options(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({
+            "status": "error",
+            "message": "Session not found or expired"
+        }), 404
+    
+    # The ranking is already best-first; only ascending order needs a sort
+    ranking = session.top()
+    if options["sort"] == "asc":
+        ranking.reverse()
+    logger.info(f"📤 Exporting session {session_id} ({len(ranking)} candidates) as {options['format']}")
+    return export_response(
+        itertools.chain(ranking, session.failed_results), options, f"screening-{session_id[:8]}"
+    )
+
+@app.route("/api/sessions/<session_id>/files", methods=["POST"])
+def add_session_files(session_id):
+    """
+    Add resume files (or "handle" references to pre-staged files) to a session
+    Only files not already in the session are analyzed; results are merged into its ranking
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({
+            "status": "error",
+            "message": "Session not found or expired"
+        }), 404
+    
+    try:
+        files = [f for f in request.files.getlist('file') if f.filename]
+        handles = request.form.getlist('handle')
+        if not files and not handles:
+            return jsonify({
+                "status": "error",
+                "message": "No file selected"
+            }), 400
+        mock = request.form.get('mock', 'false').lower() == 'true'
+        options = get_response_options()
+        staged_files, expired_results = prestage_store.resolve(handles)
         
-        logger.info(f"✅ upload_resume endpoint completed successfully")
-        logger.debug(f"📊 Response size: {len(str(response))} characters")
+        # Skip files whose content was already screened in this session
+        new_files, file_hashes, skipped_files = [], [], []
+        for file in files + staged_files:
+            if isinstance(file, StagedFile):
+                file_hash = file.content_hash
+            else:
+                file_hash = content_hash(file.stream.read())
+                file.stream.seek(0)
+            if session.claim_file(file_hash):
+                new_files.append(file)
+                file_hashes.append(file_hash)
+            else:
+                skipped_files.append(file.filename)
+        
+        logger.info(f"🗂️ Session {session.id}: {len(new_files)} new file(s), {len(skipped_files)} already screened")
         
-        return jsonify(response)
+        tenant = get_request_tenant()
+        token_budget, budget_error = get_request_token_budget(tenant)
+        ticket, shed_response = admit_batch(len(new_files)) if not budget_error else (None, None)
+        if budget_error or ticket is None:
+            for file_hash in file_hashes:
+                session.release_file(file_hash)
+            return budget_error or shed_response
+        
+        try:
+            results = process_files_concurrently(
+                new_files, session.job_description, mock, tenant=tenant, token_budget=token_budget
+            ) if new_files else []
+        finally:
+            admission.release(ticket)
+        for file_hash, result in zip(file_hashes, results):
+            if result["status"] == "success":
+                session.add_result(result, file_hash)
+            elif result["status"] == "error":
+                session.record_failure(file_hash, result)
+            else:
+                session.release_file(file_hash)
+        results += expired_results
+        
+        if results:
+            response, status_code = build_batch_response(
+                results, len(results), session.job_description,
+                echo_job_description=options["echo_job_description"],
+                single_result_compat=options["single_result_compat"]
+            )
+        else:
+            response, status_code = {
+                "status": "success",
+                "message": "All files were already screened in this session",
+                "total_files": 0,
+                "successful_files": 0,
+                "failed_files": 0,
+                "results": [],
+                "timestamp": datetime.now().isoformat()
+            }, 200
+        
+        response.update({
+            "session_id": session.id,
+            "skipped_files": skipped_files,
+            "total_candidates": session.size,
+            "ranking": session.top(_parse_top_n(10)),
+        })
+        return send_batch_response(response, status_code, options["fields"])
 
     except Exception as e:
-        logger.error(f"❌ Unexpected error in upload_resume endpoint: {str(e)}")
-        logger.error(f"🔍 Full traceback:")
+        logger.error(f"❌ Unexpected error adding files to session {session_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        
+        return jsonify({
+            "status": "error",
+            "message": f"Error processing files: {str(e)}"
+        }), 500
+
+@app.route("/api/screen-multi", methods=["POST"])
+def screen_multi():
+    """
+    Screen a batch of resumes against several job descriptions in one request
+    Each resume is extracted once; the N x M analyses share the scheduler
+    """
+    logger.info("🚀 Starting screen_multi endpoint")
+    
+    try:
+        files = [f for f in request.files.getlist('file') if f.filename]
+        if not files:
+            return jsonify({
+                "status": "error",
+                "message": "No file selected"
+            }), 400
+        
+        roles = parse_job_descriptions(request.form)
+        if not roles:
+            return jsonify({
+                "status": "error",
+                "message": "At least one job description is required in job_descriptions"
+            }), 400
+        if len(roles) > MULTI_JD_MAX_ROLES:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {MULTI_JD_MAX_ROLES} job descriptions are supported per request"
+            }), 400
+        
+        mock = request.form.get('mock', 'false').lower() == 'true'
+        include_details = request.form.get('include_details', 'false').lower() == 'true'
+        top_n = request.values.get('top', 5, type=int)
+        tenant = get_request_tenant()
+        token_budget, budget_error = get_request_token_budget(tenant)
+        if budget_error:
+            return budget_error
+        # Each (resume, role) pair is one analysis
+        ticket, shed_response = admit_batch(len(files) * len(roles))
+        if ticket is None:
+            return shed_response
+        try:
+            return run_multi_screening(files, roles, mock, include_details, top_n, tenant, token_budget)
+        finally:
+            admission.release(ticket)
+
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in screen_multi endpoint: {str(e)}")
         logger.error(traceback.format_exc())
         
         return jsonify({
@@ -497,6 +1278,74 @@ def upload_resume():
             "message": f"Error processing files: {str(e)}"
         }), 500
 
+def run_multi_screening(files, roles, mock, include_details, top_n, tenant, token_budget):
+    """Extract each resume once, analyze every (resume, role) pair and build the screen_multi response"""
+    priority = INTERACTIVE if len(files) * len(roles) <= INTERACTIVE_MAX_FILES else BULK
+    
+    logger.info(f"📊 Multi-JD request - Files: {len(files)}, Roles: {len(roles)}, Mock: {mock}")
+    
+    # Phase 1: extract every resume once
+    extraction_futures = [
+        scheduler.submit(extract_single_file, file, tenant=tenant, priority=priority)
+        for file in files
+    ]
+    candidates, failed_results = [], []
+    for file, future in zip(files, extraction_futures):
+        try:
+            extracted = future.result()
+        except Exception as e:
+            extracted = {"status": "error", "message": f"Error processing file: {str(e)}", "filename": file.filename}
+        if extracted["status"] == "success":
+            candidates.append(extracted)
+        else:
+            failed_results.append(extracted)
+    
+    if not candidates:
+        return jsonify({
+            "status": "error",
+            "message": "All files failed to process",
+            "failed_files": failed_results
+        }), 400
+    
+    # Phase 2: analyze every (resume, role) pair
+    pair_futures = {
+        (i, j): scheduler.submit(
+            run_observed, analyze_resume, candidate["text"], candidate["filename"], role["job_description"], mock,
+            token_budget, tenant=tenant, priority=priority
+        )
+        for i, candidate in enumerate(candidates)
+        for j, role in enumerate(roles)
+    }
+    pair_results = {}
+    for key, future in pair_futures.items():
+        try:
+            pair_results[key] = future.result()
+        except Exception as e:
+            logger.error(f"❌ Analysis failed for pair {key}: {str(e)}")
+            pair_results[key] = {"status": "error", "message": str(e)}
+    
+    matrix = build_score_matrix(candidates, roles, pair_results, top_n)
+    response = {
+        "status": "success",
+        "message": f"Screened {len(candidates)} resume(s) against {len(roles)} job description(s)",
+        "total_files": len(files),
+        "successful_files": len(candidates),
+        "failed_files": len(failed_results),
+        **matrix,
+        "token_usage": summarize_token_usage(pair_results.values()),
+        "timestamp": datetime.now().isoformat()
+    }
+    if failed_results:
+        response["failed_results"] = failed_results
+    if include_details:
+        response["details"] = [
+            [pair_results[(i, j)] for j in range(len(roles))]
+            for i in range(len(candidates))
+        ]
+    
+    logger.info(f"✅ screen_multi completed - {len(candidates)} x {len(roles)} analyses")
+    return send_batch_response(response)
+
 @app.route("/api/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
@@ -507,6 +1356,17 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     })
 
+@app.route("/api/ready", methods=["GET"])
+def readiness_check():
+    """Readiness probe: 200 once warm-up has readied every required component, else 503"""
+    logger.debug("🚦 Readiness endpoint called")
+    snapshot = warmup.snapshot()
+    return jsonify(dict(
+        snapshot,
+        status="ready" if snapshot["ready"] else "warming_up",
+        timestamp=datetime.now().isoformat()
+    )), 200 if snapshot["ready"] else 503
+
 @app.route("/api/info", methods=["GET"])
 def get_info():
     """Get API information"""
@@ -517,12 +1377,198 @@ def get_info():
         "description": "Flask-powered resume screening backend",
         "endpoints": [
             "/api/upload-resume",
+            "/api/prestage",
+            "/api/upload-archive",
+            "/api/jobs",
+            "/api/jobs/<batch_id>/export",
+            "/api/queue-status",
+            "/api/sessions",
+            "/api/sessions/<session_id>/export",
+            "/api/screen-multi",
             "/api/health",
+            "/api/ready",
             "/api/info",
-            "/api/cache-status"
+            "/api/cache-status",
+            "/api/history",
+            "/api/history/export",
+            "/api/scheduler-status",
+            "/api/analytics",
+            "/api/model-status",
+            "/api/admission-status",
+            "/api/admin/profiles",
+            "/api/token-usage",
+            "/api/results/<detail_id>/details"
         ]
     })
 
+@app.route("/api/scheduler-status", methods=["GET"])
+def get_scheduler_status():
+    """Get shared scheduler queue depths, per-tenant queue wait times and extraction sandbox state"""
+    logger.debug("🗓️ Scheduler status endpoint called")
+    return jsonify(dict(
+        scheduler.status(),
+        extraction_sandbox=extraction_sandbox.status(),
+        status="success",
+        timestamp=datetime.now().isoformat()
+    ))
+
+@app.route("/api/analytics", methods=["GET"])
+def get_analytics():
+    """
+    Get streaming score and latency analytics
+    Optional ?jd_hash= returns the full score distribution for one job description
+    """
+    logger.debug("📈 Analytics endpoint called")
+    return jsonify(dict(
+        analytics.snapshot(request.args.get('jd_hash')),
+        singleflight=inflight_analyses.stats(),
+        two_phase_details=detail_store.stats(),
+        prestage=prestage_store.stats(),
+        status="success",
+        timestamp=datetime.now().isoformat()
+    ))
+
+@app.route("/api/model-status", methods=["GET"])
+def get_model_status():
+    """Get per-model circuit breaker state, rolling error rate and latency"""
+    logger.debug("🔀 Model status endpoint called")
+    return jsonify(dict(model_router.status(), status="success", timestamp=datetime.now().isoformat()))
+
+@app.route("/api/admission-status", methods=["GET"])
+def get_admission_status():
+    """Get admission control state (in-flight files across all analyzing endpoints) and admitted/shed counts"""
+    logger.debug("🚦 Admission status endpoint called")
+    return jsonify(dict(admission.status(), status="success", timestamp=datetime.now().isoformat()))
+
+def check_admin_token():
+    """Return an error response unless ADMIN_TOKEN is configured and the request carries it"""
+    if not os.getenv('ADMIN_TOKEN'):
+        return jsonify({"status": "error", "message": "Admin endpoints are disabled until ADMIN_TOKEN is set"}), 404
+    if not is_admin_request():
+        return jsonify({"status": "error", "message": "Admin token required"}), 403
+    return None
+
+@app.route("/api/admin/profiles", methods=["GET"])
+def list_profiles():
+    """List recently captured request profiles"""
+    logger.debug("🔬 Profile list endpoint called")
+    denied = check_admin_token()
+    if denied:
+        return denied
+    return jsonify({"status": "success", "profiles": profile_store.list()})
+
+@app.route("/api/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """
+    Download a captured profile
+    ?format=pstats|text for cprofile profiles, collapsed|text for sampling profiles
+    """
+    logger.debug(f"🔬 Profile endpoint called for {profile_id}")
+    denied = check_admin_token()
+    if denied:
+        return denied
+    
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        return jsonify({"status": "error", "message": "Profile not found"}), 404
+    
+    fmt = request.args.get('format') or profile.formats()[0]
+    try:
+        body = profile.render(fmt, limit=request.args.get('limit', 50, type=int))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    if fmt == 'pstats':
+        return Response(body, mimetype='application/octet-stream', headers={
+            "Content-Disposition": f"attachment; filename=profile-{profile_id}.pstats"
+        })
+    return Response(body, mimetype='text/plain')
+
+@app.route("/api/token-usage", methods=["GET"])
+def get_token_usage():
+    """Get LLM token usage per model, job description and tenant, plus configured limits"""
+    logger.debug("🪙 Token usage endpoint called")
+    return jsonify(dict(token_ledger.snapshot(), status="success", timestamp=datetime.now().isoformat()))
+
+@app.route("/api/results/<detail_id>/details", methods=["GET"])
+def get_result_details(detail_id):
+    """
+    Get the full narrative of a two-phase (score-only) result
+
+    Generated on first request and cached for later views.
+    """
+    logger.info(f"📝 Details requested for result {detail_id}")
+    if detail_store.get(detail_id) is None:
+        return jsonify({
+            "status": "error",
+            "message": "Result details not found or expired"
+        }), 404
+    tenant = get_request_tenant()
+    token_budget, budget_error = get_request_token_budget(tenant)
+    if budget_error:
+        return budget_error
+    try:
+        details = generate_details(detail_id, token_budget)
+    except Exception as e:
+        logger.error(f"❌ Detail generation failed for {detail_id}: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({
+            "status": "error",
+            "message": f"Error generating details: {str(e)}"
+        }), 500
+    if details is None:
+        return jsonify({
+            "status": "error",
+            "message": "Result details not found or expired"
+        }), 404
+    if details.get("error_code") == TOKEN_BUDGET_EXCEEDED:
+        return jsonify(dict(details, status="error", message=details["error"])), 429
+    if details.get("error"):
+        return jsonify(dict(details, status="error", message="Details could not be generated")), 502
+    return jsonify(dict(details, status="success"))
+
+@app.route("/api/history", methods=["GET"])
+def query_history():
+    """
+    Query persisted results, one page at a time
+    Filters: ?jd_hash=, ?min_score=, ?max_score=, ?recommendation=a,b, ?since=, ?until=
+    ?sort=time|score&order=desc|asc, ?limit=N, ?cursor=<next_cursor of the previous page>, ?fields=
+    """
+    logger.debug("🗄️ History query endpoint called")
+    try:
+        query = parse_history_query(request.args)
+        page = result_history.query(query["filters"], query["sort"], query["order"], query["limit"], query["cursor"])
+    except InvalidQueryError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    return send_batch_response({
+        "status": "success",
+        "count": len(page["results"]),
+        "results": page["results"],
+        "next_cursor": page["next_cursor"],
+        "sort": query["sort"],
+        "order": query["order"],
+        "timestamp": datetime.now().isoformat()
+    }, fields=parse_fields(request.args.get('fields')))
+
+@app.route("/api/history/export", methods=["GET"])
+def export_history():
+    """
+    Download persisted results as CSV or XLSX
+    Takes the /api/history filters plus ?format=csv|xlsx, ?columns=a,b,c, ?sort=match_score&order=desc|asc
+    Without a sort the newest results come first
+    """
+    try:
+        options = parse_export_options(request.args)
+        filters = parse_history_filters(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    history = result_history.iter_results(filters, "score", options["sort"]) if options["sort"] \
+        else result_history.iter_results(filters)
+    logger.info(f"📤 Exporting result history as {options['format']}")
+    return export_response(history, options, "screening-history")
+
 @app.route("/api/cache-status", methods=["GET"])
 def get_cache_status():
     """Get cache status and statistics"""
@@ -0,0 +1,212 @@
+"""
+Latency-aware LLM model routing with per-model circuit breakers
+
+Each call is routed to the first healthy model whose observed latency fits the
+SLO, with a token budget sized from the resume length. Rolling error rates and
+latencies are tracked per model; a model whose error rate or p95 latency
+crosses its threshold has its circuit opened and is skipped until a cooldown
+passes, after which a single trial call decides whether it closes again.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Preferred model first; the fallback should be the faster one
+LLM_PRIMARY_MODEL = os.getenv('LLM_PRIMARY_MODEL', 'qwen-turbo')
+LLM_FALLBACK_MODEL = os.getenv('LLM_FALLBACK_MODEL', 'qwen-flash')
+LLM_LATENCY_SLO_MS = float(os.getenv('LLM_LATENCY_SLO_MS', 20000))
+LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', 2000))
+# Full-analysis JSON (reasoning, strengths, summary) needs about 2000 tokens regardless
+# of resume length, so by default the budget does not scale; lower this to opt in
+LLM_MIN_TOKENS = min(int(os.getenv('LLM_MIN_TOKENS', 2000)), LLM_MAX_TOKENS)
+# Resumes at least this long get the full token budget
+LLM_LONG_RESUME_CHARS = int(os.getenv('LLM_LONG_RESUME_CHARS', 8000))
+# Resumes shorter than this go to the fallback (fast) model first; 0 (default) disables
+LLM_SHORT_RESUME_CHARS = int(os.getenv('LLM_SHORT_RESUME_CHARS', 0))
+
+BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', 50))
+BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', 5))
+BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+BREAKER_LATENCY_MS = float(os.getenv('LLM_BREAKER_LATENCY_MS', 2 * LLM_LATENCY_SLO_MS))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv('LLM_BREAKER_COOLDOWN_SECONDS', 30))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ModelsUnavailableError(Exception):
+    """Raised when no model could serve a call"""
+
+
+class ModelHealth:
+    """Rolling outcome window and circuit breaker state for one model"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.calls = 0
+        self.failures = 0
+        self._window = deque(maxlen=BREAKER_WINDOW)  # (ok, latency_ms)
+
+    def error_rate(self) -> float:
+        if not self._window:
+            return 0.0
+        return sum(1 for ok, _ in self._window if not ok) / len(self._window)
+
+    def latency_p95(self) -> float:
+        latencies = sorted(ms for ok, ms in self._window if ok)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def allow(self, now: float) -> bool:
+        """Whether a call may be sent now; caller holds the router lock"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and now - self.opened_at >= BREAKER_COOLDOWN_SECONDS:
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record(self, ok: bool, latency_ms: float, now: float):
+        """Record a call outcome and update the breaker; caller holds the router lock"""
+        self.calls += 1
+        if not ok:
+            self.failures += 1
+        self._window.append((ok, latency_ms))
+
+        if self.state == HALF_OPEN:
+            self.trial_in_flight = False
+            if ok and latency_ms <= BREAKER_LATENCY_MS:
+                logger.info(f"✅ Circuit closed for model {self.name}")
+                self.state = CLOSED
+                self._window.clear()
+            else:
+                self._open(now)
+            return
+
+        if self.state == CLOSED and len(self._window) >= BREAKER_MIN_CALLS:
+            if self.error_rate() >= BREAKER_ERROR_RATE or self.latency_p95() > BREAKER_LATENCY_MS:
+                self._open(now)
+
+    def _open(self, now: float):
+        logger.warning(f"⚠️ Circuit opened for model {self.name} "
+                       f"(error rate {self.error_rate():.0%}, p95 {self.latency_p95():.0f}ms)")
+        self.state = OPEN
+        self.opened_at = now
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "window_error_rate": round(self.error_rate(), 3),
+            "window_latency_p95_ms": round(self.latency_p95(), 1),
+        }
+
+
+class ModelRouter:
+    """Chooses a model and token budget per call and fails over between models"""
+
+    def __init__(self, models: Optional[List[str]] = None, latency_slo_ms: float = LLM_LATENCY_SLO_MS):
+        models = models or [LLM_PRIMARY_MODEL, LLM_FALLBACK_MODEL]
+        self.models = [m for i, m in enumerate(models) if m and m not in models[:i]]
+        self.latency_slo_ms = latency_slo_ms
+        self._health = {m: ModelHealth(m) for m in self.models}
+        self.heuristic_fallbacks = 0
+        self._lock = threading.Lock()
+
+    def token_budget(self, resume_chars: int) -> int:
+        """Scale max_tokens with resume length between LLM_MIN_TOKENS and LLM_MAX_TOKENS"""
+        fraction = min(max(resume_chars, 0) / max(LLM_LONG_RESUME_CHARS, 1), 1.0)
+        return int(LLM_MIN_TOKENS + (LLM_MAX_TOKENS - LLM_MIN_TOKENS) * fraction)
+
+    def short_resume_first(self, resume_chars: int) -> bool:
+        """Whether a resume is short enough to try the fallback (fast) model first"""
+        return len(self.models) > 1 and resume_chars < LLM_SHORT_RESUME_CHARS
+
+    def route(self, resume_chars: int) -> List[str]:
+        """
+        Order models for a call: healthy models whose p95 latency fits the SLO
+        first, then healthy ones that are too slow, then those due a half-open trial.
+        With LLM_SHORT_RESUME_CHARS set, short resumes try the fallback (fast) model
+        before the primary.
+        """
+        models = self.models
+        if self.short_resume_first(resume_chars):
+            models = models[1:] + models[:1]
+        with self._lock:
+            within_slo, over_slo = [], []
+            for model in models:
+                health = self._health[model]
+                if health.state != CLOSED:
+                    continue
+                if health.latency_p95() <= self.latency_slo_ms:
+                    within_slo.append(model)
+                else:
+                    over_slo.append(model)
+            # When no model fits the SLO, prefer the fastest observed one
+            over_slo.sort(key=lambda m: self._health[m].latency_p95())
+            trials = [m for m in models if self._health[m].state != CLOSED]
+            return within_slo + over_slo + trials
+
+    def call(self, fn: Callable[[str, int], Any], resume_chars: int, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Run fn(model, max_tokens), failing over to the next model on errors
+
+        Args:
+            fn: Callable making one LLM call
+            resume_chars: Resume length used to order models and size the token budget
+            max_tokens: Fixed token budget overriding the length-based one
+
+        Returns:
+            Dict with "response", "model", "max_tokens" and "short_resume_routed" (the
+            fallback model was preferred because the resume is short)
+
+        Raises:
+            ModelsUnavailableError: Every model failed or has an open circuit
+        """
+        max_tokens = max_tokens or self.token_budget(resume_chars)
+        errors = []
+        for model in self.route(resume_chars):
+            with self._lock:
+                if not self._health[model].allow(time.time()):
+                    continue
+            start = time.time()
+            try:
+                response = fn(model, max_tokens)
+            except Exception as e:
+                with self._lock:
+                    self._health[model].record(False, (time.time() - start) * 1000, time.time())
+                logger.warning(f"⚠️ Model {model} failed, trying next: {e}")
+                errors.append(f"{model}: {e}")
+                continue
+            with self._lock:
+                self._health[model].record(True, (time.time() - start) * 1000, time.time())
+            return {"response": response, "model": model, "max_tokens": max_tokens,
+                    "short_resume_routed": self.short_resume_first(resume_chars) and model == self.models[1]}
+
+        with self._lock:
+            self.heuristic_fallbacks += 1
+        raise ModelsUnavailableError("; ".join(errors) or "All model circuits are open")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "latency_slo_ms": self.latency_slo_ms,
+                "models": {m: self._health[m].snapshot() for m in self.models},
+                "heuristic_fallbacks": self.heuristic_fallbacks,
+            }
+
+
+model_router = ModelRouter()
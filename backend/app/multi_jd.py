@@ -0,0 +1,126 @@
+"""
+Multi-job-description screening: score matrix and best-fit views
+"""
+import json
+import os
+from typing import Any, Dict, List
+
+from .pipeline import job_description_hash
+
+MULTI_JD_MAX_ROLES = int(os.getenv('MULTI_JD_MAX_ROLES', 10))
+
+
+def parse_job_descriptions(form) -> List[Dict[str, str]]:
+    """
+    Read job descriptions from a multipart request's form
+
+    Accepts repeated "job_descriptions" form fields, or a single field holding a
+    JSON-encoded list of strings or {"title", "job_description"} objects.
+    Optional "job_titles" form fields label the roles.
+
+    Returns:
+        List of {"title", "job_description"} dicts with empty entries removed
+    """
+    raw = form.getlist('job_descriptions')
+    if len(raw) == 1 and raw[0].lstrip().startswith('['):
+        try:
+            raw = json.loads(raw[0])
+        except json.JSONDecodeError:
+            pass
+    if not isinstance(raw, list):
+        raw = []
+
+    titles = form.getlist('job_titles')
+    roles = []
+    for i, item in enumerate(raw):
+        if isinstance(item, dict):
+            text = (item.get('job_description') or '').strip()
+            title = (item.get('title') or '').strip()
+        else:
+            text = str(item).strip()
+            title = titles[i].strip() if i < len(titles) else ''
+        if not text:
+            continue
+        roles.append({
+            "title": title or text.splitlines()[0][:60],
+            "job_description": text,
+        })
+    return roles
+
+
+def build_score_matrix(candidates: List[Dict[str, Any]], roles: List[Dict[str, str]],
+                       pair_results: Dict[tuple, Dict[str, Any]], top_n: int = 5) -> Dict[str, Any]:
+    """
+    Arrange N x M analysis results into a matrix with best-fit views
+
+    Args:
+        candidates: Extracted resumes, one dict with "filename" per row
+        roles: Job descriptions, one dict with "title" per column
+        pair_results: Analysis result keyed by (candidate index, role index)
+        top_n: Number of best candidates listed per role
+
+    Returns:
+        Dict with "roles", "candidates" (one score row each with its best role)
+        and "best_candidates_per_role"
+    """
+    role_entries = [
+        {
+            "index": j,
+            "title": role["title"],
+            "job_description_hash": job_description_hash(role["job_description"])[:16],
+        }
+        for j, role in enumerate(roles)
+    ]
+
+    rows = []
+    per_role = [[] for _ in roles]
+    for i, candidate in enumerate(candidates):
+        scores = []
+        cells = []
+        name = None
+        for j in range(len(roles)):
+            result = pair_results.get((i, j)) or {}
+            ok = result.get("status") == "success" and not result.get("error")
+            score = result.get("match_score", 0) if ok else None
+            scores.append(score)
+            cells.append({
+                "match_score": score,
+                "recommendation": result.get("recommendation") if ok else None,
+                "status": result.get("status", "error"),
+            })
+            if ok:
+                name = name or result.get("candidate_name")
+                per_role[j].append({
+                    "filename": candidate["filename"],
+                    "candidate_name": result.get("candidate_name"),
+                    "match_score": score,
+                    "recommendation": result.get("recommendation"),
+                })
+
+        scored = [(s, j) for j, s in enumerate(scores) if s is not None]
+        best_score, best_role = max(scored, key=lambda x: (x[0], -x[1])) if scored else (None, None)
+        rows.append({
+            "filename": candidate["filename"],
+            "candidate_name": name or f"Unknown - {candidate['filename']}",
+            "scores": scores,
+            "cells": cells,
+            "best_role": best_role,
+            "best_role_title": roles[best_role]["title"] if best_role is not None else None,
+            "best_score": best_score,
+        })
+
+    rows.sort(key=lambda r: (r["best_score"] is None, -(r["best_score"] or 0)))
+    best_per_role = []
+    for j, entries in enumerate(per_role):
+        entries.sort(key=lambda e: e["match_score"] or 0, reverse=True)
+        best_per_role.append({
+            "role": j,
+            "title": roles[j]["title"],
+            "candidates": entries[:top_n],
+        })
+
+    return {
+        "roles": role_entries,
+        "candidates": rows,
+        "best_candidates_per_role": best_per_role,
+    }
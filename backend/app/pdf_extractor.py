@@ -1,24 +1,536 @@
 """
-PDF Text Extraction Module using PyPDF2
+PDF Text Extraction Module with pluggable backends (PyPDF2, raw content stream, pdfplumber)
 """
 import PyPDF2
 import os
-from typing import Dict, Optional, Tuple
-from datetime import datetime
+import re
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
 
-def extract_text_from_pdf(file_path: str) -> Dict[str, any]:
+# Extraction budgets: stop reading pages once either is reached (0 disables)
+EXTRACT_MAX_CHARS = int(os.getenv('EXTRACT_MAX_CHARS', 20000))
+EXTRACT_MAX_PAGES = int(os.getenv('EXTRACT_MAX_PAGES', 10))
+
+# Resource guards against malformed or adversarial files (0 disables)
+EXTRACT_MAX_PAGE_COUNT = int(os.getenv('EXTRACT_MAX_PAGE_COUNT', 500))  # documents with more pages are rejected
+EXTRACT_MAX_STREAM_BYTES = int(os.getenv('EXTRACT_MAX_STREAM_BYTES', 8 * 1024 * 1024))  # per page, as stored
+
+# error_code values of failed extractions
+EXTRACTION_TIMEOUT = 'extraction_timeout'
+RESOURCE_LIMIT = 'resource_limit'
+
+# Simple fonts whose byte codes the raw backend can decode without the font program
+_SIMPLE_FONT_SUBTYPES = {'/Type1', '/TrueType', '/MMType1'}
+_SIMPLE_ENCODINGS = {None, '/WinAnsiEncoding', '/StandardEncoding', '/MacRomanEncoding'}
+# Standard 14 fonts with a built-in symbolic encoding
+_SYMBOLIC_BASE_FONTS = {'/Symbol', '/ZapfDingbats'}
+
+# Adobe StandardEncoding, as the codes where it differs from Latin-1
+_STANDARD_ENCODING = str.maketrans({
+    0x27: '\u2019', 0x60: '\u2018', 0xA4: '\u2044', 0xA6: '\u0192', 0xA8: '\u00a4', 0xA9: "'",
+    0xAA: '\u201c', 0xAC: '\u2039', 0xAD: '\u203a', 0xAE: '\ufb01', 0xAF: '\ufb02', 0xB1: '\u2013',
+    0xB2: '\u2020', 0xB3: '\u2021', 0xB4: '\u00b7', 0xB7: '\u2022', 0xB8: '\u201a', 0xB9: '\u201e',
+    0xBA: '\u201d', 0xBC: '\u2026', 0xBD: '\u2030', 0xC1: '`', 0xC2: '\u00b4', 0xC3: '\u02c6',
+    0xC4: '\u02dc', 0xC5: '\u00af', 0xC6: '\u02d8', 0xC7: '\u02d9', 0xC8: '\u00a8', 0xCA: '\u02da',
+    0xCB: '\u00b8', 0xCD: '\u02dd', 0xCE: '\u02db', 0xCF: '\u02c7', 0xD0: '\u2014', 0xE1: '\u00c6',
+    0xE3: '\u00aa', 0xE8: '\u0141', 0xE9: '\u00d8', 0xEA: '\u0152', 0xEB: '\u00ba', 0xF1: '\u00e6',
+    0xF5: '\u0131', 0xF8: '\u0142', 0xF9: '\u00f8', 0xFA: '\u0153', 0xFB: '\u00df',
+})
+
+
+class ExtractionLimitError(Exception):
+    """Raised when a file exceeds an extraction resource guard"""
+
+    def __init__(self, message: str, code: str = RESOURCE_LIMIT):
+        super().__init__(message)
+        self.code = code
+
+
+def _content_streams(page) -> list:
+    contents = page.get('/Contents')
+    if contents is None:
+        return []
+    contents = contents.get_object()
+    if isinstance(contents, PyPDF2.generic.ArrayObject):
+        return [item.get_object() for item in contents]
+    return [contents]
+
+
+def check_resource_guards(pdf_reader, max_pages: int):
+    """
+    Reject documents with too many pages or oversized content streams before extracting
+
+    Only the stored (compressed) stream sizes of the pages that will be read are
+    checked; decompression bombs are left to the sandbox memory limit.
+
+    Raises:
+        ExtractionLimitError: A guard was exceeded
+    """
+    page_count = len(pdf_reader.pages)
+    if EXTRACT_MAX_PAGE_COUNT and page_count > EXTRACT_MAX_PAGE_COUNT:
+        raise ExtractionLimitError(f"PDF has {page_count} pages, more than the limit of {EXTRACT_MAX_PAGE_COUNT}")
+    if not EXTRACT_MAX_STREAM_BYTES:
+        return
+    for page_num, page in enumerate(pdf_reader.pages):
+        if max_pages and page_num >= max_pages:
+            break
+        # Stored bytes, without decoding; PyPDF2 drops /Length from streams it has decoded
+        stream_bytes = sum(len(getattr(stream, '_data', b'') or b'') for stream in _content_streams(page))
+        if stream_bytes > EXTRACT_MAX_STREAM_BYTES:
+            raise ExtractionLimitError(
+                f"Page {page_num + 1} content is {stream_bytes} bytes, more than the limit of {EXTRACT_MAX_STREAM_BYTES}"
+            )
+
+
+def _format_page(page_num: int, page_text: Optional[str]) -> str:
+    if page_text:
+        return f"--- Page {page_num + 1} ---\n{page_text}"
+    return f"--- Page {page_num + 1} ---\n[No text content]"
+
+
+def _reader_metadata(pdf_reader) -> Dict[str, Any]:
+    if not pdf_reader.metadata:
+        return {}
+    return {
+        "title": pdf_reader.metadata.get('/Title', ''),
+        "author": pdf_reader.metadata.get('/Author', ''),
+        "subject": pdf_reader.metadata.get('/Subject', ''),
+        "creator": pdf_reader.metadata.get('/Creator', ''),
+        "producer": pdf_reader.metadata.get('/Producer', ''),
+        "creation_date": pdf_reader.metadata.get('/CreationDate', ''),
+        "modification_date": pdf_reader.metadata.get('/ModDate', '')
+    }
+
+
+class PageError(str):
+    """Placeholder text yielded for a page a backend failed to extract; not counted as content"""
+
+
+class PdfExtractor:
+    """
+    Base class for text extraction backends
+
+    Subclasses implement iter_pages, which must be lazy so extraction can stop
+    as soon as the character or page budget is reached.
     """
-    Extract all text from a PDF file using PyPDF2
+
+    name = "base"
+
+    @classmethod
+    def available(cls) -> bool:
+        return True
+
+    def open(self, file_path: str, pdf_reader=None):
+        """Prepare the backend; returns (page_count, metadata)"""
+        raise NotImplementedError
+
+    def iter_pages(self) -> Iterator[str]:
+        """Yield the text of each page in order"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyPDF2Extractor(PdfExtractor):
+    """Default backend using PyPDF2's layout-aware text extraction"""
+
+    name = "pypdf2"
+
+    def open(self, file_path: str, pdf_reader=None):
+        self._file = None
+        if pdf_reader is None:
+            self._file = open(file_path, 'rb')
+            pdf_reader = PyPDF2.PdfReader(self._file)
+        self.reader = pdf_reader
+        return len(pdf_reader.pages), _reader_metadata(pdf_reader)
+
+    def _page_text(self, page) -> str:
+        return page.extract_text()
+
+    def iter_pages(self) -> Iterator[str]:
+        for page in self.reader.pages:
+            try:
+                yield self._page_text(page)
+            except (ExtractionLimitError, MemoryError):
+                raise
+            except Exception as e:
+                yield PageError(f"[Error extracting text: {str(e)}]")
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def _font_encoding(font) -> Tuple[bool, Optional[str]]:
+    """
+    Classify a font for the raw backend
+
+    Returns:
+        (simple, encoding) where encoding is the base encoding name the font's byte
+        codes are in; simple is False when the codes cannot be decoded without
+        the font program or a /ToUnicode map
+    """
+    if font.get('/Subtype') not in _SIMPLE_FONT_SUBTYPES or '/ToUnicode' in font:
+        return False, None
+    encoding = font.get('/Encoding')
+    if encoding is not None:
+        encoding = encoding.get_object()
+        if isinstance(encoding, PyPDF2.generic.DictionaryObject):
+            # A /Differences array remaps individual codes to arbitrary glyphs
+            if '/Differences' in encoding:
+                return False, None
+            encoding = encoding.get('/BaseEncoding')
+        encoding = str(encoding) if encoding is not None else None
+        return encoding in _SIMPLE_ENCODINGS, encoding
+    # Without /Encoding the font's built-in encoding applies, which is only known
+    # for the non-symbolic standard 14 fonts (not embedded, StandardEncoding)
+    if font.get('/Subtype') != '/Type1' or '/FontDescriptor' in font:
+        return False, None
+    return font.get('/BaseFont') not in _SYMBOLIC_BASE_FONTS, None
+
+
+def _page_fonts(page) -> Optional[Dict[str, Optional[str]]]:
+    """Map a page's font resource names to their encodings, or None if any font is not simple"""
+    resources = page.get('/Resources')
+    resources = resources.get_object() if resources else {}
+    # Form XObjects carry their own content streams, which the raw backend does not follow
+    xobjects = resources.get('/XObject')
+    for xobject in (xobjects.get_object().values() if xobjects else []):
+        if xobject.get_object().get('/Subtype') == '/Form':
+            return None
+    fonts = resources.get('/Font')
+    encodings = {}
+    for name, font_ref in (fonts.get_object().items() if fonts else []):
+        simple, encoding = _font_encoding(font_ref.get_object())
+        if not simple:
+            return None
+        encodings[str(name)] = encoding
+    return encodings
+
+
+def _decode_bytes(raw: bytes, encoding: Optional[str]) -> str:
+    if encoding == '/WinAnsiEncoding':
+        return raw.decode('cp1252', errors='replace')
+    if encoding == '/MacRomanEncoding':
+        return raw.decode('mac_roman')
+    return raw.decode('latin-1').translate(_STANDARD_ENCODING)
+
+
+class RawStreamExtractor(PyPDF2Extractor):
+    """
+    Fast path that reads text-showing operators straight from page content streams
+
+    Only correct for simple fonts with a standard encoding and no /ToUnicode map,
+    which the probe checks on every page before selecting it. Skips PyPDF2's
+    font decoding and layout reconstruction.
+    """
+
+    name = "raw"
+
+    _TOKEN = re.compile(rb'<[0-9A-Fa-f\s]*>|\[|\]|-?\d*\.?\d+|/[^\s/\[\]()<>]+|[A-Za-z\'"*]+')
+    _ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f', b'(': b'(', b')': b')', b'\\': b'\\'}
+    # Vertical moves smaller than this (in text space units) stay on the same line
+    _LINE_EPSILON = 1.0
+
+    @classmethod
+    def _decode_literal(cls, token: bytes) -> bytes:
+        body = token[1:-1]
+        out = bytearray()
+        i = 0
+        while i < len(body):
+            ch = body[i:i + 1]
+            if ch == b'\\' and i + 1 < len(body):
+                nxt = body[i + 1:i + 2]
+                if nxt in cls._ESCAPES:
+                    out += cls._ESCAPES[nxt]
+                    i += 2
+                    continue
+                octal = re.match(rb'[0-7]{1,3}', body[i + 1:i + 4])
+                if octal:
+                    out.append(int(octal.group(), 8) & 0xFF)
+                    i += 1 + len(octal.group())
+                    continue
+                i += 1
+                continue
+            out += ch
+            i += 1
+        return bytes(out)
+
+    @classmethod
+    def _decode_string(cls, token: bytes, encoding: Optional[str] = None) -> str:
+        if token.startswith(b'<'):
+            hex_digits = re.sub(rb'\s', b'', token[1:-1])
+            if len(hex_digits) % 2:
+                hex_digits += b'0'
+            raw = bytes.fromhex(hex_digits.decode('ascii'))
+        else:
+            raw = cls._decode_literal(token)
+        return _decode_bytes(raw, encoding)
+
+    @classmethod
+    def _tokens(cls, data: bytes) -> Iterator[bytes]:
+        """Tokenize a content stream; literal strings may contain balanced parentheses"""
+        pos = 0
+        length = len(data)
+        while pos < length:
+            if data[pos:pos + 1] == b'(':
+                depth, end = 0, pos
+                while end < length:
+                    ch = data[end:end + 1]
+                    if ch == b'\\':
+                        end += 2
+                        continue
+                    if ch == b'(':
+                        depth += 1
+                    elif ch == b')':
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    end += 1
+                yield data[pos:end + 1]
+                pos = end + 1
+                continue
+            match = cls._TOKEN.match(data, pos)
+            if match:
+                yield match.group()
+                pos = match.end()
+            else:
+                pos += 1
+
+    @staticmethod
+    def _numbers(operands: list) -> list:
+        numbers = []
+        for t in operands:
+            try:
+                numbers.append(float(t))
+            except ValueError:
+                pass
+        return numbers
+
+    def _page_text(self, page) -> str:
+        contents = page.get_contents()
+        if contents is None:
+            return ""
+        fonts = _page_fonts(page) or {}
+        encoding = None
+        # Vertical position and scale of the current text line, to tell line breaks from word gaps
+        line_y, line_scale = 0.0, 1.0
+        parts = []
+        operands = []
+
+        def brk(separator: str):
+            if parts and parts[-1] not in ('\n', separator):
+                parts.append(separator)
+
+        for token in self._tokens(contents.get_data()):
+            if token[:1] in (b'(', b'<') or token == b'[' or token == b']' or token[:1] in b'-.0123456789/':
+                operands.append(token)
+                continue
+            if token in (b'Tj', b"'", b'"'):
+                if token != b'Tj':
+                    brk('\n')
+                parts.extend(self._decode_string(t, encoding) for t in operands if t[:1] in (b'(', b'<'))
+            elif token == b'TJ':
+                for t in operands:
+                    if t[:1] in (b'(', b'<'):
+                        parts.append(self._decode_string(t, encoding))
+                    elif t[:1] in b'-.0123456789':
+                        # Large negative kerning inside TJ arrays is a word gap
+                        try:
+                            if float(t) < -200:
+                                parts.append(' ')
+                        except ValueError:
+                            pass
+            elif token == b'Tf':
+                names = [t for t in operands if t[:1] == b'/']
+                if names:
+                    encoding = fonts.get(names[0].decode('latin-1'))
+            elif token in (b'Td', b'TD'):
+                numbers = self._numbers(operands)
+                ty = numbers[1] if len(numbers) >= 2 else 0.0
+                line_y += ty * line_scale
+                brk('\n' if abs(ty * line_scale) >= self._LINE_EPSILON else ' ')
+            elif token == b'Tm':
+                numbers = self._numbers(operands)
+                if len(numbers) >= 6:
+                    new_y = numbers[5]
+                    brk('\n' if abs(new_y - line_y) >= self._LINE_EPSILON else ' ')
+                    line_y, line_scale = new_y, numbers[3] or 1.0
+                else:
+                    brk('\n')
+            elif token == b'BT':
+                line_y, line_scale = 0.0, 1.0
+            elif token in (b'T*', b'ET'):
+                brk('\n')
+            operands = []
+        return ''.join(parts).strip()
+
+
+class PdfPlumberExtractor(PdfExtractor):
+    """pdfplumber (pdfminer.six) backend; slower but recovers text PyPDF2 misses"""
+
+    name = "pdfplumber"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pdfplumber  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def open(self, file_path: str, pdf_reader=None):
+        import pdfplumber
+        self.pdf = pdfplumber.open(file_path)
+        metadata = self.pdf.metadata or {}
+        return len(self.pdf.pages), {
+            "title": metadata.get('Title', ''),
+            "author": metadata.get('Author', ''),
+            "subject": metadata.get('Subject', ''),
+            "creator": metadata.get('Creator', ''),
+            "producer": metadata.get('Producer', ''),
+            "creation_date": metadata.get('CreationDate', ''),
+            "modification_date": metadata.get('ModDate', '')
+        }
+
+    def iter_pages(self) -> Iterator[str]:
+        for page in self.pdf.pages:
+            try:
+                yield page.extract_text()
+            except (ExtractionLimitError, MemoryError):
+                raise
+            except Exception as e:
+                yield PageError(f"[Error extracting text: {str(e)}]")
+            finally:
+                # Release cached layout objects as we go
+                page.close()
+
+    def close(self):
+        self.pdf.close()
+
+
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (PyPDF2Extractor, RawStreamExtractor, PdfPlumberExtractor)
+}
+
+
+def _probe_reader(pdf_reader, max_pages: int = 0) -> Dict[str, Any]:
+    """
+    Cheap structural probe (no text extraction)
+
+    Text operators are looked for on the first page; fonts and Form XObjects are
+    checked on every page that will be read, since one page with a font the raw
+    backend cannot decode makes it unsuitable for the whole document.
+
+    Returns:
+        Dict with "has_text_operators", "simple_fonts" and "font_subtypes"
+    """
+    probe = {"has_text_operators": False, "simple_fonts": False, "font_subtypes": []}
+    if len(pdf_reader.pages) == 0:
+        return probe
+
+    contents = pdf_reader.pages[0].get_contents()
+    probe["has_text_operators"] = contents is not None and b'BT' in contents.get_data()
+
+    simple = False
+    subtypes = set()
+    for page_num, page in enumerate(pdf_reader.pages):
+        if max_pages and page_num >= max_pages:
+            break
+        resources = page.get('/Resources')
+        fonts = resources.get_object().get('/Font') if resources else None
+        for font_ref in (fonts.get_object().values() if fonts else []):
+            subtypes.add(str(font_ref.get_object().get('/Subtype')))
+        if _page_fonts(page) is None:
+            simple = False
+            break
+        simple = simple or bool(fonts)
+    probe["simple_fonts"] = simple
+    probe["font_subtypes"] = sorted(subtypes)
+    return probe
+
+
+def select_extractor(probe: Dict[str, Any]) -> str:
+    """
+    Pick an extraction backend from a probe result
+
+    Simple standard-encoded fonts take the raw content-stream fast path; pages
+    without text operators (likely image-based) try pdfplumber; everything else
+    uses PyPDF2.
+    """
+    if probe.get("error"):
+        return PyPDF2Extractor.name
+    if probe.get("has_text_operators") and probe.get("simple_fonts"):
+        return RawStreamExtractor.name
+    if not probe.get("has_text_operators") and PdfPlumberExtractor.available():
+        return PdfPlumberExtractor.name
+    return PyPDF2Extractor.name
+
+
+def _run_extractor(extractor: PdfExtractor, file_path: str, pdf_reader, max_chars: int, max_pages: int) -> Dict[str, Any]:
+    """Run one backend lazily until the page or character budget is reached"""
+    pages, metadata = extractor.open(file_path, pdf_reader)
+    text_content = []
+    total_chars = 0
+    content_chars = 0
+    truncated = False
+    try:
+        for page_num, page_text in enumerate(extractor.iter_pages()):
+            if max_pages and page_num >= max_pages:
+                truncated = True
+                break
+            text_content.append(_format_page(page_num, page_text))
+            if isinstance(page_text, PageError):
+                continue
+            total_chars += len(page_text or '')
+            content_chars += len((page_text or '').strip())
+            if max_chars and total_chars >= max_chars:
+                truncated = page_num + 1 < pages
+                break
+    finally:
+        extractor.close()
+
+    text = "\n\n".join(text_content)
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+        truncated = True
+
+    return {
+        "text": text,
+        "pages": pages,
+        "pages_extracted": len(text_content),
+        "metadata": metadata,
+        "truncated": truncated,
+        # Error placeholders and whitespace do not count, so a backend that failed falls back
+        "has_content": content_chars > 0,
+    }
+
+
+def extract_text_from_pdf(file_path: str, backend: str = "auto", max_chars: Optional[int] = None,
+                          max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Extract text from a PDF file
+    
+    Pages are read lazily and extraction stops once the character or page
+    budget is reached. With backend="auto" a cheap structural probe of the
+    pages picks the fastest backend likely to produce correct text.
     
     Args:
         file_path (str): Path to the PDF file
+        backend (str): "auto" or one of EXTRACTORS ("pypdf2", "raw", "pdfplumber")
+        max_chars (int): Character budget (defaults to EXTRACT_MAX_CHARS, 0 for unlimited)
+        max_pages (int): Page budget (defaults to EXTRACT_MAX_PAGES, 0 for unlimited)
         
     Returns:
-        Dict containing extracted text and metadata
+        Dict containing extracted text and metadata, plus the "backend" that ran
+        and its "extraction_time" in seconds. Files exceeding a resource guard get an
+        "error" with "error_code" RESOURCE_LIMIT
         
     Raises:
         FileNotFoundError: If the file doesn't exist
-        ValueError: If the file is not a valid PDF
+        ValueError: If the file is not a valid PDF or the backend is unknown
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"PDF file not found: {file_path}")
@@ -26,13 +538,23 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, any]:
     if not file_path.lower().endswith('.pdf'):
         raise ValueError("File must be a PDF")
     
+    if backend != "auto" and backend not in EXTRACTORS:
+        raise ValueError(f"Unknown extraction backend: {backend}")
+    
+    max_chars = EXTRACT_MAX_CHARS if max_chars is None else max_chars
+    max_pages = EXTRACT_MAX_PAGES if max_pages is None else max_pages
+    
     result = {
         "text": "",
         "pages": 0,
+        "pages_extracted": 0,
         "metadata": {},
         "extraction_time": None,
         "file_size": 0,
-        "error": None
+        "backend": None,
+        "truncated": False,
+        "error": None,
+        "error_code": None
     }
     
     try:
@@ -40,46 +562,40 @@ def extract_text_from_pdf(file_path: str) -> Dict[str, any]:
         result["file_size"] = os.path.getsize(file_path)
         
         # Record extraction start time
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         with open(file_path, 'rb') as file:
-            # Create PDF reader
+            # Create PDF reader (shared by the probe and the PyPDF2-based backends)
             pdf_reader = PyPDF2.PdfReader(file)
+            check_resource_guards(pdf_reader, max_pages)
             
-            # Get number of pages
-            result["pages"] = len(pdf_reader.pages)
-            
-            # Extract text from each page
-            text_content = []
-            for page_num, page in enumerate(pdf_reader.pages):
+            if backend == "auto":
                 try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                    else:
-                        text_content.append(f"--- Page {page_num + 1} ---\n[No text content]")
+                    probe = _probe_reader(pdf_reader, max_pages)
                 except Exception as e:
-                    text_content.append(f"--- Page {page_num + 1} ---\n[Error extracting text: {str(e)}]")
+                    probe = {"error": str(e)}
+                backend = select_extractor(probe)
             
-            # Combine all text
-            result["text"] = "\n\n".join(text_content)
+            extracted = _run_extractor(EXTRACTORS[backend](), file_path, pdf_reader, max_chars, max_pages)
             
-            # Extract metadata
-            if pdf_reader.metadata:
-                result["metadata"] = {
-                    "title": pdf_reader.metadata.get('/Title', ''),
-                    "author": pdf_reader.metadata.get('/Author', ''),
-                    "subject": pdf_reader.metadata.get('/Subject', ''),
-                    "creator": pdf_reader.metadata.get('/Creator', ''),
-                    "producer": pdf_reader.metadata.get('/Producer', ''),
-                    "creation_date": pdf_reader.metadata.get('/CreationDate', ''),
-                    "modification_date": pdf_reader.metadata.get('/ModDate', '')
-                }
+            # Fall back to PyPDF2 if a faster or alternative backend found nothing
+            if not extracted["has_content"] and backend != PyPDF2Extractor.name:
+                backend = PyPDF2Extractor.name
+                extracted = _run_extractor(PyPDF2Extractor(), file_path, pdf_reader, max_chars, max_pages)
+            
+            extracted.pop("has_content")
+            result.update(extracted)
+            result["backend"] = backend
             
             # Calculate extraction time
-            end_time = datetime.now()
-            result["extraction_time"] = (end_time - start_time).total_seconds()
+            result["extraction_time"] = round(time.perf_counter() - start_time, 4)
             
+    except ExtractionLimitError as e:
+        result["error"] = str(e)
+        result["error_code"] = e.code
+    except MemoryError:
+        result["error"] = "Memory limit exceeded while extracting text"
+        result["error_code"] = RESOURCE_LIMIT
     except PyPDF2.errors.PdfReadError as e:
         result["error"] = f"Invalid PDF file: {str(e)}"
     except Exception as e:
@@ -121,7 +637,7 @@ def validate_pdf_file(file_path: str) -> Tuple[bool, str]:
     except Exception as e:
         return False, f"Error validating PDF: {str(e)}"
 
-def get_pdf_summary(file_path: str) -> Dict[str, any]:
+def get_pdf_summary(file_path: str) -> Dict[str, Any]:
     """
     Get a summary of PDF content without full text extraction
     
@@ -153,6 +669,11 @@ def get_pdf_summary(file_path: str) -> Dict[str, any]:
                 sample_text = first_page.extract_text()
                 summary["has_text"] = len(sample_text.strip()) > 0
             
+            # Structural probe used to pick an extraction backend
+            probe = _probe_reader(pdf_reader)
+            summary["fonts"] = probe["font_subtypes"]
+            summary["recommended_backend"] = select_extractor(probe)
+            
             # Get basic metadata
             if pdf_reader.metadata:
                 summary["metadata"] = {
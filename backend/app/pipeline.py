@@ -0,0 +1,409 @@
+"""
+Core resume screening pipeline (validation, extraction and AI analysis)
+
+Independent of the Flask request context so the same steps can run from the
+web app, the command-line batch screener or any other driver.
+"""
+import hashlib
+import logging
+import threading
+import traceback
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from .extraction_sandbox import extract_pdf
+from .qwen_analyzer import FULL_ANALYSIS, LLM_SCORE_MAX_TOKENS, SCORE_ONLY, analyze_resume_job_match_qwen
+from .cache_store import save_response_to_cache, get_random_cached_response
+from .result_history import result_history
+from .analytics import analytics
+from .singleflight import inflight_analyses
+from .model_router import model_router
+from .token_usage import (
+    RequestTokenBudget,
+    TokenBudgetError,
+    estimate_prompt_tokens,
+    fit_resume_to_prompt_limit,
+    token_ledger,
+)
+from .two_phase import DETAIL_FIELDS, detail_id_for, detail_store
+
+logger = logging.getLogger(__name__)
+
+
+def job_description_hash(job_description: str) -> str:
+    """Stable identifier for a job description"""
+    return hashlib.sha256(job_description.encode('utf-8')).hexdigest()
+
+
+def extract_resume(file_path: str, filename: str) -> Dict[str, Any]:
+    """
+    Validate a saved PDF and extract its text
+
+    Both steps run in the extraction sandbox (see extraction_sandbox).
+
+    Args:
+        file_path: Path to the PDF on disk
+        filename: Display filename used in results
+
+    Returns:
+        Dict with "status" "success" and the extracted "text", or an error result
+        (with "error_code" "extraction_timeout" or "resource_limit" when a limit was hit)
+    """
+    thread_id = threading.current_thread().ident
+
+    # Validate and extract text from PDF
+    logger.debug(f"📄 [Thread-{thread_id}] Validating and extracting text from PDF...")
+    extraction_result = extract_pdf(file_path)
+
+    if extraction_result.get("validation_error"):
+        logger.error(f"❌ [Thread-{thread_id}] PDF validation failed: {extraction_result['validation_error']}")
+        return {
+            "status": "error",
+            "message": f"Invalid PDF file: {extraction_result['validation_error']}",
+            "filename": filename
+        }
+
+    if extraction_result.get("error"):
+        logger.error(f"❌ [Thread-{thread_id}] Text extraction failed: {extraction_result['error']}")
+        result = {
+            "status": "error",
+            "message": f"Failed to extract text from PDF: {extraction_result['error']}",
+            "filename": filename
+        }
+        if extraction_result.get("error_code"):
+            result["error_code"] = extraction_result["error_code"]
+            analytics.increment(f"extraction_{extraction_result['error_code']}")
+        return result
+
+    analytics.record_extraction((extraction_result["extraction_time"] or 0) * 1000, extraction_result["backend"])
+    logger.info(f"✅ [Thread-{thread_id}] Text extracted successfully - {len(extraction_result['text'])} characters via {extraction_result['backend']} in {extraction_result['extraction_time']}s")
+    return {
+        "status": "success",
+        "filename": filename,
+        "text": extraction_result["text"],
+        "extraction": extraction_summary(extraction_result),
+    }
+
+
+def extraction_summary(extraction_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact description of how a resume's text was extracted, for results"""
+    return {
+        "backend": extraction_result.get("backend"),
+        "extraction_time_ms": round((extraction_result.get("extraction_time") or 0) * 1000, 1),
+        "pages": extraction_result.get("pages"),
+        "pages_extracted": extraction_result.get("pages_extracted"),
+        "truncated": extraction_result.get("truncated", False),
+    }
+
+
+def analyze_resume(extracted_text: str, filename: str, job_description: str, mock: bool = False,
+                   token_budget: Optional[RequestTokenBudget] = None, mode: str = FULL_ANALYSIS,
+                   record: bool = True) -> Dict[str, Any]:
+    """
+    Analyze extracted resume text against a job description
+
+    Args:
+        extracted_text: Text extracted from the resume
+        filename: Display filename used in results
+        job_description: The job description text
+        mock: Use cached responses instead of calling the AI
+        token_budget: Token allowance of the request, charged before the AI call
+        mode: FULL_ANALYSIS, or SCORE_ONLY to return only name, score and recommendation
+              with a "detail_id" for generating the rest later
+        record: Add the result to the result history, analytics and response cache
+                (offline runs turn this off to leave the server's data alone)
+
+    Returns:
+        Result dict in the format returned by the upload endpoints
+    """
+    thread_id = threading.current_thread().ident
+    shared = False
+    reserved_tokens = 0
+    resume_truncated = False
+
+    # Enforce prompt size and token budgets before spending anything on the call
+    if not mock:
+        try:
+            extracted_text, resume_truncated = fit_resume_to_prompt_limit(extracted_text, job_description)
+            if resume_truncated:
+                logger.warning(f"✂️ [Thread-{thread_id}] Resume text truncated to fit the prompt token limit: {filename}")
+            if token_budget is not None:
+                reserved_tokens = token_budget.reserve(
+                    estimate_prompt_tokens(job_description, extracted_text)
+                    + (LLM_SCORE_MAX_TOKENS if mode == SCORE_ONLY else model_router.token_budget(len(extracted_text)))
+                )
+        except TokenBudgetError as e:
+            logger.warning(f"🪙 [Thread-{thread_id}] Not analyzing {filename}: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e),
+                "filename": filename,
+                "error_code": e.code
+            }
+
+    text_length = len(extracted_text)
+
+    # Call AI for intelligent analysis
+    try:
+        if not mock:
+            logger.info(f"🤖 [Thread-{thread_id}] Starting AI analysis with Qwen...")
+            logger.debug(f"📊 [Thread-{thread_id}] Job description length: {len(job_description)} chars")
+            logger.debug(f"📊 [Thread-{thread_id}] Resume text length: {text_length} chars")
+
+            # Identical resume + job description pairs already in flight share one AI call
+            flight_key = f"{mode}:{hashlib.sha256(extracted_text.encode('utf-8')).hexdigest()}:{job_description_hash(job_description)}"
+            ai_analysis, shared = inflight_analyses.do(
+                flight_key, analyze_resume_job_match_qwen, job_description, extracted_text, None, mode
+            )
+            if shared:
+                logger.info(f"🔗 [Thread-{thread_id}] Coalesced with an identical in-flight analysis")
+                analytics.increment("coalesced_analyses")
+
+            logger.info(f"✅ [Thread-{thread_id}] AI analysis completed successfully")
+            logger.debug(f"📊 [Thread-{thread_id}] Analysis result - Candidate: {ai_analysis.get('candidate_name', 'Unknown')}, Score: {ai_analysis.get('match_score', 0)}")
+        else:
+            logger.info(f"🎭 [Thread-{thread_id}] Mock mode - attempting to use cached response")
+
+            # Try to get a cached response first
+            cached_response = get_random_cached_response(filename)
+
+            if cached_response:
+                logger.info(f"✅ [Thread-{thread_id}] Using cached response: {cached_response['candidate_name']}")
+                ai_analysis = cached_response
+            else:
+                logger.warning(f"⚠️ [Thread-{thread_id}] No cached responses available, using fallback mock data")
+                # Fallback mock data if no cache available
+                ai_analysis = {
+                    'candidate_name': f'Test Candidate {filename}',
+                    'match_score': 75 + (hash(filename) % 25), # Random score between 75-99
+                    'reasoning': f"Mock analysis for {filename}",
+                    'strengths': ['Mock strength 1', 'Mock strength 2'],
+                    'improvement_areas': ['Mock improvement 1', 'Mock improvement 2'],
+                    'recommendation': 'Strong Match',
+                    'summary': f'Mock summary for {filename}',
+                    'timestamp': datetime.now().isoformat(),
+                    'error': None
+                }
+
+    except Exception as e:
+        logger.error(f"❌ [Thread-{thread_id}] AI analysis failed: {str(e)}")
+        logger.error(f"🔍 [Thread-{thread_id}] Full traceback:")
+        logger.error(traceback.format_exc())
+
+        # Fallback to basic analysis if AI analysis fails
+        ai_analysis = {
+            'candidate_name': f'Unknown - {filename}',
+            'match_score': 0,
+            'summary': 'Failed to analyze',
+            'strengths': ['None identified'],
+            'improvement_areas': ['None identified'],
+            'reasoning': 'No reasoning provided',
+            'recommendation': 'Unable to determine',
+            'error': str(e)
+        }
+
+    result = {
+        "status": "success",
+        "filename": filename,
+        "candidate_name": ai_analysis.get('candidate_name', f'No name - {filename}'),
+        "match_score": ai_analysis.get('match_score', 0),
+        "summary": ai_analysis.get('summary', 'No summary available'),
+        "strengths": ai_analysis.get('strengths', ['None identified']),
+        "improvement_areas": ai_analysis.get('improvement_areas', ['None identified']),
+        "reasoning": ai_analysis.get('reasoning', 'No reasoning provided'),
+        "recommendation": ai_analysis.get('recommendation', 'Unable to determine'),
+        "timestamp": datetime.now().isoformat(),
+        "processing_time": ai_analysis.get('processing_time'),
+        "processing_time_ms": ai_analysis.get('processing_time_ms'),
+        "timing_breakdown": ai_analysis.get('timing_breakdown'),
+        "model": ai_analysis.get('model'),
+        # Coalesced callers did not spend tokens of their own
+        "token_usage": None if shared else ai_analysis.get('token_usage'),
+    }
+    if resume_truncated:
+        result["resume_truncated"] = True
+    if ai_analysis.get('short_resume_routed'):
+        result["short_resume_routed"] = True
+    if ai_analysis.get('degraded'):
+        result["degraded"] = True
+        result["degraded_reason"] = ai_analysis.get('degraded_reason')
+    score_only = mode == SCORE_ONLY and not mock
+    if score_only:
+        result["analysis_mode"] = SCORE_ONLY
+        if not ai_analysis.get('error'):
+            # Keep what is needed to generate the full narrative on demand
+            result["detail_id"] = detail_id_for(extracted_text, job_description)
+            result["details_pending"] = True
+            detail_store.put(result["detail_id"], extracted_text, job_description, filename)
+            if not result.get("degraded"):
+                for field in DETAIL_FIELDS:
+                    result[field] = None
+
+    if not mock:
+        token_usage = result["token_usage"]
+        if token_usage:
+            token_ledger.record(token_usage, job_description_hash(job_description),
+                                token_budget.tenant if token_budget is not None else None)
+        if token_budget is not None:
+            token_budget.settle(reserved_tokens, (token_usage or {}).get("total_tokens") or 0)
+
+    if result.get("degraded") and not shared:
+        analytics.increment("degraded_analyses")
+
+    # Streaming analytics only reflect real analyses, counted once per AI call
+    if record and not mock and not shared and not result.get("degraded"):
+        analytics.record_analysis(
+            job_description_hash(job_description),
+            result["match_score"],
+            result["recommendation"],
+            result["processing_time_ms"],
+            error=bool(ai_analysis.get('error')),
+        )
+
+    # Every real analysis goes into the queryable history once, including score-only and degraded ones;
+    # coalesced callers only show up in the coalesced_analyses counter
+    if record and not mock and not shared and not ai_analysis.get('error'):
+        result_history.record(result, job_description_hash(job_description))
+
+    # Save successful real analysis results to cache (not mock, coalesced, degraded or score-only results)
+    if record and not mock and not shared and not score_only and not result.get("degraded") and not ai_analysis.get('error'):
+        logger.debug(f"💾 [Thread-{thread_id}] Saving successful result to cache")
+        save_response_to_cache(result)
+    elif mock:
+        logger.debug(f"🎭 [Thread-{thread_id}] Mock result - not saving to cache")
+
+    return result
+
+
+def generate_details(detail_id: str, token_budget: Optional[RequestTokenBudget] = None) -> Optional[Dict[str, Any]]:
+    """
+    Generate (or return the cached) full narrative of a score-only result
+
+    Args:
+        detail_id: The "detail_id" of a score-only result
+        token_budget: Token allowance of the request, charged before the AI call;
+            its tenant is the client the token usage is attributed to
+
+    Returns:
+        Dict with the narrative fields, the full pass's "detail_match_score", "model"
+        and "token_usage", or None if the detail id is unknown or expired. When the
+        budget does not cover the call the dict has only "detail_id", "filename",
+        "error" and "error_code"
+    """
+    entry = detail_store.get(detail_id)
+    if entry is None:
+        return None
+    if entry["details"] is not None:
+        return dict(entry["details"], cached=True)
+
+    resume_text, job_description = entry["resume_text"], entry["job_description"]
+    tenant = token_budget.tenant if token_budget is not None else None
+    reserved_tokens = 0
+    if token_budget is not None:
+        try:
+            reserved_tokens = token_budget.reserve(
+                estimate_prompt_tokens(job_description, resume_text) + model_router.token_budget(len(resume_text))
+            )
+        except TokenBudgetError as e:
+            logger.warning(f"🪙 Not generating details for {entry['filename']}: {str(e)}")
+            return {
+                "detail_id": detail_id,
+                "filename": entry["filename"],
+                "error": str(e),
+                "error_code": e.code,
+            }
+    try:
+        ai_analysis, shared = inflight_analyses.do(
+            f"{FULL_ANALYSIS}:{detail_id}", analyze_resume_job_match_qwen, job_description, resume_text, None, FULL_ANALYSIS
+        )
+    except Exception:
+        if token_budget is not None:
+            token_budget.settle(reserved_tokens, 0)
+        raise
+
+    details = {field: ai_analysis.get(field) for field in DETAIL_FIELDS}
+    details.update({
+        "detail_id": detail_id,
+        "filename": entry["filename"],
+        "detail_match_score": ai_analysis.get("match_score"),
+        "model": ai_analysis.get("model"),
+        # Coalesced callers did not spend tokens of their own
+        "token_usage": None if shared else ai_analysis.get("token_usage"),
+        "generated_at": datetime.now().isoformat(),
+    })
+    if ai_analysis.get("degraded"):
+        details["degraded"] = True
+    if details["token_usage"]:
+        token_ledger.record(details["token_usage"], job_description_hash(job_description), tenant)
+    if token_budget is not None:
+        token_budget.settle(reserved_tokens, (details["token_usage"] or {}).get("total_tokens") or 0)
+    if ai_analysis.get("error"):
+        details["error"] = ai_analysis["error"]
+    elif not ai_analysis.get("degraded") and not shared:
+        detail_store.set_details(detail_id, details)
+    return dict(details, cached=False)
+
+
+def pending_result(filename: str, message: str = "Not completed before the deadline") -> Dict[str, Any]:
+    """Result placeholder for a file whose processing was skipped or cancelled"""
+    return {
+        "status": "pending",
+        "message": message,
+        "filename": filename
+    }
+
+
+def process_resume_path(file_path: str, filename: str, job_description: str, mock: bool = False,
+                        cancel_event: Optional[threading.Event] = None,
+                        token_budget: Optional[RequestTokenBudget] = None,
+                        mode: str = FULL_ANALYSIS, record: bool = True) -> Dict[str, Any]:
+    """
+    Run the full pipeline (validate, extract, analyze) on a PDF already on disk
+
+    The caller owns the file; it is not removed here.
+
+    Args:
+        file_path: Path to the PDF on disk
+        filename: Display filename used in results
+        job_description: The job description text
+        mock: Use cached responses instead of calling the AI
+        cancel_event: When set, the AI analysis is skipped and a pending result returned
+        token_budget: Token allowance of the request
+        mode: FULL_ANALYSIS or SCORE_ONLY (see analyze_resume)
+        record: Record the result in the server's history, analytics and cache (see analyze_resume)
+
+    Returns:
+        Result dict with "status" "success", "error" or "pending"
+    """
+    return analyze_extracted(extract_resume(file_path, filename), job_description, mock, cancel_event,
+                             token_budget, mode, record)
+
+
+def analyze_extracted(extracted: Dict[str, Any], job_description: str, mock: bool = False,
+                      cancel_event: Optional[threading.Event] = None,
+                      token_budget: Optional[RequestTokenBudget] = None,
+                      mode: str = FULL_ANALYSIS, record: bool = True) -> Dict[str, Any]:
+    """
+    Analyze the output of extract_resume, passing extraction errors through
+
+    Args:
+        extracted: Result of extract_resume
+        job_description: The job description text
+        mock: Use cached responses instead of calling the AI
+        cancel_event: When set, the AI analysis is skipped and a pending result returned
+        token_budget: Token allowance of the request
+        mode: FULL_ANALYSIS or SCORE_ONLY (see analyze_resume)
+        record: Record the result in the server's history, analytics and cache (see analyze_resume)
+
+    Returns:
+        Result dict with "status" "success", "error" or "pending"
+    """
+    if extracted["status"] != "success":
+        return extracted
+    filename = extracted["filename"]
+    if cancel_event is not None and cancel_event.is_set():
+        logger.info(f"⏹️ Skipping analysis of {filename} - batch no longer needs it")
+        return pending_result(filename, "Cancelled before analysis")
+    result = analyze_resume(extracted["text"], filename, job_description, mock, token_budget, mode, record)
+    result["extraction"] = extracted["extraction"]
+    return result
@@ -0,0 +1,202 @@
+"""
+Speculative pre-staging of resume uploads
+
+The UI posts files to /api/prestage as soon as they are dropped. Each file is
+validated and its text extracted in the background, and the response carries
+one handle per file. The analyze call then references the handles instead of
+re-uploading the PDFs, so upload and extraction overlap with the time spent
+writing the job description. Handles that are not used expire after
+PRESTAGE_TTL_SECONDS.
+
+Extraction runs on its own small pool rather than the shared scheduler, so
+analysis tasks waiting on a staged extraction can never starve it.
+"""
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .pipeline import extract_resume
+from .sessions import content_hash
+
+logger = logging.getLogger(__name__)
+
+PRESTAGE_TTL_SECONDS = int(os.getenv('PRESTAGE_TTL_SECONDS', 30 * 60))
+PRESTAGE_MAX_HANDLES = int(os.getenv('PRESTAGE_MAX_HANDLES', 2000))
+PRESTAGE_WORKERS = int(os.getenv('PRESTAGE_WORKERS', 2))
+
+# error_code of results for handles that are unknown or expired
+STAGED_FILE_EXPIRED = 'staged_file_expired'
+
+
+def _extract_bytes(data: bytes, filename: str) -> Dict[str, Any]:
+    """Run extract_resume on PDF bytes through a temporary file"""
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(prefix='prestage_', suffix='.pdf', delete=False) as f:
+            f.write(data)
+            temp_path = f.name
+        return extract_resume(temp_path, filename)
+    except Exception as e:
+        logger.error(f"❌ Pre-stage extraction failed for {filename}: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Error processing file: {str(e)}",
+            "filename": filename
+        }
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class StagedFile:
+    """
+    A pre-staged upload and its (possibly still running) extraction
+
+    Has a "filename" like an uploaded file, so batches can mix the two.
+    """
+
+    def __init__(self, filename: str, file_hash: str, future: Future, ttl_seconds: int):
+        self.handle = uuid.uuid4().hex
+        self.filename = filename
+        self.content_hash = file_hash
+        self.size = 0
+        self._future = future
+        self.ttl_seconds = ttl_seconds
+        self.expires_at = time.monotonic() + ttl_seconds
+
+    def touch(self):
+        self.expires_at = time.monotonic() + self.ttl_seconds
+
+    @property
+    def status(self) -> str:
+        return self._future.result()["status"] if self._future.done() else "pending"
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Wait for the extraction and return the extract_resume result"""
+        return self._future.result(timeout)
+
+    def describe(self) -> Dict[str, Any]:
+        info = {
+            "handle": self.handle,
+            "filename": self.filename,
+            "size": self.size,
+            "status": self.status,
+            "expires_in_seconds": max(0, int(self.expires_at - time.monotonic())),
+        }
+        if info["status"] == "success":
+            info["extraction"] = self._future.result().get("extraction")
+        elif info["status"] == "error":
+            info["message"] = self._future.result().get("message")
+        return info
+
+
+class PrestageStore:
+    """Thread-safe registry of staged files with idle expiry"""
+
+    def __init__(self, ttl_seconds: int = PRESTAGE_TTL_SECONDS, max_handles: int = PRESTAGE_MAX_HANDLES,
+                 workers: int = PRESTAGE_WORKERS):
+        self.ttl_seconds = ttl_seconds
+        self.max_handles = max_handles
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prestage')
+        self._staged: Dict[str, StagedFile] = {}
+        self._by_content: Dict[tuple, str] = {}
+        self.expired = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, staged: StagedFile):
+        # Caller holds the lock
+        del self._staged[staged.handle]
+        if self._by_content.get((staged.content_hash, staged.filename)) == staged.handle:
+            del self._by_content[(staged.content_hash, staged.filename)]
+
+    def _expire(self):
+        # Caller holds the lock
+        now = time.monotonic()
+        for staged in [s for s in self._staged.values() if s.expires_at < now]:
+            self._remove(staged)
+            self.expired += 1
+
+    def stage(self, filename: str, data: bytes) -> StagedFile:
+        """
+        Start extracting a file in the background
+
+        The same content staged again under the same name reuses the existing handle.
+
+        Args:
+            filename: Sanitized display filename
+            data: The PDF bytes
+
+        Returns:
+            The staged file
+        """
+        file_hash = content_hash(data)
+        with self._lock:
+            self._expire()
+            handle = self._by_content.get((file_hash, filename))
+            if handle is not None:
+                staged = self._staged[handle]
+                staged.touch()
+                self.reused += 1
+                return staged
+            if len(self._staged) >= self.max_handles:
+                # Evict the handle closest to expiry
+                self._remove(min(self._staged.values(), key=lambda s: s.expires_at))
+            staged = StagedFile(filename, file_hash, self._executor.submit(_extract_bytes, data, filename),
+                                self.ttl_seconds)
+            staged.size = len(data)
+            self._staged[staged.handle] = staged
+            self._by_content[(file_hash, filename)] = staged.handle
+        logger.info(f"📦 Pre-staged {filename} as {staged.handle}")
+        return staged
+
+    def get(self, handle: str) -> Optional[StagedFile]:
+        with self._lock:
+            self._expire()
+            staged = self._staged.get(handle)
+            if staged is not None:
+                staged.touch()
+            return staged
+
+    def resolve(self, handles: List[str]) -> tuple:
+        """
+        Look up the handles referenced by an analyze request
+
+        Returns:
+            Tuple of (staged files, error results for unknown or expired handles)
+        """
+        staged_files, missing = [], []
+        for handle in handles:
+            staged = self.get(handle)
+            if staged is None:
+                missing.append({
+                    "status": "error",
+                    "message": "Staged file not found or expired, please upload it again",
+                    "filename": handle,
+                    "error_code": STAGED_FILE_EXPIRED
+                })
+            else:
+                staged_files.append(staged)
+        return staged_files, missing
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            statuses = [s.status for s in self._staged.values()]
+            return {
+                "handles": len(statuses),
+                "pending": statuses.count("pending"),
+                "ready": statuses.count("success"),
+                "failed": statuses.count("error"),
+                "reused": self.reused,
+                "expired": self.expired,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+prestage_store = PrestageStore()
@@ -0,0 +1,279 @@
+"""
+Opt-in request profiling
+
+A request is profiled when it sends "X-Profile: cprofile|sampling" (or "1")
+or passes ?profile=... together with the ADMIN_TOKEN, or is picked by
+PROFILE_SAMPLE_RATE. The request thread and every scheduler task it submits
+run under the profile:
+
+- "cprofile" runs a deterministic cProfile profiler in each thread and merges
+  the stats, served as a pstats dump or text summary
+- "sampling" snapshots the stacks of the participating threads every
+  PROFILE_SAMPLING_INTERVAL_MS, served as collapsed stacks for flame graphs
+
+The most recent PROFILE_MAX_STORED profiles are kept in memory.
+"""
+import contextvars
+import cProfile
+import io
+import itertools
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SAMPLE_MODE = os.getenv('PROFILE_SAMPLE_MODE', 'sampling')
+PROFILE_MAX_STORED = int(os.getenv('PROFILE_MAX_STORED', 20))
+PROFILE_SAMPLING_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLING_INTERVAL_MS', 5))
+PROFILE_HEADER = 'X-Profile'
+
+CPROFILE = 'cprofile'
+SAMPLING = 'sampling'
+MODES = (CPROFILE, SAMPLING)
+
+_active_profile: contextvars.ContextVar = contextvars.ContextVar('active_profile', default=None)
+_ids = itertools.count(1)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """Profile of one request across its request thread and worker tasks"""
+
+    def __init__(self, endpoint: str, mode: str, trigger: str):
+        self.id = f"{int(time.time())}-{next(_ids)}"
+        self.endpoint = endpoint
+        self.mode = mode
+        self.trigger = trigger
+        self.created_at = datetime.now().isoformat()
+        self.duration_ms = None
+        self.threads_profiled = 0
+        self.errors: List[str] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self._stacks: Counter = Counter()
+        self._sampled_threads: Counter = Counter()  # thread ident -> active calls
+        self._stopped = threading.Event()
+        self._sampler = None
+        if mode == SAMPLING:
+            self._sampler = threading.Thread(target=self._sample_loop, name=f"profile-sampler-{self.id}", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        interval = PROFILE_SAMPLING_INTERVAL_MS / 1000
+        own = threading.get_ident()
+        while not self._stopped.wait(interval):
+            with self._lock:
+                threads = [t for t in self._sampled_threads if t != own]
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    with self._lock:
+                        self._stacks[";".join(reversed(stack))] += 1
+
+    def enter_thread(self):
+        """Start profiling the calling thread; returns a handle for exit_thread"""
+        if self.mode == SAMPLING:
+            ident = threading.get_ident()
+            with self._lock:
+                self._sampled_threads[ident] += 1
+                self.threads_profiled += 1
+            return ident
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Newer interpreters allow one active profiler at a time
+            with self._lock:
+                self.errors.append(f"Thread not profiled: {e}")
+            return None
+        return profiler
+
+    def exit_thread(self, handle):
+        """Stop profiling the calling thread"""
+        if self.mode == SAMPLING:
+            with self._lock:
+                self._sampled_threads[handle] -= 1
+                if not self._sampled_threads[handle]:
+                    del self._sampled_threads[handle]
+        elif handle is not None:
+            handle.disable()
+            self._add_stats(handle)
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """Call fn in the current thread under this profile"""
+        handle = self.enter_thread()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.exit_thread(handle)
+
+    def _add_stats(self, profiler: cProfile.Profile):
+        with self._lock:
+            self.threads_profiled += 1
+            if self._stats is None:
+                self._stats = pstats.Stats(profiler)
+            else:
+                self._stats.add(profiler)
+
+    def finish(self):
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "endpoint": self.endpoint,
+                "mode": self.mode,
+                "trigger": self.trigger,
+                "created_at": self.created_at,
+                "duration_ms": self.duration_ms,
+                "threads_profiled": self.threads_profiled,
+                "samples": sum(self._stacks.values()) if self.mode == SAMPLING else None,
+                "errors": list(self.errors),
+            }
+
+    def formats(self) -> List[str]:
+        return ["pstats", "text"] if self.mode == CPROFILE else ["collapsed", "text"]
+
+    def render(self, fmt: str, limit: int = 50):
+        """
+        Render the profile
+
+        Args:
+            fmt: "pstats" (marshalled stats loadable by pstats/snakeviz), "collapsed"
+                 (one "frame;frame;frame count" line per stack) or "text"
+            limit: Number of rows in the text summary
+
+        Returns:
+            bytes for "pstats", str otherwise
+
+        Raises:
+            ValueError: If the format does not apply to this profile's mode
+        """
+        if fmt not in self.formats():
+            raise ValueError(f"Format '{fmt}' is not available for {self.mode} profiles; use one of {self.formats()}")
+        with self._lock:
+            if fmt == "pstats":
+                return marshal.dumps(self._stats.stats if self._stats else {})
+            if fmt == "collapsed":
+                return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common()) + "\n"
+            if self.mode == CPROFILE:
+                if self._stats is None:
+                    return "No profile data\n"
+                out = io.StringIO()
+                self._stats.stream = out
+                self._stats.sort_stats('cumulative').print_stats(limit)
+                return out.getvalue()
+            total = sum(self._stacks.values()) or 1
+            leaves = Counter()
+            for stack, count in self._stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            lines = [f"{count:6d} {count / total:6.1%}  {frame}" for frame, count in leaves.most_common(limit)]
+            return f"{total} samples, top frames by self time\n" + "\n".join(lines) + "\n"
+
+
+class ProfileStore:
+    """Bounded in-memory store of recent profiles"""
+
+    def __init__(self, max_profiles: int = PROFILE_MAX_STORED):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            profiles = list(self._profiles.values())
+        return [p.summary() for p in reversed(profiles)]
+
+
+profile_store = ProfileStore()
+
+
+def requested_mode(header_value: Optional[str], query_value: Optional[str]) -> Optional[tuple]:
+    """
+    Decide whether and how to profile a request
+
+    Returns:
+        (mode, trigger) or None when the request is not profiled
+    """
+    for value, trigger in ((header_value, "header"), (query_value, "query")):
+        if not value:
+            continue
+        value = value.strip().lower()
+        if value in MODES:
+            return value, trigger
+        if value in ('1', 'true', 'yes'):
+            return CPROFILE, trigger
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return (PROFILE_SAMPLE_MODE if PROFILE_SAMPLE_MODE in MODES else SAMPLING), "sampled"
+    return None
+
+
+def start_profile(endpoint: str, mode: str, trigger: str) -> tuple:
+    """
+    Start profiling the current request
+
+    Returns:
+        (profile, handle, token) to pass to stop_profile
+    """
+    profile = RequestProfile(endpoint, mode, trigger)
+    token = _active_profile.set(profile)
+    return profile, profile.enter_thread(), token
+
+
+def stop_profile(profile: RequestProfile, handle, token):
+    """Stop profiling the request thread and store the profile"""
+    profile.exit_thread(handle)
+    _active_profile.reset(token)
+    profile.finish()
+    profile_store.add(profile)
+    logger.info(f"🔬 Stored {profile.mode} profile {profile.id} for {profile.endpoint} ({profile.duration_ms}ms)")
+
+
+def wrap_for_current_profile(fn: Callable) -> Callable:
+    """
+    Scheduler task wrapper: runs fn under the submitting request's profile, if any
+
+    Called in the submitting thread, so the active profile is captured there
+    and applied in whichever worker thread runs the task.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        return fn
+
+    def profiled(*args, **kwargs):
+        return profile.run(fn, *args, **kwargs)
+    return profiled
@@ -7,13 +7,40 @@ import os
 import time
 import functools
 import logging
+import threading
 import traceback
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 
+from .model_router import model_router, ModelsUnavailableError
+from .heuristic import heuristic_analysis
+from .token_usage import estimate_tokens
+
 # Configure logging for this module
 logger = logging.getLogger(__name__)
 
+QWEN_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# Analysis modes: "full" asks for the whole narrative, "score" only for name, score and recommendation
+FULL_ANALYSIS = "full"
+SCORE_ONLY = "score"
+LLM_SCORE_MAX_TOKENS = int(os.getenv('LLM_SCORE_MAX_TOKENS', 120))
+LLM_TEMPERATURE = float(os.getenv('LLM_TEMPERATURE', 0.3))  # Lower temperature for more consistent analysis
+LLM_TOP_P = float(os.getenv('LLM_TOP_P', 0.9))
+
+# One client (and HTTP connection pool) per API key, shared by all threads
+_clients: Dict[str, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(api_key: str) -> OpenAI:
+    """Return the shared OpenAI-compatible client for an API key, creating it once"""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = OpenAI(api_key=api_key, base_url=QWEN_BASE_URL)
+        return client
+
 
 
 def timing_wrapper(func):
@@ -44,45 +71,81 @@ def timing_wrapper(func):
 class QwenAnalyzer:
     """Helper class for analyzing resume-job matches using Alibaba Cloud Qwen-Plus"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, client=None, model: Optional[str] = None,
+                 temperature: float = LLM_TEMPERATURE, top_p: float = LLM_TOP_P,
+                 max_tokens: Optional[int] = None, prompt_template: Optional[str] = None):
         """
         Initialize the Qwen-Plus analyzer
         
         Args:
             api_key: Alibaba Cloud API key. If not provided, will try to get from environment
+            client: OpenAI-compatible client to use instead of the shared one (for example a replay client)
+            model: Send every call to this model instead of routing and failing over
+            temperature: Sampling temperature
+            top_p: Nucleus sampling threshold
+            max_tokens: Fixed completion token limit instead of the router's length-based one
+            prompt_template: Replacement for the full analysis prompt, with {job_description}
+                             and {resume_content} placeholders
         """
-        self.api_key = os.environ["API_KEY"]
+        self.model = model
+        self.temperature = temperature
+        self.top_p = top_p
+        self.max_tokens = max_tokens
+        self.prompt_template = prompt_template
         
-        # Initialize OpenAI client with custom base URL for Qwen
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
-        )
-        
-        if not self.api_key:
-            raise ValueError("Qwen API key is required. Set QWEN_API_KEY environment variable or pass it to constructor.")
+        if client is None:
+            self.api_key = os.environ["API_KEY"]
+            
+            if not self.api_key:
+                raise ValueError("Qwen API key is required. Set QWEN_API_KEY environment variable or pass it to constructor.")
+            
+            # Reuse the shared OpenAI client with custom base URL for Qwen
+            client = get_llm_client(self.api_key)
+        self.client = client
     
     @timing_wrapper
-    def analyze_resume_match(self, job_description: str, resume_content: str) -> Dict[str, any]:
+    def analyze_resume_match(self, job_description: str, resume_content: str, mode: str = FULL_ANALYSIS) -> Dict[str, Any]:
         """
         Analyze how well a resume matches a job description
         
         Args:
             job_description: The job description text
             resume_content: The extracted resume content
+            mode: FULL_ANALYSIS, or SCORE_ONLY for a fast name/score/recommendation pass
             
         Returns:
             Dict containing match score, reasoning, and analysis
         """
         try:
             # Prepare the prompt for Qwen-Plus
-            prompt = self._create_analysis_prompt(job_description, resume_content)
+            if mode == SCORE_ONLY:
+                prompt = self._create_score_prompt(job_description, resume_content)
+                max_tokens = self.max_tokens or LLM_SCORE_MAX_TOKENS
+            else:
+                prompt = self._create_analysis_prompt(job_description, resume_content)
+                max_tokens = self.max_tokens
             
             # Make the API call to Qwen-Plus using OpenAI SDK
-            response = self._call_qwen_api(prompt)
+            try:
+                response = self._call_qwen_api(prompt, len(resume_content), max_tokens)
+            except ModelsUnavailableError as e:
+                # Every model failed or is circuit-broken: fall back to a local estimate
+                logger.warning(f"⚠️ No model available, using degraded heuristic score: {e}")
+                return heuristic_analysis(job_description, resume_content, reason=str(e))
             
             # Parse and structure the response
-            return self._parse_analysis_response(response)
+            result = self._parse_analysis_response(response)
+            result["model"] = response.get("model")
+            if response.get("short_resume_routed"):
+                result["short_resume_routed"] = True
+            result["analysis_mode"] = mode
+            result["token_usage"] = dict(
+                response.get("usage") or {},
+                model=response.get("model"),
+                estimated_prompt_tokens=estimate_tokens(prompt),
+                call_ms=response.get("call_ms"),
+            )
+            return result
             
         except Exception as e:
             print(f"Qwen analysis error: {e}")
@@ -95,6 +158,10 @@ class QwenAnalyzer:
     
     def _create_analysis_prompt(self, job_description: str, resume_content: str) -> str:
         """Create the analysis prompt for Qwen-Plus"""
+        if self.prompt_template:
+            return self.prompt_template.replace("{job_description}", job_description).replace(
+                "{resume_content}", resume_content
+            )
         return f"""
 You are an expert HR recruiter and AI analyst. Your task is to analyze how well a candidate's resume matches a specific job description.
 
@@ -126,40 +193,85 @@ Format your response as JSON with the following structure:
 Be objective, thorough, and provide actionable insights. Focus on specific skills, experience, and qualifications mentioned in both the job description and resume.
 """
     
-    def _call_qwen_api(self, prompt: str) -> Dict:
-        """Make the API call to Qwen-Plus using OpenAI SDK"""
-        try:
-            response = self.client.chat.completions.create(
-                model="qwen-turbo",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,  # Lower temperature for more consistent analysis
-                max_tokens=2000,
-                top_p=0.9
-            )
-            
-            print(f"Qwen API call successful")
-            
-            # Convert response to dict format for compatibility
-            return {
-                "choices": [
-                    {
-                        "message": {
-                            "content": response.choices[0].message.content
+    def _create_score_prompt(self, job_description: str, resume_content: str) -> str:
+        """Create the minimal score-only prompt used by the fast first phase"""
+        return f"""
+You are an expert HR recruiter. Rate how well the resume matches the job description.
+
+JOB DESCRIPTION:
+{job_description}
+
+RESUME CONTENT:
+{resume_content}
+
+Reply with JSON only, no explanation:
+{{"candidate_name": "<name or Unknown>", "match_score": <0-100>, "recommendation": "<Strong Match|Good Match|Moderate Match|Weak Match|Poor Match>"}}
+"""
+    
+    def _call_qwen_api(self, prompt: str, resume_chars: Optional[int] = None, max_tokens: Optional[int] = None) -> Dict:
+        """
+        Make the API call to Qwen using OpenAI SDK
+
+        The model router picks the model and max_tokens and fails over to the
+        next model on errors.
+
+        Raises:
+            ModelsUnavailableError: No model could serve the call
+        """
+        def create_completion(model: str, max_tokens: int):
+            try:
+                return self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt
                         }
-                    }
-                ]
+                    ],
+                    temperature=self.temperature,
+                    max_tokens=max_tokens,
+                    top_p=self.top_p
+                )
+            except Exception as e:
+                print(f"Qwen API error ({model}): {e}")
+                raise Exception(f"Qwen API error: {str(e)}")
+
+        resume_chars = resume_chars if resume_chars is not None else len(prompt)
+        call_start = time.time()
+        if self.model:
+            # Pinned model: no routing or failover
+            max_tokens = max_tokens or model_router.token_budget(resume_chars)
+            routed = {"response": create_completion(self.model, max_tokens), "model": self.model, "max_tokens": max_tokens}
+        else:
+            routed = model_router.call(create_completion, resume_chars, max_tokens)
+        call_ms = round((time.time() - call_start) * 1000, 1)
+        response = routed["response"]
+        print(f"Qwen API call successful ({routed['model']}, max_tokens={routed['max_tokens']})")
+        
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            usage = {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "total_tokens": usage.total_tokens,
             }
-            
-        except Exception as e:
-            print(f"Qwen API error: {e}")
-            raise Exception(f"Qwen API error: {str(e)}")
+
+        # Convert response to dict format for compatibility
+        return {
+            "choices": [
+                {
+                    "message": {
+                        "content": response.choices[0].message.content
+                    }
+                }
+            ],
+            "model": routed["model"],
+            "short_resume_routed": routed.get("short_resume_routed", False),
+            "usage": usage,
+            "call_ms": call_ms,
+        }
     
-    def _parse_analysis_response(self, api_response: Dict) -> Dict[str, any]:
+    def _parse_analysis_response(self, api_response: Dict) -> Dict[str, Any]:
         """Parse and structure the Qwen API response"""
         try:
             # Extract the content from the API response (OpenAI SDK format)
@@ -213,7 +325,8 @@ Be objective, thorough, and provide actionable insights. Focus on specific skill
 
 
 @timing_wrapper
-def analyze_resume_job_match_qwen(job_description: str, resume_content: str, api_key: str = None) -> Dict[str, any]:
+def analyze_resume_job_match_qwen(job_description: str, resume_content: str, api_key: str = None,
+                                  mode: str = FULL_ANALYSIS) -> Dict[str, Any]:
     """
     Convenience function to analyze resume-job match using Qwen-Plus with timing
     
@@ -221,6 +334,7 @@ def analyze_resume_job_match_qwen(job_description: str, resume_content: str, api
         job_description: The job description text
         resume_content: The extracted resume content
         api_key: Optional Qwen API key
+        mode: FULL_ANALYSIS, or SCORE_ONLY for a fast name/score/recommendation pass
         
     Returns:
         Dict containing match analysis results with timing information
@@ -230,7 +344,7 @@ def analyze_resume_job_match_qwen(job_description: str, resume_content: str, api
     
     try:
         analyzer = QwenAnalyzer(api_key=api_key)
-        result = analyzer.analyze_resume_match(job_description, resume_content)
+        result = analyzer.analyze_resume_match(job_description, resume_content, mode)
         
         logger.info(f"✅ Qwen analysis completed successfully")
         logger.debug(f"📊 Result summary - Candidate: {result.get('candidate_name', 'Unknown')}, Score: {result.get('match_score', 0)}")
@@ -243,7 +357,7 @@ def analyze_resume_job_match_qwen(job_description: str, resume_content: str, api
         raise
 
 
-def analyze_resume_job_match_qwen_with_detailed_timing(job_description: str, resume_content: str, api_key: str = None) -> Dict[str, any]:
+def analyze_resume_job_match_qwen_with_detailed_timing(job_description: str, resume_content: str, api_key: str = None) -> Dict[str, Any]:
     """
     Enhanced wrapper with detailed timing breakdown
     
@@ -0,0 +1,175 @@
+"""
+Response shaping: field selection, fast JSON encoding and compression negotiation
+
+Batch responses are built with make_json_response; every other JSON response
+(including errors from jsonify) goes through FastJSONProvider and
+compress_response, so all of them are encoded and compressed the same way.
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 4))
+
+FIELD_SETS = {
+    "scores": ("status", "filename", "candidate_name", "match_score", "recommendation",
+               "detail_id", "details_pending"),
+    "summary": ("status", "filename", "candidate_name", "match_score", "recommendation",
+                "summary", "timestamp", "processing_time_ms", "detail_id", "details_pending"),
+    "full": None,
+}
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Resolve the "fields" request parameter
+
+    Args:
+        value: A named field set ("scores", "summary", "full") or a comma-separated field list
+
+    Returns:
+        List of result fields to keep, or None to keep everything
+    """
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in FIELD_SETS:
+        fields = FIELD_SETS[value]
+        return list(fields) if fields else None
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    # Results are always identifiable and their status readable
+    return list(dict.fromkeys(["status", "filename"] + fields))
+
+
+def project(results: Iterable[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Keep only the selected fields of each result"""
+    if fields is None:
+        return list(results)
+    return [{k: r[k] for k in fields if k in r} for r in results]
+
+
+def shape_batch_response(response: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Apply field selection to the result lists of a batch response"""
+    if fields is None:
+        return response
+    shaped = dict(response)
+    for key in ("results", "ranking"):
+        if isinstance(shaped.get(key), list):
+            shaped[key] = project(shaped[key], fields)
+    return shaped
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson when installed"""
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if orjson is None or kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        # Datetimes and other non-native types keep Flask's formatting
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {encoding: q}"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported content encoding the client accepts"""
+    accepted = _accepted_encodings(accept_encoding)
+    candidates = (['br'] if brotli is not None else []) + ['gzip']
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compress(body: bytes, accept_encoding: str):
+    """Compress a body with the negotiated encoding; returns (body, encoding or None)"""
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body, encoding
+
+
+def make_json_response(payload: Any, status: int = 200, accept_encoding: str = '') -> Response:
+    """
+    Build a JSON response, compressed when the client accepts it
+
+    Args:
+        payload: JSON-serializable data
+        status: HTTP status code
+        accept_encoding: The request's Accept-Encoding header
+
+    Returns:
+        Flask Response
+    """
+    body, encoding = _compress(dumps(payload), accept_encoding)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(body, status=status, mimetype='application/json', headers=headers)
+
+
+def compress_response(response: Response, accept_encoding: str = '') -> Response:
+    """
+    Compress a buffered JSON response in place, as make_json_response does
+
+    Streamed and already-encoded responses are returned unchanged.
+    """
+    if (response.is_streamed or response.direct_passthrough or not response.is_json
+            or "Content-Encoding" in response.headers):
+        return response
+    body, encoding = _compress(response.get_data(), accept_encoding)
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+    return response
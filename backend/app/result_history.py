@@ -0,0 +1,366 @@
+"""
+Persistent, queryable history of screening results
+
+Every real analysis result is appended to a SQLite table (RESULT_HISTORY_DB).
+The columns used for filtering and sorting (job description hash, match score,
+recommendation, creation time) are stored next to the full result JSON and
+covered by composite indexes, and pages are fetched with keyset cursors
+(the sort value and id of the last row seen) instead of OFFSET. A page costs
+the same however deep into the history it is, so queries stay fast as the
+table grows to hundreds of thousands of rows.
+
+On first use an empty history is seeded from the legacy JSON response cache.
+"""
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cache_store import load_cached_responses
+
+logger = logging.getLogger(__name__)
+
+RESULT_HISTORY_DB = os.getenv('RESULT_HISTORY_DB', os.path.join(os.path.dirname(__file__), 'history', 'results.db'))
+HISTORY_DEFAULT_LIMIT = int(os.getenv('HISTORY_DEFAULT_LIMIT', 50))
+HISTORY_MAX_LIMIT = int(os.getenv('HISTORY_MAX_LIMIT', 500))
+
+SORT_COLUMNS = {
+    "time": "created_at",
+    "score": "match_score",
+}
+SORT_ORDERS = ("desc", "asc")
+
+# Shortest job description hash prefix accepted as a filter
+MIN_JD_HASH_PREFIX = 8
+# Stored length of job description hashes, as in sessions and analytics
+JD_HASH_LENGTH = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    jd_hash TEXT,
+    filename TEXT,
+    candidate_name TEXT,
+    match_score REAL NOT NULL,
+    recommendation TEXT,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_time ON results (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_results_score ON results (match_score, id);
+CREATE INDEX IF NOT EXISTS idx_results_jd_time ON results (jd_hash, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_results_jd_score ON results (jd_hash, match_score, id);
+CREATE INDEX IF NOT EXISTS idx_results_rec_time ON results (recommendation, created_at, id);
+"""
+
+
+class InvalidQueryError(ValueError):
+    """Raised for history queries with bad filters, sort options or cursors"""
+
+
+def _parse_time(value: str, name: str) -> float:
+    """Epoch seconds or an ISO 8601 date/datetime (local time if no offset is given)"""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        raise InvalidQueryError(f"{name} must be an ISO 8601 datetime or epoch seconds")
+
+
+def _parse_score(value: str, name: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        raise InvalidQueryError(f"{name} must be a number")
+
+
+def parse_history_filters(args) -> Dict[str, Any]:
+    """
+    Read history filters from request arguments
+
+    Args:
+        args: Mapping with optional "jd_hash" (full hash or a prefix of at least 8 hex
+            characters), "min_score", "max_score", "recommendation" (comma-separated),
+            "since" (inclusive) and "until" (exclusive)
+
+    Returns:
+        Dict of the filters that were given
+
+    Raises:
+        InvalidQueryError: A filter has an unsupported value
+    """
+    filters = {}
+    jd_hash = (args.get('jd_hash') or '').strip().lower()
+    if jd_hash:
+        if len(jd_hash) < MIN_JD_HASH_PREFIX or any(ch not in '0123456789abcdef' for ch in jd_hash):
+            raise InvalidQueryError(f"jd_hash must be at least {MIN_JD_HASH_PREFIX} hex characters")
+        filters["jd_hash"] = jd_hash[:JD_HASH_LENGTH]
+    for name in ("min_score", "max_score"):
+        if args.get(name):
+            filters[name] = _parse_score(args.get(name), name)
+    recommendations = [r.strip() for r in (args.get('recommendation') or '').split(',') if r.strip()]
+    if recommendations:
+        filters["recommendation"] = recommendations
+    for name in ("since", "until"):
+        if args.get(name):
+            filters[name] = _parse_time(args.get(name).strip(), name)
+    return filters
+
+
+def parse_history_query(args) -> Dict[str, Any]:
+    """
+    Read history filters, sort options and paging from request arguments
+
+    Args:
+        args: Mapping with the filters of parse_history_filters plus optional
+            "sort" (time or score), "order" (desc or asc), "limit" and "cursor"
+
+    Returns:
+        Dict with "filters", "sort", "order", "limit" and "cursor"
+
+    Raises:
+        InvalidQueryError: An argument has an unsupported value
+    """
+    filters = parse_history_filters(args)
+    sort = (args.get('sort') or 'time').strip().lower()
+    if sort not in SORT_COLUMNS:
+        raise InvalidQueryError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    order = (args.get('order') or 'desc').strip().lower()
+    if order not in SORT_ORDERS:
+        raise InvalidQueryError("order must be 'desc' or 'asc'")
+
+    try:
+        limit = int(args.get('limit') or HISTORY_DEFAULT_LIMIT)
+    except ValueError:
+        raise InvalidQueryError("limit must be an integer")
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+
+    return {"filters": filters, "sort": sort, "order": order, "limit": limit, "cursor": args.get('cursor') or None}
+
+
+def _filters_fingerprint(filters: Dict[str, Any], sort: str, order: str) -> str:
+    payload = json.dumps([filters, sort, order], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(filters: Dict[str, Any], sort: str, order: str, value: float, row_id: int) -> str:
+    """Opaque cursor pointing just past a row"""
+    payload = {"f": _filters_fingerprint(filters, sort, order), "v": value, "id": row_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, filters: Dict[str, Any], sort: str, order: str) -> tuple:
+    """
+    Read a cursor produced by encode_cursor
+
+    Returns:
+        Tuple of (sort value, row id) of the last row of the previous page
+
+    Raises:
+        InvalidQueryError: The cursor is malformed or belongs to a different query
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, row_id, fingerprint = float(payload["v"]), int(payload["id"]), payload["f"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise InvalidQueryError("Invalid cursor")
+    if fingerprint != _filters_fingerprint(filters, sort, order):
+        raise InvalidQueryError("Cursor does not match the query's filters or sort order")
+    return value, row_id
+
+
+def _jd_hash_range(prefix: str) -> tuple:
+    # Hex digits all sort before 'g', so a prefix match is an index range scan
+    return prefix, prefix + 'g'
+
+
+class ResultHistory:
+    """SQLite result history with indexed filters and keyset pagination"""
+
+    def __init__(self, db_path: str = RESULT_HISTORY_DB, seed_from_cache: bool = True):
+        self.db_path = db_path
+        self.seed_from_cache = seed_from_cache
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; schema is created on first use
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    if self.seed_from_cache:
+                        self._seed(conn)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _seed(self, conn: sqlite3.Connection):
+        """Import the legacy JSON response cache into an empty history"""
+        if conn.execute("SELECT 1 FROM results LIMIT 1").fetchone():
+            return
+        rows = []
+        for response in load_cached_responses():
+            try:
+                created_at = datetime.fromisoformat(response['timestamp']).timestamp()
+            except (KeyError, TypeError, ValueError):
+                created_at = time.time()
+            row = self._row(response, None, created_at)
+            if row:
+                rows.append(row)
+        if rows:
+            self._insert(conn, rows)
+            logger.info(f"🗄️ Seeded result history with {len(rows)} cached response(s)")
+
+    @staticmethod
+    def _row(result: Dict[str, Any], jd_hash: Optional[str], created_at: float) -> Optional[tuple]:
+        score = result.get("match_score")
+        if not isinstance(score, (int, float)) or isinstance(score, bool):
+            return None
+        return (created_at, jd_hash[:JD_HASH_LENGTH] if jd_hash else None, result.get("filename"), result.get("candidate_name"), float(score),
+                result.get("recommendation"), json.dumps(result, ensure_ascii=False, default=str))
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: List[tuple]):
+        conn.executemany(
+            "INSERT INTO results (created_at, jd_hash, filename, candidate_name, match_score, recommendation, result) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def record(self, result: Dict[str, Any], jd_hash: str):
+        """
+        Append a result to the history
+
+        Args:
+            result: A successful analysis result (results without a numeric match_score are ignored)
+            jd_hash: job_description_hash of the job description it was screened against (first 16 characters are kept)
+        """
+        row = self._row(result, jd_hash, time.time())
+        if row is None:
+            return
+        try:
+            self._insert(self._conn(), [row])
+        except sqlite3.Error as e:
+            # History is best effort; never fail an analysis because of it
+            logger.error(f"❌ Error recording result history: {str(e)}")
+
+    def _where(self, filters: Dict[str, Any]) -> tuple:
+        clauses, params = [], []
+        if "jd_hash" in filters:
+            if len(filters["jd_hash"]) == JD_HASH_LENGTH:
+                clauses.append("jd_hash = ?")
+                params.append(filters["jd_hash"])
+            else:
+                clauses.append("jd_hash >= ? AND jd_hash < ?")
+                params.extend(_jd_hash_range(filters["jd_hash"]))
+        if "min_score" in filters:
+            clauses.append("match_score >= ?")
+            params.append(filters["min_score"])
+        if "max_score" in filters:
+            clauses.append("match_score <= ?")
+            params.append(filters["max_score"])
+        if "recommendation" in filters:
+            clauses.append(f"recommendation IN ({', '.join('?' for _ in filters['recommendation'])})")
+            params.extend(filters["recommendation"])
+        if "since" in filters:
+            clauses.append("created_at >= ?")
+            params.append(filters["since"])
+        if "until" in filters:
+            clauses.append("created_at < ?")
+            params.append(filters["until"])
+        return clauses, params
+
+    def _select(self, filters: Dict[str, Any], sort: str, order: str, after: Optional[tuple] = None,
+                limit: Optional[int] = None) -> sqlite3.Cursor:
+        column = SORT_COLUMNS[sort]
+        clauses, params = self._where(filters)
+        if after is not None:
+            clauses.append(f"({column}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+            params.extend(after)
+        sql = f"SELECT id, created_at, jd_hash, {column} AS sort_value, result FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = order.upper()
+        sql += f" ORDER BY {column} {direction}, id {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._conn().execute(sql, params)
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = json.loads(row["result"])
+        entry["history_id"] = row["id"]
+        entry["job_description_hash"] = row["jd_hash"]
+        entry["recorded_at"] = datetime.fromtimestamp(row["created_at"]).isoformat()
+        return entry
+
+    def query(self, filters: Dict[str, Any], sort: str = "time", order: str = "desc",
+              limit: int = HISTORY_DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch one page of history
+
+        Args:
+            filters: "filters" from parse_history_query
+            sort: "time" or "score"
+            order: "desc" or "asc"
+            limit: Page size
+            cursor: "next_cursor" of the previous page, for the same filters and sort
+
+        Returns:
+            Dict with "results" (newest or best first by default) and "next_cursor"
+            (None on the last page)
+
+        Raises:
+            InvalidQueryError: The cursor is malformed or belongs to a different query
+        """
+        after = decode_cursor(cursor, filters, sort, order) if cursor else None
+        # One extra row tells whether another page follows
+        rows = self._select(filters, sort, order, after, limit + 1).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(filters, sort, order, rows[-1]["sort_value"], rows[-1]["id"])
+        return {"results": [self._entry(row) for row in rows], "next_cursor": next_cursor}
+
+    def iter_results(self, filters: Optional[Dict[str, Any]] = None, sort: str = "time", order: str = "desc",
+                     page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream every matching result, one at a time"""
+        cursor = self._select(filters or {}, sort, order)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            for row in rows:
+                yield self._entry(row)
+
+    def stats(self) -> Dict[str, Any]:
+        row = self._conn().execute("SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM results").fetchone()
+        return {
+            "db_path": self.db_path,
+            "total_results": row[0],
+            "oldest": datetime.fromtimestamp(row[1]).isoformat() if row[1] else None,
+            "newest": datetime.fromtimestamp(row[2]).isoformat() if row[2] else None,
+        }
+
+
+result_history = ResultHistory()
@@ -0,0 +1,225 @@
+"""
+Central fair-share scheduler for resume analysis work
+
+All analysis tasks from every request go through one shared worker pool.
+Tasks are queued per tenant (API key, user or client) and dispatched with
+weighted fair queuing, so a tenant's share of the workers is proportional to
+its weight however many tasks it queues. Small interactive requests are served
+ahead of bulk batches, with a burst limit so bulk work is never starved.
+"""
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', 10))
+# Consecutive interactive dispatches allowed while bulk work is waiting
+SCHEDULER_INTERACTIVE_BURST = int(os.getenv('SCHEDULER_INTERACTIVE_BURST', 4))
+# Requests with at most this many files are scheduled as interactive
+INTERACTIVE_MAX_FILES = int(os.getenv('INTERACTIVE_MAX_FILES', 3))
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+_WAIT_SAMPLES = 256
+_MAX_TRACKED_TENANTS = 1000
+
+
+def parse_tenant_weights(spec: str) -> Dict[str, float]:
+    """Parse "tenant:weight,tenant:weight" into a dict"""
+    weights = {}
+    for item in (spec or '').split(','):
+        if ':' not in item:
+            continue
+        tenant, weight = item.rsplit(':', 1)
+        try:
+            weights[tenant.strip()] = max(float(weight), 0.01)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring invalid tenant weight: {item}")
+    return weights
+
+
+class _Task:
+    __slots__ = ('future', 'fn', 'args', 'kwargs', 'tenant', 'priority', 'enqueued_at')
+
+    def __init__(self, future, fn, args, kwargs, tenant, priority):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tenant = tenant
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+
+class _TenantStats:
+    """Queue depth and recent queue wait times for one tenant"""
+
+    def __init__(self):
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.last_finish_tag = 0.0
+        self.waits = deque(maxlen=_WAIT_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class FairScheduler:
+    """Shared worker pool with per-tenant weighted fair queuing and priority classes"""
+
+    def __init__(self, max_workers: int = SCHEDULER_WORKERS, tenant_weights: Optional[Dict[str, float]] = None,
+                 interactive_burst: int = SCHEDULER_INTERACTIVE_BURST):
+        self.max_workers = max_workers
+        self.tenant_weights = tenant_weights or {}
+        self.interactive_burst = interactive_burst
+        self._queues = {INTERACTIVE: [], BULK: []}
+        self._tenants: Dict[str, _TenantStats] = {}
+        self._virtual_time = 0.0
+        self._interactive_streak = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._shutdown = False
+        # Optional hook applied to each task in the submitting thread (used for request profiling)
+        self.task_wrapper: Optional[Callable[[Callable], Callable]] = None
+
+    def _ensure_workers(self):
+        # Workers start lazily so importing the app does not spawn threads
+        if self._workers:
+            return
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"scheduler-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def start(self):
+        """Start the worker threads ahead of the first submission"""
+        with self._cond:
+            self._ensure_workers()
+
+    def weight_for(self, tenant: str) -> float:
+        return self.tenant_weights.get(tenant, 1.0)
+
+    def submit(self, fn: Callable, *args, tenant: str = 'anonymous', priority: str = BULK, **kwargs) -> Future:
+        """
+        Queue a task for execution
+
+        Args:
+            fn: Callable to run on a worker thread
+            tenant: Fairness key (API key, user or session)
+            priority: INTERACTIVE or BULK
+
+        Returns:
+            Future for the task result; cancelling it before dispatch removes it from the queue
+        """
+        future = Future()
+        if self.task_wrapper is not None:
+            fn = self.task_wrapper(fn)
+        task = _Task(future, fn, args, kwargs, tenant, priority if priority in self._queues else BULK)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            self._ensure_workers()
+            if tenant not in self._tenants and len(self._tenants) >= _MAX_TRACKED_TENANTS:
+                self._prune_idle_tenants()
+            stats = self._tenants.setdefault(tenant, _TenantStats())
+            # Weighted fair queuing: each task costs 1 / weight of virtual time for its tenant
+            start_tag = max(self._virtual_time, stats.last_finish_tag)
+            finish_tag = start_tag + 1.0 / self.weight_for(tenant)
+            stats.last_finish_tag = finish_tag
+            stats.queued += 1
+            heapq.heappush(self._queues[task.priority], (finish_tag, next(self._seq), task))
+            self._cond.notify()
+        return future
+
+    def _prune_idle_tenants(self):
+        """Forget tenants with no queued or running work; caller holds the lock"""
+        for tenant in [t for t, s in self._tenants.items() if not s.queued and not s.running]:
+            del self._tenants[tenant]
+
+    def _next_task(self) -> Optional[_Task]:
+        """Pick the next task; caller holds the lock"""
+        interactive, bulk = self._queues[INTERACTIVE], self._queues[BULK]
+        if interactive and (not bulk or self._interactive_streak < self.interactive_burst):
+            queue = interactive
+            self._interactive_streak += 1
+        elif bulk:
+            queue = bulk
+            self._interactive_streak = 0
+        else:
+            return None
+        finish_tag, _, task = heapq.heappop(queue)
+        self._virtual_time = max(self._virtual_time, finish_tag - 1.0 / self.weight_for(task.tenant))
+        stats = self._tenants[task.tenant]
+        stats.queued -= 1
+        return task
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    task = self._next_task()
+                stats = self._tenants[task.tenant]
+
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                stats.running += 1
+                stats.waits.append(time.monotonic() - task.enqueued_at)
+
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+            finally:
+                with self._cond:
+                    stats.running -= 1
+                    stats.completed += 1
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of queue depths and per-tenant wait times"""
+        with self._cond:
+            return {
+                "workers": self.max_workers,
+                "queued_interactive": len(self._queues[INTERACTIVE]),
+                "queued_bulk": len(self._queues[BULK]),
+                "running": sum(s.running for s in self._tenants.values()),
+                "tenants": {tenant: dict(s.snapshot(), weight=self.weight_for(tenant))
+                            for tenant, s in self._tenants.items()},
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+
+
+scheduler = FairScheduler(tenant_weights=parse_tenant_weights(os.getenv('SCHEDULER_TENANT_WEIGHTS', '')))
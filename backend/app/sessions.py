@@ -0,0 +1,148 @@
+"""
+Server-side screening sessions with an incrementally maintained ranking
+"""
+import bisect
+import hashlib
+import itertools
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SESSION_TTL_SECONDS = int(os.getenv('SESSION_TTL_SECONDS', 8 * 60 * 60))  # 8 hours idle
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', 1000))
+
+
+def content_hash(data: bytes) -> str:
+    """Stable hash of file or text content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScreeningSession:
+    """
+    A job description plus every resume screened against it
+
+    Results are kept in a list sorted by (-match_score, insertion order), so adding
+    a result is a binary search plus insert and reading the top N is a slice.
+    """
+
+    def __init__(self, job_description: str):
+        self.id = uuid.uuid4().hex
+        self.job_description = job_description
+        self.jd_hash = content_hash(job_description.encode('utf-8'))
+        self.created_at = datetime.now().isoformat()
+        self.last_access = time.monotonic()
+        self._file_hashes = set()
+        # Latest failure per file content, so retrying a file does not pile up entries
+        self._failed: Dict[str, Dict[str, Any]] = {}
+        self._keys = []
+        self._results = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def claim_file(self, file_hash: str) -> bool:
+        """
+        Reserve a file for processing
+
+        Returns:
+            False if the same content was already added to this session
+        """
+        with self._lock:
+            if file_hash in self._file_hashes:
+                return False
+            self._file_hashes.add(file_hash)
+            return True
+
+    def release_file(self, file_hash: str):
+        """Forget a claimed file whose processing failed, so it can be retried"""
+        with self._lock:
+            self._file_hashes.discard(file_hash)
+
+    def record_failure(self, file_hash: str, result: Dict[str, Any]):
+        """Keep a failed file's error result and release it so it can be retried"""
+        with self._lock:
+            self._file_hashes.discard(file_hash)
+            self._failed[file_hash] = result
+
+    @property
+    def failed_results(self) -> List[Dict[str, Any]]:
+        """Error results of files that have not (yet) succeeded, one per file content"""
+        with self._lock:
+            return list(self._failed.values())
+
+    def add_result(self, result: Dict[str, Any], file_hash: Optional[str] = None):
+        """Merge a successful result into the ranking, clearing any earlier failure of the same file"""
+        with self._lock:
+            if file_hash is not None:
+                self._failed.pop(file_hash, None)
+            key = (-(result.get("match_score") or 0), next(self._seq))
+            index = bisect.bisect_right(self._keys, key)
+            self._keys.insert(index, key)
+            self._results.insert(index, result)
+
+    def top(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the best n results (all results if n is None)"""
+        with self._lock:
+            return list(self._results if n is None else self._results[:n])
+
+    @property
+    def size(self) -> int:
+        return len(self._results)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "job_description_hash": self.jd_hash[:16],
+            "created_at": self.created_at,
+            "total_candidates": len(self._results),
+            "failed_files": len(self._failed),
+        }
+
+
+class SessionStore:
+    """Thread-safe in-memory session registry with idle expiry"""
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_sessions: int = MAX_SESSIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, ScreeningSession] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for session_id in [s.id for s in self._sessions.values() if s.last_access < cutoff]:
+            del self._sessions[session_id]
+
+    def create(self, job_description: str) -> ScreeningSession:
+        session = ScreeningSession(job_description)
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                # Evict the least recently used session
+                oldest = min(self._sessions.values(), key=lambda s: s.last_access)
+                del self._sessions[oldest.id]
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ScreeningSession]:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+        if session:
+            session.touch()
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+session_store = SessionStore()
@@ -0,0 +1,248 @@
+"""
+LLM token accounting and budgets
+
+Prompt tokens are estimated before a call so oversized resumes can be
+truncated or rejected up front and budgets enforced. The usage reported by
+the API is then recorded per model, job description and tenant.
+
+Budgets:
+- TOKEN_MAX_PROMPT_TOKENS caps a single analysis prompt (TOKEN_OVERSIZE_POLICY
+  decides whether longer resumes are truncated or rejected)
+- TOKEN_REQUEST_BUDGET caps the tokens one upload request may spend
+- TOKEN_DAILY_BUDGET caps the tokens one tenant may spend per day
+A budget of 0 is unlimited.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CHARS_PER_TOKEN = float(os.getenv('TOKEN_CHARS_PER_TOKEN', 4))
+TOKEN_MAX_PROMPT_TOKENS = int(os.getenv('TOKEN_MAX_PROMPT_TOKENS', 8000))
+TOKEN_OVERSIZE_POLICY = os.getenv('TOKEN_OVERSIZE_POLICY', 'truncate')  # truncate | reject
+TOKEN_REQUEST_BUDGET = int(os.getenv('TOKEN_REQUEST_BUDGET', 0))
+TOKEN_DAILY_BUDGET = int(os.getenv('TOKEN_DAILY_BUDGET', 0))
+TOKEN_MAX_TRACKED_JDS = int(os.getenv('TOKEN_MAX_TRACKED_JDS', 200))
+
+# Tokens taken by the fixed instructions of the analysis prompt
+PROMPT_TEMPLATE_TOKENS = 300
+
+RESUME_TOO_LONG = 'resume_too_long'
+TOKEN_BUDGET_EXCEEDED = 'token_budget_exceeded'
+
+
+class TokenBudgetError(Exception):
+    """Raised when a call would exceed a token limit or budget"""
+
+    def __init__(self, message: str, code: str = TOKEN_BUDGET_EXCEEDED):
+        super().__init__(message)
+        self.code = code
+
+
+def _is_wide(ch: str) -> bool:
+    # CJK ideographs, kana and hangul are roughly one token per character
+    code = ord(ch)
+    return 0x3040 <= code <= 0x30FF or 0x3400 <= code <= 0x9FFF or 0xAC00 <= code <= 0xD7AF or 0xF900 <= code <= 0xFAFF
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one per CJK character, TOKEN_CHARS_PER_TOKEN characters per token otherwise"""
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) >= 0x3040 and _is_wide(ch))
+    return int(wide + (len(text) - wide) / TOKEN_CHARS_PER_TOKEN) + 1
+
+
+def estimate_prompt_tokens(job_description: str, resume_text: str) -> int:
+    return PROMPT_TEMPLATE_TOKENS + estimate_tokens(job_description) + estimate_tokens(resume_text)
+
+
+def fit_resume_to_prompt_limit(resume_text: str, job_description: str,
+                               max_prompt_tokens: int = TOKEN_MAX_PROMPT_TOKENS) -> Tuple[str, bool]:
+    """
+    Make sure the analysis prompt stays within max_prompt_tokens
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: The job description text
+
+    Returns:
+        Tuple of (resume text, truncated)
+
+    Raises:
+        TokenBudgetError: The prompt is too long and the policy is "reject"
+    """
+    if not max_prompt_tokens:
+        return resume_text, False
+    resume_tokens = estimate_tokens(resume_text)
+    available = max_prompt_tokens - PROMPT_TEMPLATE_TOKENS - estimate_tokens(job_description)
+    if resume_tokens <= available:
+        return resume_text, False
+    if TOKEN_OVERSIZE_POLICY == 'reject' or available <= 0:
+        raise TokenBudgetError(
+            f"Resume needs about {resume_tokens} tokens but only {max(available, 0)} fit in the "
+            f"{max_prompt_tokens}-token prompt limit", RESUME_TOO_LONG
+        )
+    keep = int(len(resume_text) * available / resume_tokens)
+    return resume_text[:keep], True
+
+
+class TokenLedger:
+    """Thread-safe token usage totals per model, job description and tenant"""
+
+    def __init__(self, daily_budget: int = TOKEN_DAILY_BUDGET, max_jds: int = TOKEN_MAX_TRACKED_JDS):
+        self.daily_budget = daily_budget
+        self.max_jds = max_jds
+        self.totals = self._empty()
+        self.per_model: Dict[str, Dict[str, float]] = {}
+        self.per_jd: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._day = date.today().isoformat()
+        self.per_tenant_today: Dict[str, Dict[str, float]] = {}
+        self._reserved: Dict[str, int] = {}
+        self.rejected_calls = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty() -> Dict[str, float]:
+        return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0,
+                "estimated_prompt_tokens": 0, "call_seconds": 0.0}
+
+    def _roll_day(self):
+        # Caller holds the lock
+        today = date.today().isoformat()
+        if today != self._day:
+            self._day = today
+            self.per_tenant_today = {}
+
+    def daily_used(self, tenant: str) -> int:
+        with self._lock:
+            self._roll_day()
+            return int(self.per_tenant_today.get(tenant, {}).get("total_tokens", 0)) + self._reserved.get(tenant, 0)
+
+    def reserve(self, tenant: str, tokens: int):
+        """
+        Hold tokens against the tenant's daily budget until the call settles
+
+        Raises:
+            TokenBudgetError: The tenant's daily budget would be exceeded
+        """
+        with self._lock:
+            self._roll_day()
+            used = int(self.per_tenant_today.get(tenant, {}).get("total_tokens", 0)) + self._reserved.get(tenant, 0)
+            if self.daily_budget and used + tokens > self.daily_budget:
+                self.rejected_calls += 1
+                raise TokenBudgetError(f"Daily token budget of {self.daily_budget} exhausted for this client")
+            self._reserved[tenant] = self._reserved.get(tenant, 0) + tokens
+
+    def release(self, tenant: str, tokens: int):
+        with self._lock:
+            left = self._reserved.get(tenant, 0) - tokens
+            if left > 0:
+                self._reserved[tenant] = left
+            else:
+                self._reserved.pop(tenant, None)
+
+    def note_rejected(self):
+        with self._lock:
+            self.rejected_calls += 1
+
+    def record(self, usage: Dict[str, Any], jd_hash: str, tenant: Optional[str] = None):
+        """Record one call's usage ("prompt_tokens", "completion_tokens", "total_tokens", "model", ...)"""
+        with self._lock:
+            self._roll_day()
+            buckets = [self.totals,
+                       self.per_model.setdefault(usage.get("model") or "unknown", self._empty()),
+                       self.per_tenant_today.setdefault(tenant or "unattributed", self._empty())]
+            key = jd_hash[:16]
+            jd_bucket = self.per_jd.get(key)
+            if jd_bucket is None:
+                jd_bucket = self.per_jd[key] = self._empty()
+                if len(self.per_jd) > self.max_jds:
+                    self.per_jd.popitem(last=False)
+            else:
+                self.per_jd.move_to_end(key)
+            buckets.append(jd_bucket)
+
+            for bucket in buckets:
+                bucket["calls"] += 1
+                for field in ("prompt_tokens", "completion_tokens", "total_tokens", "estimated_prompt_tokens"):
+                    bucket[field] += usage.get(field) or 0
+                bucket["call_seconds"] += (usage.get("call_ms") or 0) / 1000
+
+    @staticmethod
+    def _view(bucket: Dict[str, float]) -> Dict[str, Any]:
+        view = {k: int(v) for k, v in bucket.items() if k != "call_seconds"}
+        view["completion_tokens_per_second"] = (
+            round(bucket["completion_tokens"] / bucket["call_seconds"], 1) if bucket["call_seconds"] else None
+        )
+        return view
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._roll_day()
+            return {
+                "totals": self._view(self.totals),
+                "models": {m: self._view(b) for m, b in self.per_model.items()},
+                "job_descriptions": {h: self._view(b) for h, b in self.per_jd.items()},
+                "tenants_today": {t: self._view(b) for t, b in self.per_tenant_today.items()},
+                "day": self._day,
+                "rejected_calls": self.rejected_calls,
+                "limits": {
+                    "max_prompt_tokens": TOKEN_MAX_PROMPT_TOKENS,
+                    "oversize_policy": TOKEN_OVERSIZE_POLICY,
+                    "request_budget": TOKEN_REQUEST_BUDGET,
+                    "daily_budget": self.daily_budget,
+                },
+            }
+
+
+token_ledger = TokenLedger()
+
+
+class RequestTokenBudget:
+    """Token allowance of one upload request, also charged to its tenant's daily budget"""
+
+    def __init__(self, tenant: str, limit: int = TOKEN_REQUEST_BUDGET, ledger: TokenLedger = token_ledger):
+        self.tenant = tenant
+        self.limit = limit
+        self.ledger = ledger
+        self.used = 0
+        self.reserved = 0
+        self._lock = threading.Lock()
+
+    def daily_exhausted(self) -> bool:
+        return bool(self.ledger.daily_budget) and self.ledger.daily_used(self.tenant) >= self.ledger.daily_budget
+
+    def reserve(self, tokens: int) -> int:
+        """
+        Reserve the worst-case tokens of one call
+
+        Returns:
+            The reserved amount, to pass to settle
+
+        Raises:
+            TokenBudgetError: The request or daily budget would be exceeded
+        """
+        with self._lock:
+            if self.limit and self.used + self.reserved + tokens > self.limit:
+                self.ledger.note_rejected()
+                raise TokenBudgetError(f"Request token budget of {self.limit} exhausted")
+            self.reserved += tokens
+        try:
+            self.ledger.reserve(self.tenant, tokens)
+        except TokenBudgetError:
+            with self._lock:
+                self.reserved -= tokens
+            raise
+        return tokens
+
+    def settle(self, reserved: int, used: int):
+        """Replace a reservation with the tokens actually used"""
+        with self._lock:
+            self.reserved -= reserved
+            self.used += used
+        self.ledger.release(self.tenant, reserved)
@@ -0,0 +1,82 @@
+"""
+Two-phase analysis support: lazily generated result details
+
+In two-phase mode every resume first gets a fast score-only analysis. The
+text and job description behind each score-only result are kept here under a
+detail id, so the full narrative (reasoning, strengths, improvement areas,
+summary) can be generated on demand and cached for later views.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DETAIL_TTL_SECONDS = int(os.getenv('DETAIL_TTL_SECONDS', 24 * 3600))
+DETAIL_MAX_ENTRIES = int(os.getenv('DETAIL_MAX_ENTRIES', 5000))
+# Results that get full details automatically in two-phase mode
+TWO_PHASE_DETAIL_TOP_K = int(os.getenv('TWO_PHASE_DETAIL_TOP_K', 3))
+
+DETAIL_FIELDS = ("reasoning", "strengths", "improvement_areas", "summary")
+
+
+def detail_id_for(resume_text: str, job_description: str) -> str:
+    """Stable id of a resume + job description pair"""
+    digest = hashlib.sha256()
+    digest.update(resume_text.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(job_description.encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+class DetailStore:
+    """TTL + LRU bounded store of score-only results awaiting (or holding) full details"""
+
+    def __init__(self, ttl_seconds: int = DETAIL_TTL_SECONDS, max_entries: int = DETAIL_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, detail_id: str, resume_text: str, job_description: str, filename: str):
+        with self._lock:
+            entry = self._entries.get(detail_id)
+            if entry is None:
+                entry = self._entries[detail_id] = {
+                    "resume_text": resume_text,
+                    "job_description": job_description,
+                    "filename": filename,
+                    "details": None,
+                }
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            entry["expires_at"] = time.time() + self.ttl_seconds
+            self._entries.move_to_end(detail_id)
+
+    def get(self, detail_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(detail_id)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._entries[detail_id]
+                return None
+            self._entries.move_to_end(detail_id)
+            return entry
+
+    def set_details(self, detail_id: str, details: Dict[str, Any]):
+        with self._lock:
+            entry = self._entries.get(detail_id)
+            if entry is not None:
+                entry["details"] = details
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "with_details": sum(1 for e in self._entries.values() if e["details"] is not None),
+            }
+
+
+detail_store = DetailStore()
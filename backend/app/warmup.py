@@ -0,0 +1,233 @@
+"""
+Startup warm-up and readiness tracking
+
+Warm-up runs once in a background thread when the app starts. It pays the
+cold-start costs (lazy imports, LLM client and TLS connection, cache load,
+history and work-queue databases, first PDF extraction, worker threads)
+before real traffic arrives.
+/api/ready reports per-component status and timings so a load balancer only
+routes to warm instances.
+"""
+import importlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'true').lower() == 'true'
+# Open a connection to the LLM endpoint during warm-up (not required for readiness)
+WARMUP_LLM_PING = os.getenv('WARMUP_LLM_PING', 'true').lower() == 'true'
+WARMUP_LLM_TIMEOUT_SECONDS = float(os.getenv('WARMUP_LLM_TIMEOUT_SECONDS', 5))
+# Set by run.py when the werkzeug reloader is on. The reloader's parent process only
+# watches files; the child it starts (WERKZEUG_RUN_MAIN=true) serves the requests
+USE_RELOADER = os.getenv('USE_RELOADER', 'false').lower() == 'true'
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+_PRELOAD_MODULES = ('PyPDF2', 'openai')
+_OPTIONAL_MODULES = ('httpx', 'pdfplumber', 'orjson', 'brotli')
+
+
+def is_reloader_parent() -> bool:
+    """True in the reloader's file-watching process, which never serves requests"""
+    return USE_RELOADER and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+
+
+def _tiny_pdf(text: str = "Warm up") -> bytes:
+    """Build a minimal one-page PDF in memory"""
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i + 1) + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return out
+
+
+class WarmupState:
+    """Per-component warm-up status; the instance is ready once every required component is"""
+
+    def __init__(self):
+        self.components: Dict[str, Dict[str, Any]] = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, name: str, required: bool = True):
+        with self._lock:
+            self.components[name] = {"status": PENDING, "required": required, "duration_ms": None, "error": None}
+
+    def _set(self, name: str, **fields):
+        with self._lock:
+            self.components[name].update(fields)
+
+    def run_step(self, name: str, step: Callable[[], Any]):
+        """Run one warm-up step and record its outcome"""
+        start = time.time()
+        try:
+            detail = step()
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up step {name} failed: {e}")
+            self._set(name, status=FAILED, error=str(e), duration_ms=round((time.time() - start) * 1000, 1))
+            return
+        duration_ms = round((time.time() - start) * 1000, 1)
+        if detail == SKIPPED:
+            self._set(name, status=SKIPPED, duration_ms=duration_ms)
+        else:
+            self._set(name, status=READY, duration_ms=duration_ms, detail=detail)
+        logger.info(f"🔥 Warm-up step {name} done in {duration_ms}ms")
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            if not self.components:
+                # With warm-up disabled there is nothing to wait for
+                return not WARMUP_ON_STARTUP
+            # Skipped steps do not apply to this deployment (no API key: mock responses only)
+            return all(
+                c["status"] in (READY, SKIPPED) for c in self.components.values() if c["required"]
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(c) for name, c in self.components.items()}
+            total = None
+            if self.started_at and self.finished_at:
+                total = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            "ready": self.is_ready(),
+            "mock_only": components.get("llm_client", {}).get("status") == SKIPPED,
+            "warmup_finished": self.finished_at is not None,
+            "warmup_time_ms": total,
+            "components": components,
+        }
+
+    def start(self, background: bool = True):
+        """Run warm-up once, in a background thread by default"""
+        if is_reloader_parent():
+            logger.info("🔥 Skipping warm-up in the reloader parent process")
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        for name, required in (("modules", True), ("llm_client", True), ("llm_connection", False),
+                               ("response_cache", True), ("result_history", True), ("work_queue", True),
+                               ("pdf_extractor", True), ("scheduler", True)):
+            self.register(name, required)
+        if background:
+            self._thread.start()
+        else:
+            self._run()
+
+    def _run(self):
+        self.started_at = time.time()
+        logger.info("🔥 Starting warm-up")
+        self.run_step("modules", _preload_modules)
+        self.run_step("llm_client", _init_llm_client)
+        self.run_step("llm_connection", _ping_llm)
+        self.run_step("response_cache", _load_cache)
+        self.run_step("result_history", _open_result_history)
+        self.run_step("work_queue", _open_work_queue)
+        self.run_step("pdf_extractor", _extract_tiny_pdf)
+        self.run_step("scheduler", _start_scheduler)
+        self.finished_at = time.time()
+        logger.info(f"🔥 Warm-up finished in {(self.finished_at - self.started_at) * 1000:.1f}ms, "
+                    f"ready: {self.is_ready()}")
+
+
+def _preload_modules():
+    loaded = []
+    for module in _PRELOAD_MODULES:
+        importlib.import_module(module)
+        loaded.append(module)
+    for module in _OPTIONAL_MODULES:
+        try:
+            importlib.import_module(module)
+            loaded.append(module)
+        except ImportError:
+            pass
+    return {"loaded": loaded}
+
+
+def _init_llm_client():
+    from .qwen_analyzer import get_llm_client
+    api_key = os.environ.get("API_KEY")
+    if not api_key:
+        # Dev and demo instances run without a key and serve mock (cached) responses only
+        logger.warning("⚠️ API_KEY is not set - only mock analyses will work")
+        return SKIPPED
+    get_llm_client(api_key)
+    return None
+
+
+def _ping_llm():
+    # Opens the pooled TLS connection so the first analysis does not pay for the handshake
+    if not WARMUP_LLM_PING or not os.environ.get("API_KEY"):
+        return SKIPPED
+    from .qwen_analyzer import get_llm_client
+    client = get_llm_client(os.environ["API_KEY"])
+    client.with_options(timeout=WARMUP_LLM_TIMEOUT_SECONDS, max_retries=0).models.list()
+    return None
+
+
+def _load_cache():
+    from .cache_store import load_cached_responses
+    return {"cached_responses": len(load_cached_responses())}
+
+
+def _open_result_history():
+    # Creates the schema (and seeds it from the cache) on first open
+    from .result_history import result_history
+    return {"total_results": result_history.stats()["total_results"]}
+
+
+def _open_work_queue():
+    from .work_queue import work_queue
+    return {"queued": work_queue.stats()["counts"]["queued"]}
+
+
+def _extract_tiny_pdf():
+    # Also starts the first extraction sandbox worker
+    from .extraction_sandbox import extract_pdf
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+        f.write(_tiny_pdf())
+        path = f.name
+    try:
+        result = extract_pdf(path)
+    finally:
+        os.unlink(path)
+    if result.get("validation_error") or result.get("error"):
+        raise ValueError(result.get("validation_error") or result.get("error"))
+    if not result["text"].strip():
+        raise ValueError("Extractor returned no text for the warm-up PDF")
+    return {"backend": result.get("backend")}
+
+
+def _start_scheduler():
+    from .scheduler import scheduler
+    scheduler.start()
+    return {"workers": scheduler.max_workers}
+
+
+warmup = WarmupState()
@@ -0,0 +1,313 @@
+"""
+Durable SQLite-backed work queue for resume analysis
+
+The web app enqueues one task per uploaded file (the PDF bytes are stored with
+the task) and reads results back; standalone workers (python -m app.worker)
+lease tasks, keep their lease alive with heartbeats and store results. A task
+whose lease expires (worker crashed or hung) is redelivered to another worker,
+up to WORK_QUEUE_MAX_ATTEMPTS deliveries.
+
+The database is a single SQLite file in WAL mode, so any number of worker
+processes on the same host (or hosts sharing a filesystem with working locks)
+can pull from it.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORK_QUEUE_DB = os.getenv('WORK_QUEUE_DB', os.path.join(os.path.dirname(__file__), 'work_queue', 'queue.db'))
+WORK_QUEUE_LEASE_SECONDS = float(os.getenv('WORK_QUEUE_LEASE_SECONDS', 120))
+WORK_QUEUE_MAX_ATTEMPTS = int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', 3))
+# Finished tasks are deleted this long after completion
+WORK_QUEUE_RETENTION_SECONDS = float(os.getenv('WORK_QUEUE_RETENTION_SECONDS', 7 * 24 * 3600))
+
+QUEUED = 'queued'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    batch_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    job_description TEXT NOT NULL,
+    options TEXT NOT NULL,
+    file_blob BLOB,
+    result TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_batch ON tasks (batch_id, seq);
+"""
+
+
+class LeaseLostError(Exception):
+    """Raised when a worker reports on a task it no longer holds the lease for"""
+
+
+class WorkQueue:
+    """SQLite work queue with leases, heartbeats and redelivery"""
+
+    def __init__(self, db_path: str = WORK_QUEUE_DB, lease_seconds: float = WORK_QUEUE_LEASE_SECONDS,
+                 max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; schema is created on first use
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if os.path.dirname(self.db_path):
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(_SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def enqueue_batch(self, job_description: str, files: List[Dict[str, Any]], options: Optional[Dict] = None) -> str:
+        """
+        Enqueue one task per file
+
+        Args:
+            job_description: The job description text
+            files: List of {"filename", "data"} dicts with the PDF bytes
+            options: Per-task options (for example {"mock": True, "tenant": ...})
+
+        Returns:
+            The batch id
+        """
+        batch_id = uuid.uuid4().hex
+        now = time.time()
+        options_json = json.dumps(options or {})
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO tasks (id, batch_id, seq, status, filename, job_description, options, file_blob, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(uuid.uuid4().hex, batch_id, seq, QUEUED, f["filename"], job_description, options_json,
+                  sqlite3.Binary(f["data"]), now, now) for seq, f in enumerate(files)]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        logger.info(f"📥 Enqueued batch {batch_id} with {len(files)} task(s)")
+        return batch_id
+
+    def lease(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the oldest available task, including tasks whose lease expired
+
+        Returns:
+            Task dict with "id", "filename", "job_description", "options", "data" and
+            "attempts", or None when the queue is empty
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM tasks WHERE status = ? OR (status = ? AND lease_expires_at < ?) "
+                    "ORDER BY created_at, seq LIMIT 1",
+                    (QUEUED, LEASED, now)
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                if row["attempts"] >= self.max_attempts:
+                    # Delivered too many times without finishing; give up on it
+                    conn.execute(
+                        "UPDATE tasks SET status = ?, result = ?, file_blob = NULL, lease_owner = NULL, "
+                        "updated_at = ? WHERE id = ?",
+                        (FAILED, json.dumps({
+                            "status": "error",
+                            "message": f"Task abandoned after {row['attempts']} delivery attempts",
+                            "filename": row["filename"],
+                        }), now, row["id"])
+                    )
+                    logger.warning(f"⚠️ Task {row['id']} ({row['filename']}) abandoned after {row['attempts']} attempts")
+                    continue
+                if row["status"] == LEASED:
+                    logger.warning(f"🔁 Redelivering task {row['id']} ({row['filename']}) - lease of {row['lease_owner']} expired")
+                conn.execute(
+                    "UPDATE tasks SET status = ?, lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    (LEASED, worker_id, now + self.lease_seconds, now, row["id"])
+                )
+                conn.execute("COMMIT")
+                return {
+                    "id": row["id"],
+                    "batch_id": row["batch_id"],
+                    "filename": row["filename"],
+                    "job_description": row["job_description"],
+                    "options": json.loads(row["options"]),
+                    "data": bytes(row["file_blob"]),
+                    "attempts": row["attempts"] + 1,
+                }
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def heartbeat(self, task_id: str, worker_id: str):
+        """
+        Extend a lease
+
+        Raises:
+            LeaseLostError: The lease expired and the task was handed to someone else
+        """
+        cursor = self._conn().execute(
+            "UPDATE tasks SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (time.time() + self.lease_seconds, time.time(), task_id, LEASED, worker_id)
+        )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"Lease on task {task_id} was lost")
+
+    def complete(self, task_id: str, worker_id: str, result: Dict[str, Any]):
+        """
+        Store a task's result and drop its file
+
+        Raises:
+            LeaseLostError: The lease expired and the task was handed to someone else
+        """
+        cursor = self._conn().execute(
+            "UPDATE tasks SET status = ?, result = ?, file_blob = NULL, lease_owner = NULL, lease_expires_at = NULL, "
+            "updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+            (DONE, json.dumps(result), time.time(), task_id, LEASED, worker_id)
+        )
+        if cursor.rowcount != 1:
+            raise LeaseLostError(f"Lease on task {task_id} was lost")
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a batch's progress and results
+
+        Returns:
+            Dict with the batch's "job_description", per-status "counts", "done" flag and
+            "results" (finished tasks, in upload order), or None if the batch is unknown
+        """
+        rows = self._conn().execute(
+            "SELECT filename, status, result, job_description, created_at FROM tasks WHERE batch_id = ? ORDER BY seq",
+            (batch_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        results = []
+        for row in rows:
+            counts[row["status"]] += 1
+            if row["result"]:
+                results.append(json.loads(row["result"]))
+        return {
+            "batch_id": batch_id,
+            "job_description": rows[0]["job_description"],
+            "created_at": rows[0]["created_at"],
+            "total": len(rows),
+            "counts": counts,
+            "done": counts[QUEUED] + counts[LEASED] == 0,
+            "results": results,
+        }
+
+    def batch_counts(self, batch_id: str) -> Optional[Dict[str, int]]:
+        """
+        Count a batch's tasks by status without reading their results
+
+        Returns:
+            Dict of per-status counts, or None if the batch is unknown
+        """
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE batch_id = ? GROUP BY status", (batch_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update({status: n for status, n in rows})
+        return counts
+
+    def iter_batch_results(self, batch_id: str, order: Optional[str] = None,
+                           page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a batch's finished results from the database
+
+        Args:
+            batch_id: The batch id
+            order: None for upload order, "desc" or "asc" to sort by match_score
+                (results without a score come last either way)
+            page_size: Rows fetched per database round trip
+
+        Yields:
+            Result dicts, one at a time
+        """
+        order_by = "seq"
+        if order in ("desc", "asc"):
+            score = "json_extract(result, '$.match_score')"
+            order_by = f"{score} IS NULL, {score} {order.upper()}, seq"
+        cursor = self._conn().execute(
+            f"SELECT result FROM tasks WHERE batch_id = ? AND result IS NOT NULL ORDER BY {order_by}",
+            (batch_id,)
+        )
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                return
+            for row in rows:
+                yield json.loads(row["result"])
+
+    def purge_finished(self, older_than_seconds: float = WORK_QUEUE_RETENTION_SECONDS) -> int:
+        """Delete finished tasks older than the retention period"""
+        cursor = self._conn().execute(
+            "DELETE FROM tasks WHERE status IN (?, ?) AND updated_at < ?",
+            (DONE, FAILED, time.time() - older_than_seconds)
+        )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        conn = self._conn()
+        counts = {status: n for status, n in conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")}
+        expired = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status = ? AND lease_expires_at < ?", (LEASED, now)
+        ).fetchone()[0]
+        oldest = conn.execute(
+            "SELECT MIN(created_at) FROM tasks WHERE status = ?", (QUEUED,)
+        ).fetchone()[0]
+        workers = [row[0] for row in conn.execute(
+            "SELECT DISTINCT lease_owner FROM tasks WHERE status = ? AND lease_expires_at >= ?", (LEASED, now)
+        )]
+        return {
+            "db_path": self.db_path,
+            "counts": {status: counts.get(status, 0) for status in (QUEUED, LEASED, DONE, FAILED)},
+            "expired_leases": expired,
+            "oldest_queued_age_seconds": round(now - oldest, 1) if oldest else None,
+            "active_workers": workers,
+            "lease_seconds": self.lease_seconds,
+            "max_attempts": self.max_attempts,
+        }
+
+
+work_queue = WorkQueue()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Standalone analysis worker
+
+Pulls tasks from the durable work queue, runs the extraction and analysis
+pipeline on them and stores the results. Run any number of these alongside
+(or instead of on the same machine as) the web app:
+
+Usage:
+    python -m app.worker --threads 4
+    python -m app.worker --db /shared/queue.db --lease 120 --once
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List
+
+from .pipeline import process_resume_path
+from .token_usage import TOKEN_REQUEST_BUDGET, RequestTokenBudget
+from .work_queue import WORK_QUEUE_DB, WORK_QUEUE_LEASE_SECONDS, LeaseLostError, WorkQueue
+
+logger = logging.getLogger(__name__)
+
+WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', 1.0))
+# How often a worker deletes finished tasks past WORK_QUEUE_RETENTION_SECONDS (0 disables)
+WORKER_PURGE_INTERVAL_SECONDS = float(os.getenv('WORKER_PURGE_INTERVAL_SECONDS', 3600))
+# Token budgets of recent batches kept per worker process
+_MAX_TRACKED_BATCHES = 100
+
+
+class Worker:
+    """Runs queue tasks on a number of threads until stopped"""
+
+    def __init__(self, queue: WorkQueue, threads: int = 1, poll_seconds: float = WORKER_POLL_SECONDS,
+                 purge_interval: float = WORKER_PURGE_INTERVAL_SECONDS):
+        self.queue = queue
+        self.threads = max(1, threads)
+        self.poll_seconds = poll_seconds
+        self.purge_interval = purge_interval
+        self._next_purge = time.monotonic()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self._budgets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def token_budget(self, task) -> RequestTokenBudget:
+        """
+        Token budget of a task's batch, charged to the tenant that queued it
+
+        The batch's tasks run by this process share one budget; the request limit
+        stored with the batch applies to them as it would to a synchronous upload.
+        """
+        options = task["options"]
+        with self._lock:
+            budget = self._budgets.get(task["batch_id"])
+            if budget is None:
+                budget = RequestTokenBudget(options.get("tenant", "anonymous"),
+                                            options.get("token_budget", TOKEN_REQUEST_BUDGET))
+                self._budgets[task["batch_id"]] = budget
+                if len(self._budgets) > _MAX_TRACKED_BATCHES:
+                    self._budgets.popitem(last=False)
+            else:
+                self._budgets.move_to_end(task["batch_id"])
+            return budget
+
+    def run_task(self, task, thread_id: str):
+        """Process one leased task, heartbeating while it runs"""
+        logger.info(f"🛠️ [{thread_id}] Processing {task['filename']} (task {task['id']}, attempt {task['attempts']})")
+        heartbeat_stop = threading.Event()
+        lease_lost = threading.Event()
+
+        def heartbeat():
+            while not heartbeat_stop.wait(self.queue.lease_seconds / 3):
+                try:
+                    self.queue.heartbeat(task["id"], thread_id)
+                except LeaseLostError:
+                    logger.warning(f"⚠️ [{thread_id}] Lost lease on {task['id']}; its result will be discarded")
+                    lease_lost.set()
+                    return
+                except Exception as e:
+                    logger.warning(f"⚠️ [{thread_id}] Heartbeat failed for {task['id']}: {e}")
+
+        heartbeater = threading.Thread(target=heartbeat, name=f"heartbeat-{task['id'][:8]}", daemon=True)
+        heartbeater.start()
+
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+                f.write(task["data"])
+                temp_path = f.name
+            try:
+                result = process_resume_path(
+                    temp_path, task["filename"], task["job_description"], task["options"].get("mock", False),
+                    token_budget=self.token_budget(task)
+                )
+            except Exception as e:
+                logger.error(f"❌ [{thread_id}] Task {task['id']} failed: {e}")
+                result = {
+                    "status": "error",
+                    "message": f"Error processing file: {str(e)}",
+                    "filename": task["filename"]
+                }
+        finally:
+            heartbeat_stop.set()
+            heartbeater.join()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        if lease_lost.is_set():
+            return
+        try:
+            self.queue.complete(task["id"], thread_id, result)
+        except LeaseLostError:
+            logger.warning(f"⚠️ [{thread_id}] Task {task['id']} was redelivered before it finished; result discarded")
+            return
+        with self._lock:
+            self.processed += 1
+        logger.info(f"✅ [{thread_id}] Completed {task['filename']} - {result.get('status')}")
+
+    def purge_if_due(self):
+        """Delete expired finished tasks, at most once per purge interval across this worker's threads"""
+        if not self.purge_interval:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+        try:
+            purged = self.queue.purge_finished()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not purge finished tasks: {e}")
+            return
+        if purged:
+            logger.info(f"🧹 Purged {purged} finished task(s) from the queue")
+
+    def _loop(self, index: int, once: bool):
+        thread_id = f"{self.worker_id}/{index}"
+        while not self.stop_event.is_set():
+            self.purge_if_due()
+            try:
+                task = self.queue.lease(thread_id)
+            except Exception as e:
+                logger.error(f"❌ [{thread_id}] Could not lease a task: {e}")
+                self.stop_event.wait(self.poll_seconds)
+                continue
+            if task is None:
+                if once:
+                    return
+                self.stop_event.wait(self.poll_seconds)
+                continue
+            self.run_task(task, thread_id)
+
+    def run(self, once: bool = False):
+        """
+        Process tasks until stopped
+
+        Args:
+            once: Exit when the queue is empty instead of polling
+        """
+        logger.info(f"🚀 Worker {self.worker_id} starting {self.threads} thread(s) on {self.queue.db_path}")
+        threads: List[threading.Thread] = [
+            threading.Thread(target=self._loop, args=(i, once), name=f"queue-worker-{i}")
+            for i in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+        logger.info(f"🏁 Worker {self.worker_id} stopped after {self.processed} task(s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run resume analysis tasks from the durable work queue")
+    parser.add_argument("--db", default=WORK_QUEUE_DB, help="Path to the work queue SQLite database")
+    parser.add_argument("-t", "--threads", type=int, default=4, help="Number of tasks processed in parallel")
+    parser.add_argument("--lease", type=float, default=WORK_QUEUE_LEASE_SECONDS, help="Lease duration in seconds")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable debug logging")
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stderr)]
+    )
+
+    worker = Worker(WorkQueue(args.db, lease_seconds=args.lease), threads=args.threads)
+
+    def stop(signum, frame):
+        # In-flight tasks finish; nothing new is leased
+        logger.info("🛑 Stop requested - finishing in-flight tasks")
+        worker.stop_event.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,12 @@
 """
 Startup script for the Resume Screening Backend
 """
+import os
+
+# Debug mode runs the app under the werkzeug reloader; tell warm-up so it only
+# runs in the child process that serves requests
+os.environ.setdefault("USE_RELOADER", "true")
+
 from app.main import app
 
 if __name__ == "__main__":
@@ -16,5 +22,6 @@ if __name__ == "__main__":
     app.run(
         host="0.0.0.0",
         port=8000,
-        debug=True  # Enable debug mode for development
+        debug=True,  # Enable debug mode for development
+        use_reloader=os.environ["USE_RELOADER"].lower() == "true"
     )
@@ -0,0 +1,5 @@
+"""Shared test setup"""
+import os
+
+# Importing app.main would otherwise start the background warm-up
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
@@ -0,0 +1,96 @@
+"""Admission control: admitting, shedding and per-file latency"""
+import io
+import threading
+import time
+import zipfile
+
+import pytest
+
+from app import main
+from app.admission import AdmissionController
+
+
+def test_idle_server_admits_any_batch():
+    controller = AdmissionController(workers=2, max_wait_ms=1000)
+    ticket, retry_after = controller.try_admit(500)
+    assert ticket is not None and retry_after == 0
+    assert controller.status()["in_flight_files"] == 500
+
+
+def test_busy_server_sheds_with_retry_after():
+    controller = AdmissionController(workers=2, max_wait_ms=1000, queue_timeout_ms=0)
+    controller.observe_file(1000)
+    ticket, _ = controller.try_admit(10)
+    # 10 files on 2 workers at 1s each is a 5s wait, 4s over the limit
+    assert controller.try_admit(1) == (None, 4)
+    controller.release(ticket)
+    assert controller.try_admit(1)[0] is not None
+    assert controller.status()["shed"] == 1
+
+
+def test_waiting_batch_is_admitted_when_capacity_frees_up():
+    controller = AdmissionController(workers=1, max_wait_ms=1000, queue_timeout_ms=5000)
+    controller.observe_file(1000)
+    ticket, _ = controller.try_admit(3)
+    threading.Timer(0.1, controller.release, (ticket,)).start()
+    assert controller.try_admit(1)[0] is not None
+    assert controller.status()["admitted_after_wait"] == 1
+
+
+def test_extend_and_partial_release_keep_counts_consistent():
+    controller = AdmissionController(workers=1)
+    ticket, _ = controller.try_admit(0)
+    controller.extend(ticket, 3)
+    controller.release_files(ticket, 2)
+    assert controller.in_flight_files == 1
+    controller.release(ticket)
+    assert controller.in_flight_files == 0
+    # Late callbacks of a released batch change nothing
+    controller.release_files(ticket, 1)
+    controller.extend(ticket, 1)
+    assert controller.in_flight_files == 0
+
+
+def test_per_file_latency_is_a_moving_average():
+    controller = AdmissionController(workers=1)
+    controller.observe_file(1000)
+    assert controller.per_file_ms == 1000
+    controller.observe_file(2000)
+    assert controller.per_file_ms == pytest.approx(1200)
+
+
+def test_archive_members_stop_counting_once_finished(monkeypatch):
+    in_flight_seen = []
+
+    def process_single_file(file, job_description, mock=False, cancel_event=None, token_budget=None, mode=None):
+        in_flight_seen.append(main.admission.in_flight_files)
+        time.sleep(0.01)
+        return {"status": "success", "filename": file.filename, "candidate_name": file.filename, "match_score": 70}
+
+    monkeypatch.setattr(main, "process_single_file", process_single_file)
+    monkeypatch.setattr(main, "ARCHIVE_MAX_IN_FLIGHT", 1)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        for i in range(6):
+            z.writestr(f"{i}.pdf", b"%PDF-1.4")
+    archive.seek(0)
+
+    before = main.admission.in_flight_files
+    response = main.app.test_client().post("/api/upload-archive", data={
+        "archive": (archive, "resumes.zip"), "job_description": "Backend role", "mock": "true",
+    })
+    assert response.status_code == 200
+    assert len(in_flight_seen) == 6
+    # One member runs at a time, so finished members must not pile up in the count
+    assert max(in_flight_seen) - before <= 2
+    assert main.admission.in_flight_files == before
+
+
+def test_only_work_that_ran_feeds_the_latency_estimate(monkeypatch):
+    observed = []
+    monkeypatch.setattr(main.admission, "observe_file", observed.append)
+    assert main.run_observed(lambda: {"status": "success"}) == {"status": "success"}
+    main.run_observed(lambda: {"status": "pending"})
+    main.run_observed(lambda: {"cached": True})
+    main.run_observed(lambda: None)
+    assert len(observed) == 1
@@ -0,0 +1,111 @@
+"""Archive member iteration and limits"""
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from app import archive_ingest
+from app.archive_ingest import ArchiveLimitError, is_archive_filename, iter_archive_members
+
+PDF = b"%PDF-1.4\n" + b"resume " * 50
+
+
+def _zip(members, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar(members, mode="w:gz"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def _members(data, filename):
+    return [
+        {"filename": m["filename"], "error": m.get("error"), "data": m["file"].read() if "file" in m else None}
+        for m in iter_archive_members(io.BytesIO(data), filename)
+    ]
+
+
+@pytest.mark.parametrize("filename,data", [
+    ("resumes.zip", _zip({"a.pdf": PDF, "dir/b.pdf": PDF})),
+    ("resumes.tar.gz", _tar({"a.pdf": PDF, "dir/b.pdf": PDF})),
+])
+def test_pdf_members_are_yielded_with_their_base_name(filename, data):
+    assert _members(data, filename) == [
+        {"filename": "a.pdf", "error": None, "data": PDF},
+        {"filename": "b.pdf", "error": None, "data": PDF},
+    ]
+
+
+def test_metadata_is_ignored_and_non_pdfs_are_reported():
+    data = _zip({"__MACOSX/._a.pdf": b"x", ".DS_Store": b"x", "notes.txt": b"x", "a.pdf": PDF})
+    assert [(m["filename"], m["error"]) for m in _members(data, "r.zip")] == [
+        ("notes.txt", "Skipped non-PDF archive member"),
+        ("a.pdf", None),
+    ]
+
+
+def test_oversized_member_is_a_per_file_error(monkeypatch):
+    monkeypatch.setattr(archive_ingest, "ARCHIVE_MAX_MEMBER_BYTES", 100)
+    for filename, data in (("r.zip", _zip({"big.pdf": PDF, "ok.pdf": b"%PDF"})),
+                           ("r.tar", _tar({"big.pdf": PDF, "ok.pdf": b"%PDF"}, mode="w"))):
+        members = _members(data, filename)
+        assert members[0]["error"] == "Member exceeds 100 bytes"
+        assert members[1] == {"filename": "ok.pdf", "error": None, "data": b"%PDF"}
+
+
+def test_highly_compressed_member_is_rejected(monkeypatch):
+    monkeypatch.setattr(archive_ingest, "ARCHIVE_MAX_COMPRESSION_RATIO", 10)
+    members = _members(_zip({"bomb.pdf": b"\0" * 100000}), "r.zip")
+    assert members == [{"filename": "bomb.pdf", "error": "Member compression ratio too high", "data": None}]
+
+
+def test_too_many_members_rejects_the_archive(monkeypatch):
+    monkeypatch.setattr(archive_ingest, "ARCHIVE_MAX_MEMBERS", 2)
+    with pytest.raises(ArchiveLimitError):
+        _members(_zip({f"{i}.pdf": PDF for i in range(3)}), "r.zip")
+
+
+def test_total_size_limit_rejects_the_archive(monkeypatch):
+    monkeypatch.setattr(archive_ingest, "ARCHIVE_MAX_TOTAL_BYTES", len(PDF) + 1)
+    with pytest.raises(ArchiveLimitError):
+        _members(_tar({"a.pdf": PDF, "b.pdf": PDF}), "r.tgz")
+
+
+def test_encrypted_member_is_a_per_file_error():
+    data = bytearray(_zip({"locked.pdf": PDF, "open.pdf": PDF}, compression=zipfile.ZIP_STORED))
+    # zipfile cannot write encrypted members, so set the encryption flag of the first one by hand
+    data[data.index(b"PK\x03\x04") + 6] |= 0x1
+    data[data.index(b"PK\x01\x02") + 8] |= 0x1
+    members = _members(bytes(data), "r.zip")
+    assert members[0] == {"filename": "locked.pdf", "error": "Member is encrypted", "data": None}
+    assert members[1]["data"] == PDF
+
+
+def test_unsupported_compression_is_a_per_file_error():
+    data = bytearray(_zip({"odd.pdf": PDF, "ok.pdf": PDF}, compression=zipfile.ZIP_STORED))
+    # Mark the first member as Deflate64 (method 9) in both its local and central headers
+    data[data.index(b"PK\x03\x04") + 8] = 9
+    data[data.index(b"PK\x01\x02") + 10] = 9
+    members = _members(bytes(data), "r.zip")
+    assert members[0]["error"] == "Member uses an unsupported compression method"
+    assert members[1]["data"] == PDF
+
+
+def test_corrupt_or_unknown_archives_raise_value_error():
+    with pytest.raises(ValueError):
+        _members(b"not a zip", "r.zip")
+    with pytest.raises(ValueError):
+        _members(_zip({"a.pdf": PDF}), "r.rar")
+    assert is_archive_filename("Resumes.TAR.GZ")
+    assert not is_archive_filename("resume.pdf")
@@ -0,0 +1,56 @@
+"""Response cache used by mock mode"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import cache_store
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = tmp_path / "resume_responses.json"
+    monkeypatch.setattr(cache_store, "CACHE_FILE", str(path))
+    return path
+
+
+def _result(i, score=80):
+    return {"candidate_name": f"Candidate {i}", "filename": f"{i}.pdf", "match_score": score,
+            "recommendation": "Strong Match", "summary": f"Summary {i}"}
+
+
+def test_empty_cache_is_a_miss(cache_file):
+    assert cache_store.load_cached_responses() == []
+    assert cache_store.get_random_cached_response("new.pdf") is None
+
+
+def test_cached_response_is_a_hit(cache_file):
+    cache_store.save_response_to_cache(_result(1, score=80))
+    response = cache_store.get_random_cached_response("new.pdf")
+    assert response["filename"] == "new.pdf"
+    assert response["candidate_name"] == "Mock-Candidate 1"
+    assert 75 <= response["match_score"] <= 85
+    # The stored entry is not modified by serving it
+    assert cache_store.load_cached_responses()[0]["filename"] == "1.pdf"
+
+
+def test_cache_keeps_the_latest_100(cache_file):
+    for i in range(105):
+        cache_store.save_response_to_cache(_result(i))
+    cached = cache_store.load_cached_responses()
+    assert len(cached) == 100
+    assert cached[0]["candidate_name"] == "Candidate 5"
+    assert cached[-1]["candidate_name"] == "Candidate 104"
+
+
+def test_corrupt_cache_file_reads_as_empty(cache_file):
+    cache_file.write_text("{not json", encoding="utf-8")
+    assert cache_store.load_cached_responses() == []
+
+
+def test_concurrent_saves_keep_every_entry(cache_file):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(cache_store.save_response_to_cache, [_result(i) for i in range(40)]))
+    cached = cache_store.load_cached_responses()
+    assert sorted(r["candidate_name"] for r in cached) == sorted(f"Candidate {i}" for i in range(40))
+    # Writes go through a temporary file that is renamed into place
+    assert not list(cache_file.parent.glob("*.tmp"))
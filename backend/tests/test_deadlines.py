@@ -0,0 +1,92 @@
+"""Deadline and top-K handling of concurrent batches"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app import main
+from app.pipeline import pending_result
+
+
+@pytest.fixture
+def fake_processing(monkeypatch):
+    """Files finish after their "delay" with their "score"; cancelled files stop waiting"""
+    cancel_events = []
+
+    def process_single_file(file, job_description, mock=False, cancel_event=None, token_budget=None, mode=None):
+        cancel_events.append(cancel_event)
+        if cancel_event.wait(file.delay):
+            return pending_result(file.filename, "Cancelled before analysis")
+        return {"status": "success", "filename": file.filename, "match_score": file.score}
+
+    monkeypatch.setattr(main, "process_single_file", process_single_file)
+    return cancel_events
+
+
+def _file(name, score, delay):
+    return SimpleNamespace(filename=name, score=score, delay=delay)
+
+
+def test_results_keep_submission_order(fake_processing):
+    files = [_file("slow.pdf", 50, 0.2), _file("fast.pdf", 60, 0), _file("mid.pdf", 70, 0.1)]
+    results = main.process_files_concurrently(files, "jd")
+    assert [r["filename"] for r in results] == ["slow.pdf", "fast.pdf", "mid.pdf"]
+    assert all(r["status"] == "success" for r in results)
+
+
+def test_deadline_returns_unfinished_files_as_pending(fake_processing):
+    files = [_file("fast.pdf", 60, 0), _file("stuck.pdf", 90, 10)]
+    start = time.monotonic()
+    results = main.process_files_concurrently(files, "jd", deadline_ms=200)
+    assert time.monotonic() - start < 5
+    assert results[0]["status"] == "success"
+    assert results[1] == pending_result("stuck.pdf", "Not completed before the deadline")
+    # Work still running is told to stop
+    assert all(event.is_set() for event in fake_processing)
+
+
+def test_top_k_stops_once_settled(fake_processing):
+    files = [_file("a.pdf", 90, 0), _file("b.pdf", 95, 0), _file("c.pdf", 99, 10)]
+    results = main.process_files_concurrently(files, "jd", top_k=2)
+    assert [r["status"] for r in results] == ["success", "success", "pending"]
+    assert results[2]["message"] == "Cancelled after the top 2 ranking was settled"
+
+
+def test_top_k_waits_while_scores_are_below_the_settle_score(fake_processing):
+    files = [_file("a.pdf", 40, 0), _file("b.pdf", 50, 0), _file("c.pdf", 99, 0.2)]
+    results = main.process_files_concurrently(files, "jd", top_k=2)
+    assert [r["status"] for r in results] == ["success"] * 3
+
+
+def test_top_k_settled():
+    results = [{"status": "success", "match_score": s} for s in (90, 86, 70)] + [{"status": "error"}]
+    assert main._top_k_settled(results, 2, settle_score=85)
+    assert not main._top_k_settled(results, 3, settle_score=85)
+    assert not main._top_k_settled(results, 5, settle_score=0)
+    assert not main._top_k_settled(results, 2, settle_score=100)
+
+
+def test_details_not_ready_by_the_deadline_stay_pending(monkeypatch):
+    release = threading.Event()
+
+    def generate_details(detail_id, token_budget=None):
+        if detail_id == "slow":
+            release.wait(5)
+        return {field: f"{field} of {detail_id}" for field in main.DETAIL_FIELDS}
+
+    monkeypatch.setattr(main, "generate_details", generate_details)
+    results = [
+        {"status": "success", "filename": f"{detail_id}.pdf", "match_score": score,
+         "detail_id": detail_id, "details_pending": True}
+        for detail_id, score in (("fast", 90), ("slow", 80), ("low", 10))
+    ]
+    try:
+        main.attach_top_details(results, 2, "tenant", deadline=time.monotonic() + 0.3)
+    finally:
+        release.set()
+    fast, slow, low = results
+    assert fast["details_pending"] is False and fast["summary"] == "summary of fast"
+    assert slow["details_pending"] is True and "summary" not in slow
+    # Only the top detail_top_k results get details
+    assert low["details_pending"] is True
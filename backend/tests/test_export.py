@@ -0,0 +1,71 @@
+"""Streaming CSV and XLSX exports"""
+import csv
+import io
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from app.export import EXPORT_COLUMNS, _column_letter, iter_csv, iter_xlsx, parse_export_options, sort_results
+
+_SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+RESULTS = [
+    {"filename": "a.pdf", "candidate_name": "Ann", "match_score": 70, "strengths": ["Python", "SQL"]},
+    {"filename": "b.pdf", "candidate_name": "=HYPERLINK(\"x\")", "match_score": 90},
+    {"filename": "c.pdf", "status": "error", "message": "Unreadable \x01 file"},
+]
+
+
+def test_options_default_to_csv_with_every_column():
+    assert parse_export_options({}) == {"format": "csv", "columns": EXPORT_COLUMNS, "sort": None}
+    options = parse_export_options({"format": "XLSX", "columns": "filename, match_score,filename",
+                                    "sort": "match_score", "order": "asc"})
+    assert options == {"format": "xlsx", "columns": ["filename", "match_score"], "sort": "asc"}
+
+
+@pytest.mark.parametrize("args", [{"format": "pdf"}, {"sort": "candidate_name"}, {"order": "sideways"}])
+def test_unsupported_options_are_rejected(args):
+    with pytest.raises(ValueError):
+        parse_export_options(args)
+
+
+def test_sort_keeps_results_without_a_score_last():
+    assert [r["filename"] for r in sort_results(RESULTS, "desc")] == ["b.pdf", "a.pdf", "c.pdf"]
+    assert [r["filename"] for r in sort_results(RESULTS, "asc")] == ["a.pdf", "b.pdf", "c.pdf"]
+    assert sort_results(RESULTS, None) is RESULTS
+
+
+def test_csv_starts_with_a_bom_and_quotes_formulas():
+    columns = ["filename", "candidate_name", "strengths"]
+    data = b"".join(iter_csv(RESULTS, columns, chunk_bytes=16))
+    assert data.startswith("\ufeff".encode("utf-8"))
+
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    assert rows[0] == columns
+    assert rows[1] == ["a.pdf", "Ann", "Python; SQL"]
+    assert rows[2][1] == "'=HYPERLINK(\"x\")"
+    assert len(rows) == 4
+
+
+def test_xlsx_is_a_workbook_with_one_row_per_result():
+    columns = ["filename", "match_score", "message"]
+    chunks = list(iter_xlsx(RESULTS, columns, chunk_bytes=1))
+    assert len(chunks) > 1
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    rows = sheet.findall("s:sheetData/s:row", _SHEET_NS)
+    assert len(rows) == 1 + len(RESULTS)
+
+    cells = {c.get("r"): c for row in rows for c in row.findall("s:c", _SHEET_NS)}
+    assert cells["A1"].find("s:is/s:t", _SHEET_NS).text == "filename"
+    assert cells["B3"].find("s:v", _SHEET_NS).text == "90"
+    # Characters XML cannot hold are dropped
+    assert cells["C4"].find("s:is/s:t", _SHEET_NS).text == "Unreadable  file"
+    assert "B4" not in cells
+
+
+def test_column_letters():
+    assert [_column_letter(i) for i in (0, 25, 26, 27, 701, 702)] == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
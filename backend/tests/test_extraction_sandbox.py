@@ -0,0 +1,82 @@
+"""Sandboxed extraction: worker reuse, limits and the in-process fallback"""
+import os
+
+import pytest
+
+from app import extraction_sandbox as sandbox_module
+from app.extraction_sandbox import ExtractionSandbox, extract_pdf
+from app.pdf_extractor import EXTRACTION_TIMEOUT, RESOURCE_LIMIT
+from app.warmup import _tiny_pdf
+
+pytestmark = pytest.mark.skipif(os.name != 'posix', reason="the sandbox needs POSIX pipes and resource limits")
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(_tiny_pdf("Jane Doe Python developer"))
+    return str(path)
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = ExtractionSandbox(workers=1, timeout_seconds=30, cpu_seconds=15, memory_mb=1024, max_tasks=10)
+    yield sandbox
+    sandbox.shutdown()
+
+
+def test_worker_extracts_and_is_reused(sandbox, pdf_path, tmp_path):
+    assert "Jane Doe" in sandbox.run(pdf_path)["text"]
+    invalid = tmp_path / "notes.pdf"
+    invalid.write_bytes(b"not a pdf")
+    assert sandbox.run(str(invalid))["validation_error"]
+    assert sandbox.status()["started"] == 1
+    assert sandbox.status()["alive"] == 1
+
+
+def test_workers_are_recycled_after_max_tasks(pdf_path):
+    sandbox = ExtractionSandbox(workers=1, timeout_seconds=30, max_tasks=1)
+    try:
+        sandbox.run(pdf_path)
+        sandbox.run(pdf_path)
+        assert sandbox.status()["started"] == 2
+        assert sandbox.status()["recycled"] == 2
+    finally:
+        sandbox.shutdown()
+
+
+def test_slow_extraction_times_out_and_kills_the_worker(pdf_path):
+    # No worker can start and answer this quickly
+    sandbox = ExtractionSandbox(workers=1, timeout_seconds=0.001)
+    try:
+        result = sandbox.run(pdf_path)
+        assert result["error_code"] == EXTRACTION_TIMEOUT
+        assert result["text"] == ""
+        assert sandbox.status()["timeouts"] == 1
+        assert sandbox.status()["alive"] == 0
+    finally:
+        sandbox.shutdown()
+
+
+def test_worker_dying_mid_file_fails_only_that_file(sandbox, pdf_path, monkeypatch):
+    # What the parent sees when a worker is killed for CPU time or memory
+    def request(worker, file_path, timeout):
+        worker.process.kill()
+        raise EOFError("Extraction worker exited")
+
+    real_request = sandbox_module._SandboxWorker.request
+    monkeypatch.setattr(sandbox_module._SandboxWorker, "request", request)
+    result = sandbox.run(pdf_path)
+    assert result["error_code"] == RESOURCE_LIMIT
+    assert sandbox.status()["crashes"] == 1
+
+    monkeypatch.setattr(sandbox_module._SandboxWorker, "request", real_request)
+    assert "Jane Doe" in sandbox.run(pdf_path)["text"]
+    assert sandbox.status()["started"] == 2
+
+
+def test_extract_pdf_runs_in_process_when_the_sandbox_is_off(pdf_path, monkeypatch):
+    monkeypatch.setattr(sandbox_module, "EXTRACT_SANDBOX", False)
+    monkeypatch.setattr(sandbox_module.extraction_sandbox, "run",
+                        lambda path: pytest.fail("extraction went to the sandbox"))
+    assert "Jane Doe" in extract_pdf(pdf_path)["text"]
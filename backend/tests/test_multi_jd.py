@@ -0,0 +1,29 @@
+"""Job description parsing of multi-JD requests"""
+import json
+
+from werkzeug.datastructures import MultiDict
+
+from app.multi_jd import parse_job_descriptions
+
+
+def test_repeated_fields_with_titles():
+    form = MultiDict([("job_descriptions", "Backend engineer\nPython"), ("job_descriptions", "  "),
+                      ("job_descriptions", "Data scientist"), ("job_titles", "Backend")])
+    assert parse_job_descriptions(form) == [
+        {"title": "Backend", "job_description": "Backend engineer\nPython"},
+        {"title": "Data scientist", "job_description": "Data scientist"},
+    ]
+
+
+def test_single_json_field():
+    roles = [{"title": "SRE", "job_description": "Run production"}, "Frontend developer"]
+    form = MultiDict([("job_descriptions", json.dumps(roles))])
+    assert parse_job_descriptions(form) == [
+        {"title": "SRE", "job_description": "Run production"},
+        {"title": "Frontend developer", "job_description": "Frontend developer"},
+    ]
+
+
+def test_text_that_only_looks_like_json_is_kept():
+    form = MultiDict([("job_descriptions", "[Remote] Backend engineer")])
+    assert parse_job_descriptions(form)[0]["job_description"] == "[Remote] Backend engineer"
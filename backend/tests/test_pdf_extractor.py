@@ -0,0 +1,128 @@
+"""Raw content-stream extraction compared with PyPDF2, and backend selection"""
+import re
+
+import PyPDF2
+import pytest
+
+from app.pdf_extractor import RawStreamExtractor, _probe_reader, extract_text_from_pdf, select_extractor
+
+WIN_ANSI = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+MAC_ROMAN = b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Roman /Encoding /MacRomanEncoding >>"
+TO_UNICODE = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /ToUnicode 99 0 R >>"
+DIFFERENCES = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Differences [65 /B] >> >>"
+EMBEDDED_NO_ENCODING = b"<< /Type /Font /Subtype /TrueType /BaseFont /Custom /FontDescriptor << >> >>"
+
+RESUME_PAGE = (
+    b"BT /F1 12 Tf 1 0 0 1 72 720 Tm (Jane Doe) Tj 1 0 0 1 72 700 Tm (Senior) Tj "
+    b"1 0 0 1 120 700 Tm (Engineer) Tj ET\n"
+    b"BT /F1 12 Tf 72 680 Td (Skills:) Tj 50 0 Td (Python) Tj "
+    b"0 -14 Td (\\225 Go \\226 Rust \\222s) Tj T* [(Dis) -20 (tributed) -300 (systems)] TJ ET"
+)
+
+
+def make_pdf(tmp_path, pages, fonts):
+    """
+    Write a PDF and return its path
+
+    Args:
+        pages: Content stream of each page
+        fonts: Font resources shared by every page, or a list with one dict per page
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    kids = []
+    for page, content in enumerate(pages):
+        font_refs = []
+        for name, font in (fonts[page] if isinstance(fonts, list) else fonts).items():
+            objects.append(font)
+            font_refs.append(b"/%s %d 0 R" % (name.encode(), len(objects)))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << %s >> >> >>" % (len(objects), b" ".join(font_refs)))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % (i + 1) + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(out)
+    return str(path)
+
+
+def _squash(text):
+    return re.sub(r"\s+", "", text)
+
+
+def test_raw_matches_pypdf2_text(tmp_path):
+    path = make_pdf(tmp_path, [RESUME_PAGE, b"BT /F1 12 Tf 72 720 Td (Page two) Tj ET"], {"F1": WIN_ANSI})
+    raw = extract_text_from_pdf(path, backend="raw")
+    reference = extract_text_from_pdf(path, backend="pypdf2")
+    assert raw["error"] is None
+    assert raw["pages"] == reference["pages"] == 2
+    # Same characters; the raw backend only differs in where it puts whitespace
+    assert _squash(raw["text"]) == _squash(reference["text"])
+
+
+def test_raw_breaks_lines_and_words_on_text_moves(tmp_path):
+    path = make_pdf(tmp_path, [RESUME_PAGE], {"F1": WIN_ANSI})
+    lines = extract_text_from_pdf(path, backend="raw")["text"].splitlines()
+    assert lines[1:] == [
+        "Jane Doe",
+        "Senior Engineer",
+        "Skills: Python",
+        "• Go – Rust ’s",
+        "Distributed systems",
+    ]
+
+
+def test_raw_decodes_mac_roman(tmp_path):
+    path = make_pdf(tmp_path, [b"BT /F2 12 Tf 72 720 Td (Caf\\216 \\245 na\\225ve) Tj ET"], {"F2": MAC_ROMAN})
+    raw = extract_text_from_pdf(path, backend="raw")
+    assert raw["text"].splitlines()[1] == "Café • naïve"
+    assert raw["text"] == extract_text_from_pdf(path, backend="pypdf2")["text"]
+
+
+def test_auto_selects_raw_for_simple_fonts(tmp_path):
+    path = make_pdf(tmp_path, [RESUME_PAGE], {"F1": WIN_ANSI})
+    assert extract_text_from_pdf(path)["backend"] == "raw"
+
+
+@pytest.mark.parametrize("font", [TO_UNICODE, DIFFERENCES, EMBEDDED_NO_ENCODING])
+def test_fonts_the_raw_backend_cannot_decode_go_to_pypdf2(tmp_path, font):
+    path = make_pdf(tmp_path, [b"BT /F1 12 Tf 72 720 Td (Hello) Tj ET"], {"F1": font})
+    with open(path, "rb") as f:
+        probe = _probe_reader(PyPDF2.PdfReader(f))
+    assert probe["has_text_operators"]
+    assert not probe["simple_fonts"]
+    assert select_extractor(probe) == "pypdf2"
+
+
+def test_probe_checks_every_page(tmp_path):
+    pages = [b"BT /F1 12 Tf 72 720 Td (One) Tj ET", b"BT /F2 12 Tf 72 720 Td (ABC) Tj ET"]
+    path = make_pdf(tmp_path, pages, [{"F1": WIN_ANSI}, {"F2": DIFFERENCES}])
+    with open(path, "rb") as f:
+        assert not _probe_reader(PyPDF2.PdfReader(f))["simple_fonts"]
+    with open(path, "rb") as f:
+        # Only the first page is read, so its fonts alone decide
+        assert _probe_reader(PyPDF2.PdfReader(f), max_pages=1)["simple_fonts"]
+    assert extract_text_from_pdf(path)["backend"] == "pypdf2"
+
+
+def test_backend_failing_on_every_page_falls_back_to_pypdf2(tmp_path, monkeypatch):
+    def broken_page_text(self, page):
+        raise KeyError("/Font")
+
+    monkeypatch.setattr(RawStreamExtractor, "_page_text", broken_page_text)
+    path = make_pdf(tmp_path, [RESUME_PAGE], {"F1": WIN_ANSI})
+    result = extract_text_from_pdf(path, backend="raw")
+    assert result["backend"] == "pypdf2"
+    assert "Error extracting text" not in result["text"]
+    assert "Jane Doe" in result["text"]
@@ -0,0 +1,50 @@
+"""What analyze_resume records in the server's shared state"""
+import pytest
+
+from app import pipeline
+
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append(args)
+
+
+@pytest.fixture
+def recorders(monkeypatch):
+    def fake_analysis(job_description, resume_text, progress=None, mode=None):
+        return {"candidate_name": "Jane Doe", "match_score": 81, "recommendation": "Strong Match",
+                "summary": "Fits", "processing_time_ms": 12.0, "token_usage": None}
+
+    history, cache, analyses = _Recorder(), _Recorder(), _Recorder()
+    monkeypatch.setattr(pipeline, "analyze_resume_job_match_qwen", fake_analysis)
+    monkeypatch.setattr(pipeline.result_history, "record", history)
+    monkeypatch.setattr(pipeline, "save_response_to_cache", cache)
+    monkeypatch.setattr(pipeline.analytics, "record_analysis", analyses)
+    return {"history": history, "cache": cache, "analytics": analyses}
+
+
+def test_results_are_recorded_by_default(recorders):
+    result = pipeline.analyze_resume("Python engineer", "a.pdf", "Backend role")
+    assert result["match_score"] == 81
+    assert {name: len(r.calls) for name, r in recorders.items()} == {"history": 1, "cache": 1, "analytics": 1}
+
+
+def test_offline_runs_can_skip_recording(recorders):
+    result = pipeline.analyze_resume("Python engineer", "a.pdf", "Backend role", record=False)
+    assert result["match_score"] == 81
+    assert {name: len(r.calls) for name, r in recorders.items()} == {"history": 0, "cache": 0, "analytics": 0}
+
+
+def test_coalesced_callers_are_only_counted(recorders, monkeypatch):
+    counters = []
+    monkeypatch.setattr(pipeline.analytics, "increment", lambda name, amount=1: counters.append(name))
+    monkeypatch.setattr(pipeline.inflight_analyses, "do",
+                        lambda key, fn, *args: (fn(*args), True))
+    result = pipeline.analyze_resume("Python engineer", "a.pdf", "Backend role")
+    assert result["match_score"] == 81
+    assert result["token_usage"] is None
+    assert {name: len(r.calls) for name, r in recorders.items()} == {"history": 0, "cache": 0, "analytics": 0}
+    assert counters == ["coalesced_analyses"]
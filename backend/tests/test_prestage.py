@@ -0,0 +1,70 @@
+"""Pre-staged uploads: handle reuse, expiry and the prestage endpoint"""
+import io
+
+import pytest
+
+from app import main
+from app import prestage
+from app.prestage import STAGED_FILE_EXPIRED, PrestageStore
+
+
+@pytest.fixture(autouse=True)
+def fake_extraction(monkeypatch):
+    def extract_resume(path, filename):
+        with open(path, 'rb') as f:
+            return {"status": "success", "filename": filename, "text": f.read().decode(), "extraction": {"pages": 1}}
+
+    monkeypatch.setattr(prestage, "extract_resume", extract_resume)
+
+
+def test_staged_file_extracts_in_the_background():
+    store = PrestageStore(ttl_seconds=60, max_handles=10, workers=1)
+    staged = store.stage("a.pdf", b"resume a")
+    assert staged.result(timeout=5)["text"] == "resume a"
+    assert staged.describe()["status"] == "success"
+    assert staged.size == len(b"resume a")
+    assert store.get(staged.handle) is staged
+
+
+def test_same_content_and_name_reuse_the_handle():
+    store = PrestageStore(ttl_seconds=60, max_handles=10, workers=1)
+    first = store.stage("a.pdf", b"resume a")
+    assert store.stage("a.pdf", b"resume a") is first
+    assert store.stage("b.pdf", b"resume a") is not first
+    assert store.stats()["reused"] == 1
+
+
+def test_unknown_and_expired_handles_resolve_to_errors():
+    store = PrestageStore(ttl_seconds=-1, max_handles=10, workers=1)
+    staged = store.stage("a.pdf", b"resume a")
+    staged_files, missing = store.resolve([staged.handle, "unknown"])
+    assert staged_files == []
+    assert [m["error_code"] for m in missing] == [STAGED_FILE_EXPIRED, STAGED_FILE_EXPIRED]
+    assert store.stats()["expired"] == 1
+
+
+def test_full_store_evicts_the_handle_closest_to_expiry():
+    store = PrestageStore(ttl_seconds=60, max_handles=2, workers=1)
+    oldest = store.stage("a.pdf", b"resume a")
+    store.stage("b.pdf", b"resume b")
+    store.stage("c.pdf", b"resume c")
+    assert store.get(oldest.handle) is None
+    assert store.stats()["handles"] == 2
+
+
+def test_prestage_endpoint_returns_the_name_each_file_was_sent_under(monkeypatch):
+    monkeypatch.setattr(main, "prestage_store", PrestageStore(ttl_seconds=60, max_handles=10, workers=1))
+    response = main.app.test_client().post("/api/prestage", data={
+        "file": [
+            (io.BytesIO(b"notes"), "notes.txt", "text/plain"),
+            (io.BytesIO(b"resume a"), "My Resume.pdf", "application/pdf"),
+        ],
+    }, content_type="multipart/form-data")
+
+    assert response.status_code == 202
+    body = response.get_json()
+    # The rejected file is left out, so the client cannot match handles by position
+    assert [(f["upload_name"], f["filename"], f["size"]) for f in body["files"]] == [
+        ("My Resume.pdf", "My_Resume.pdf", len(b"resume a"))
+    ]
+    assert body["failed_results"][0]["filename"] == "notes.txt"
@@ -0,0 +1,35 @@
+"""Profiling switches and the admin profile endpoints"""
+import pytest
+
+from app import main
+
+
+@pytest.fixture
+def client():
+    return main.app.test_client()
+
+
+def test_admin_endpoints_and_header_are_off_without_a_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/api/admin/profiles").status_code == 404
+    response = client.get("/api/admission-status", headers={"X-Profile": "cprofile"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert "X-Profile-Id" not in client.get("/api/admission-status?profile=1").headers
+
+
+def test_profiling_needs_the_admin_token(client, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    response = client.get("/api/admission-status", headers={"X-Profile": "cprofile"})
+    assert "X-Profile-Id" not in response.headers
+
+    admin = {"X-Admin-Token": "s3cret"}
+    response = client.get("/api/admission-status", headers=dict(admin, **{"X-Profile": "cprofile"}))
+    profile_id = response.headers["X-Profile-Id"]
+    listed = client.get("/api/admin/profiles", headers=admin).get_json()["profiles"]
+    assert profile_id in [p["id"] for p in listed]
+    download = client.get(f"/api/admin/profiles/{profile_id}?format=text", headers=admin)
+    assert download.status_code == 200
+    assert client.get(f"/api/admin/profiles/{profile_id}?format=text").status_code == 403
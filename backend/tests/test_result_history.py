@@ -0,0 +1,81 @@
+"""Result history keyset pagination"""
+import itertools
+
+import pytest
+
+from app.result_history import InvalidQueryError, ResultHistory, parse_history_query
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ResultHistory(str(tmp_path / "results.db"), seed_from_cache=False)
+    recommendations = itertools.cycle(["Strong Match", "Good Match", "Weak Match"])
+    for i in range(53):
+        # Few distinct scores, so pages break inside runs of equal sort values
+        history.record({"filename": f"{i}.pdf", "candidate_name": f"C{i}", "match_score": (i * 7) % 5 * 20,
+                        "recommendation": next(recommendations)}, ("a" if i % 2 else "b") * 16)
+    return history
+
+
+def _all_pages(history, args):
+    query = parse_history_query(args)
+    pages, cursor = [], None
+    while True:
+        page = history.query(query["filters"], query["sort"], query["order"], query["limit"], cursor)
+        pages.append(page["results"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def _expected(history, args):
+    query = parse_history_query(args)
+    return [r["history_id"] for r in history.iter_results(query["filters"], query["sort"], query["order"])]
+
+
+@pytest.mark.parametrize("sort", ["time", "score"])
+@pytest.mark.parametrize("order", ["desc", "asc"])
+def test_pages_round_trip_to_the_full_ordering(history, sort, order):
+    args = {"sort": sort, "order": order, "limit": "7"}
+    pages = _all_pages(history, args)
+    ids = [r["history_id"] for page in pages for r in page]
+    assert ids == _expected(history, args)
+    assert len(ids) == len(set(ids)) == 53
+    assert all(len(page) == 7 for page in pages[:-1])
+    # Independent of the query: the key the pages were cut on is strictly monotonic
+    field = "recorded_at" if sort == "time" else "match_score"
+    keys = [(r[field], r["history_id"]) for page in pages for r in page]
+    assert keys == sorted(keys, reverse=order == "desc")
+
+
+def test_pagination_with_filters(history):
+    args = {"sort": "score", "min_score": "40", "recommendation": "Strong Match,Weak Match",
+            "jd_hash": "a" * 8, "limit": "4"}
+    ids = [r["history_id"] for page in _all_pages(history, args) for r in page]
+    assert ids == _expected(history, args)
+    results = list(history.iter_results(parse_history_query(args)["filters"]))
+    assert results
+    assert all(r["match_score"] >= 40 and r["recommendation"] != "Good Match" for r in results)
+    assert all(r["job_description_hash"] == "a" * 16 for r in results)
+
+
+def test_exact_page_boundary_has_no_empty_last_page(history):
+    pages = _all_pages(history, {"limit": "53"})
+    assert len(pages) == 1
+
+
+def test_cursor_is_tied_to_its_query(history):
+    query = parse_history_query({"sort": "score", "limit": "5"})
+    cursor = history.query(query["filters"], "score", "desc", 5)["next_cursor"]
+    with pytest.raises(InvalidQueryError):
+        history.query(query["filters"], "score", "asc", 5, cursor)
+    with pytest.raises(InvalidQueryError):
+        history.query({"min_score": 10.0}, "score", "desc", 5, cursor)
+    with pytest.raises(InvalidQueryError):
+        history.query(query["filters"], "score", "desc", 5, "not-a-cursor")
+
+
+def test_invalid_arguments():
+    for args in ({"sort": "name"}, {"order": "up"}, {"limit": "x"}, {"jd_hash": "abc"}, {"min_score": "high"}):
+        with pytest.raises(InvalidQueryError):
+            parse_history_query(args)
@@ -0,0 +1,84 @@
+"""Weighted fair queuing and priority classes of the shared scheduler"""
+import threading
+
+import pytest
+
+from app.scheduler import BULK, INTERACTIVE, FairScheduler
+
+
+@pytest.fixture
+def blocked_scheduler():
+    """A one-worker scheduler whose worker is held busy until release() is called"""
+    scheduler = FairScheduler(max_workers=1, tenant_weights={"heavy": 2.0}, interactive_burst=2)
+    gate, started = threading.Event(), threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait(5)
+
+    scheduler.submit(blocker, tenant="blocker")
+    assert started.wait(5)
+    scheduler.release = gate.set
+    yield scheduler
+    gate.set()
+    scheduler.shutdown()
+
+
+def _run_order(scheduler, submissions):
+    """Queue (tenant, priority) tasks behind the blocker and return the order they ran in"""
+    order, lock = [], threading.Lock()
+
+    def record(label):
+        with lock:
+            order.append(label)
+
+    futures = [
+        scheduler.submit(record, f"{tenant}{i}", tenant=tenant, priority=priority)
+        for i, (tenant, priority) in enumerate(submissions)
+    ]
+    scheduler.release()
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_equal_tenants_alternate(blocked_scheduler):
+    # Tenant a queues all of its work first, yet b is not starved behind it
+    submissions = [("a", BULK)] * 4 + [("b", BULK)] * 4
+    order = _run_order(blocked_scheduler, submissions)
+    assert [label[0] for label in order] == ["a", "b"] * 4
+
+
+def test_share_follows_weight(blocked_scheduler):
+    submissions = [("heavy", BULK)] * 6 + [("light", BULK)] * 6
+    order = _run_order(blocked_scheduler, submissions)
+    first_six = [label.rstrip("0123456789") for label in order[:6]]
+    assert first_six.count("heavy") == 4
+    assert first_six.count("light") == 2
+
+
+def test_interactive_ahead_of_bulk_with_burst_limit(blocked_scheduler):
+    submissions = [("a", BULK)] * 3 + [("a", INTERACTIVE)] * 4
+    order = _run_order(blocked_scheduler, submissions)
+    kinds = ["i" if int(label[1:]) >= 3 else "b" for label in order]
+    assert kinds == ["i", "i", "b", "i", "i", "b", "b"]
+
+
+def test_cancelled_task_never_runs(blocked_scheduler):
+    ran = []
+    future = blocked_scheduler.submit(ran.append, "cancelled", tenant="a")
+    assert future.cancel()
+    done = blocked_scheduler.submit(ran.append, "kept", tenant="a")
+    blocked_scheduler.release()
+    done.result(timeout=5)
+    assert ran == ["kept"]
+
+
+def test_exceptions_reach_the_future():
+    scheduler = FairScheduler(max_workers=1)
+    try:
+        future = scheduler.submit(lambda: 1 / 0, tenant="a")
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+    finally:
+        scheduler.shutdown()
@@ -0,0 +1,62 @@
+"""Screening session ranking, duplicate detection and expiry"""
+from app.sessions import ScreeningSession, SessionStore, content_hash
+
+
+def _result(name, score):
+    return {"status": "success", "candidate_name": name, "match_score": score}
+
+
+def test_ranking_stays_sorted_as_results_arrive():
+    session = ScreeningSession("Backend role")
+    for name, score in [("a", 60), ("b", 90), ("c", 75), ("d", 90), ("e", None)]:
+        session.add_result(_result(name, score))
+    # Ties keep arrival order; a missing score ranks as 0
+    assert [r["candidate_name"] for r in session.top()] == ["b", "d", "c", "a", "e"]
+    assert [r["candidate_name"] for r in session.top(2)] == ["b", "d"]
+    assert session.size == 5
+
+
+def test_same_content_is_claimed_once():
+    session = ScreeningSession("Backend role")
+    file_hash = content_hash(b"%PDF resume")
+    assert session.claim_file(file_hash)
+    assert not session.claim_file(file_hash)
+    session.release_file(file_hash)
+    assert session.claim_file(file_hash)
+
+
+def test_failures_are_kept_once_per_file_and_cleared_on_success():
+    session = ScreeningSession("Backend role")
+    session.claim_file("h1")
+    session.record_failure("h1", {"status": "error", "message": "first", "filename": "a.pdf"})
+    # A failed file is released, so the retry can claim it again
+    assert session.claim_file("h1")
+    session.record_failure("h1", {"status": "error", "message": "second", "filename": "a.pdf"})
+    assert [r["message"] for r in session.failed_results] == ["second"]
+    assert session.summary()["failed_files"] == 1
+
+    session.claim_file("h1")
+    session.add_result(_result("a", 70), file_hash="h1")
+    assert session.failed_results == []
+    assert session.summary()["total_candidates"] == 1
+
+
+def test_store_expires_idle_sessions():
+    store = SessionStore(ttl_seconds=-1)
+    session = store.create("Backend role")
+    assert store.get(session.id) is None
+    assert len(store) == 0
+
+
+def test_store_evicts_least_recently_used_when_full():
+    store = SessionStore(ttl_seconds=3600, max_sessions=2)
+    first, second = store.create("one"), store.create("two")
+    first.last_access -= 10
+    second.last_access -= 5
+    store.get(first.id)
+    third = store.create("three")
+    assert store.get(second.id) is None
+    assert store.get(first.id) is first
+    assert store.get(third.id) is third
+    assert store.delete(third.id)
+    assert not store.delete(third.id)
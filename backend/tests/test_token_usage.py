@@ -0,0 +1,60 @@
+"""Per-request and daily token budgets: reserve, settle and refund"""
+import pytest
+
+from app.token_usage import RequestTokenBudget, TokenBudgetError, TokenLedger
+
+
+def test_request_budget_rejects_over_limit():
+    budget = RequestTokenBudget("t", limit=1000, ledger=TokenLedger(daily_budget=0))
+    assert budget.reserve(600) == 600
+    with pytest.raises(TokenBudgetError) as excinfo:
+        budget.reserve(500)
+    assert excinfo.value.code == "token_budget_exceeded"
+    assert budget.reserved == 600
+    assert budget.ledger.rejected_calls == 1
+
+
+def test_settle_refunds_the_unused_reservation():
+    budget = RequestTokenBudget("t", limit=1000, ledger=TokenLedger(daily_budget=0))
+    reserved = budget.reserve(600)
+    budget.settle(reserved, 200)
+    assert (budget.used, budget.reserved) == (200, 0)
+    # 200 used + 800 fits exactly
+    budget.reserve(800)
+    with pytest.raises(TokenBudgetError):
+        budget.reserve(1)
+
+
+def test_zero_limit_is_unlimited():
+    budget = RequestTokenBudget("t", limit=0, ledger=TokenLedger(daily_budget=0))
+    budget.reserve(10 ** 9)
+    assert budget.reserved == 10 ** 9
+
+
+def test_daily_budget_is_shared_across_requests():
+    ledger = TokenLedger(daily_budget=1000)
+    first = RequestTokenBudget("t", limit=0, ledger=ledger)
+    second = RequestTokenBudget("t", limit=0, ledger=ledger)
+    other_tenant = RequestTokenBudget("u", limit=0, ledger=ledger)
+
+    reserved = first.reserve(700)
+    with pytest.raises(TokenBudgetError):
+        second.reserve(400)
+    other_tenant.reserve(400)
+
+    # Settling releases the hold; only recorded usage counts afterwards
+    ledger.record({"total_tokens": 300, "model": "m"}, "jd" * 8, "t")
+    first.settle(reserved, 300)
+    assert ledger.daily_used("t") == 300
+    second.reserve(700)
+    assert ledger.daily_used("t") == 1000
+    assert second.daily_exhausted()
+
+
+def test_failed_reservation_does_not_leak_into_the_request():
+    ledger = TokenLedger(daily_budget=100)
+    budget = RequestTokenBudget("t", limit=1000, ledger=ledger)
+    with pytest.raises(TokenBudgetError):
+        budget.reserve(200)
+    assert budget.reserved == 0
+    assert ledger.daily_used("t") == 0
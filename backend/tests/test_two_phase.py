@@ -0,0 +1,87 @@
+"""Two-phase mode: the detail store and on-demand detail generation"""
+import pytest
+
+from app import pipeline
+from app.token_usage import RequestTokenBudget, TokenLedger
+from app.two_phase import DetailStore
+
+
+def test_detail_store_hit_and_miss():
+    store = DetailStore(ttl_seconds=60, max_entries=10)
+    store.put("a", "resume", "jd", "a.pdf")
+    assert store.get("a")["filename"] == "a.pdf"
+    assert store.get("missing") is None
+    store.set_details("a", {"summary": "done"})
+    assert store.get("a")["details"] == {"summary": "done"}
+    assert store.stats() == {"entries": 1, "with_details": 1}
+
+
+def test_detail_store_evicts_least_recently_used():
+    store = DetailStore(ttl_seconds=60, max_entries=2)
+    store.put("a", "resume a", "jd", "a.pdf")
+    store.put("b", "resume b", "jd", "b.pdf")
+    store.get("a")
+    store.put("c", "resume c", "jd", "c.pdf")
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+
+
+def test_detail_store_expires_entries():
+    store = DetailStore(ttl_seconds=-1, max_entries=10)
+    store.put("a", "resume", "jd", "a.pdf")
+    assert store.get("a") is None
+    assert store.stats()["entries"] == 0
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = DetailStore(ttl_seconds=60, max_entries=10)
+    store.put("d1", "resume text", "job description", "a.pdf")
+    monkeypatch.setattr(pipeline, "detail_store", store)
+    return store
+
+
+def test_generate_details_caches_the_full_analysis(store, monkeypatch):
+    calls = []
+
+    def analyze(job_description, resume_text, model=None, mode=None):
+        calls.append(mode)
+        return {"match_score": 80, "reasoning": "fits", "summary": "good", "model": "m"}
+
+    monkeypatch.setattr(pipeline, "analyze_resume_job_match_qwen", analyze)
+    first = pipeline.generate_details("d1")
+    second = pipeline.generate_details("d1")
+
+    assert calls == [pipeline.FULL_ANALYSIS]
+    assert first["cached"] is False and second["cached"] is True
+    assert second["summary"] == "good"
+    assert second["detail_match_score"] == 80
+    assert pipeline.generate_details("unknown") is None
+
+
+def test_generate_details_rejects_calls_over_budget(store, monkeypatch):
+    monkeypatch.setattr(pipeline, "analyze_resume_job_match_qwen",
+                        lambda *args: pytest.fail("over-budget call reached the model"))
+    budget = RequestTokenBudget("key:abc", limit=1, ledger=TokenLedger())
+
+    result = pipeline.generate_details("d1", token_budget=budget)
+
+    assert result["filename"] == "a.pdf"
+    assert result["error_code"]
+    assert store.get("d1")["details"] is None
+
+
+def test_generate_details_settles_the_reservation_on_failure(store, monkeypatch):
+    def analyze(*args):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(pipeline, "analyze_resume_job_match_qwen", analyze)
+    ledger = TokenLedger()
+    budget = RequestTokenBudget("key:abc", limit=100000, ledger=ledger)
+
+    with pytest.raises(RuntimeError):
+        pipeline.generate_details("d1", token_budget=budget)
+
+    assert budget.reserved == 0 and budget.used == 0
+    assert ledger.daily_used("key:abc") == 0
@@ -0,0 +1,44 @@
+"""Startup warm-up: the steps it runs and the reloader parent"""
+import pytest
+
+from app import result_history as result_history_module
+from app import warmup as warmup_module
+from app import work_queue as work_queue_module
+from app.result_history import ResultHistory
+from app.warmup import READY, WarmupState
+from app.work_queue import WorkQueue
+
+
+@pytest.fixture
+def quick_steps(monkeypatch, tmp_path):
+    # Only the database steps do real work
+    for step in ("_preload_modules", "_init_llm_client", "_ping_llm", "_load_cache",
+                 "_extract_tiny_pdf", "_start_scheduler"):
+        monkeypatch.setattr(warmup_module, step, lambda: None)
+    monkeypatch.setattr(result_history_module, "result_history",
+                        ResultHistory(str(tmp_path / "history.db"), seed_from_cache=False))
+    monkeypatch.setattr(work_queue_module, "work_queue", WorkQueue(str(tmp_path / "queue.db")))
+
+
+def test_warmup_opens_the_history_and_queue_databases(quick_steps, tmp_path):
+    state = WarmupState()
+    state.start(background=False)
+
+    assert state.components["result_history"]["status"] == READY
+    assert state.components["work_queue"]["status"] == READY
+    assert state.components["work_queue"]["detail"] == {"queued": 0}
+    assert (tmp_path / "history.db").exists() and (tmp_path / "queue.db").exists()
+    assert state.is_ready()
+
+
+def test_reloader_parent_skips_warmup(quick_steps, monkeypatch):
+    monkeypatch.setattr(warmup_module, "USE_RELOADER", True)
+    monkeypatch.delenv("WERKZEUG_RUN_MAIN", raising=False)
+    parent = WarmupState()
+    parent.start(background=False)
+    assert parent.components == {}
+
+    monkeypatch.setenv("WERKZEUG_RUN_MAIN", "true")
+    child = WarmupState()
+    child.start(background=False)
+    assert child.components["result_history"]["status"] == READY
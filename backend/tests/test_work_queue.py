@@ -0,0 +1,83 @@
+"""Durable work queue: leases, redelivery, retry limits and purging"""
+import time
+
+import pytest
+
+from app.work_queue import DONE, FAILED, QUEUED, LeaseLostError, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+
+
+def _files(*names):
+    return [{"filename": name, "data": name.encode()} for name in names]
+
+
+def _expire_leases(queue):
+    queue._conn().execute("UPDATE tasks SET lease_expires_at = ?", (time.time() - 1,))
+
+
+def test_lease_complete_and_read_back_in_upload_order(queue):
+    batch_id = queue.enqueue_batch("jd", _files("a.pdf", "b.pdf"), {"mock": True})
+    first = queue.lease("w1")
+    second = queue.lease("w1")
+    assert (first["filename"], second["filename"]) == ("a.pdf", "b.pdf")
+    assert first["data"] == b"a.pdf"
+    assert first["options"] == {"mock": True}
+    assert queue.lease("w1") is None
+
+    queue.complete(second["id"], "w1", {"status": "success", "filename": "b.pdf"})
+    queue.complete(first["id"], "w1", {"status": "success", "filename": "a.pdf"})
+    batch = queue.get_batch(batch_id)
+    assert batch["done"]
+    assert batch["counts"][DONE] == 2
+    assert [r["filename"] for r in batch["results"]] == ["a.pdf", "b.pdf"]
+
+
+def test_expired_lease_is_redelivered(queue):
+    queue.enqueue_batch("jd", _files("a.pdf"))
+    task = queue.lease("w1")
+    _expire_leases(queue)
+
+    redelivered = queue.lease("w2")
+    assert redelivered["id"] == task["id"]
+    assert redelivered["attempts"] == 2
+    # The first worker no longer holds the task
+    with pytest.raises(LeaseLostError):
+        queue.heartbeat(task["id"], "w1")
+    with pytest.raises(LeaseLostError):
+        queue.complete(task["id"], "w1", {"status": "success"})
+    queue.heartbeat(task["id"], "w2")
+    queue.complete(task["id"], "w2", {"status": "success"})
+
+
+def test_task_fails_after_max_attempts(queue):
+    batch_id = queue.enqueue_batch("jd", _files("a.pdf"))
+    for worker in ("w1", "w2"):
+        assert queue.lease(worker) is not None
+        _expire_leases(queue)
+    assert queue.lease("w3") is None
+
+    batch = queue.get_batch(batch_id)
+    assert batch["counts"][FAILED] == 1
+    assert batch["done"]
+    assert batch["results"][0]["status"] == "error"
+    assert "2 delivery attempts" in batch["results"][0]["message"]
+
+
+def test_purge_removes_only_old_finished_tasks(queue):
+    queue.enqueue_batch("jd", _files("done.pdf", "queued.pdf"))
+    task = queue.lease("w1")
+    queue.complete(task["id"], "w1", {"status": "success"})
+
+    assert queue.purge_finished(older_than_seconds=3600) == 0
+    queue._conn().execute("UPDATE tasks SET updated_at = updated_at - 7200")
+    assert queue.purge_finished(older_than_seconds=3600) == 1
+    assert queue.stats()["counts"][QUEUED] == 1
+
+
+def test_unknown_batch(queue):
+    assert queue.get_batch("missing") is None
+    assert queue.batch_counts("missing") is None
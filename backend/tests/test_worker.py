@@ -0,0 +1,65 @@
+"""Standalone worker: token budgets of queued tasks"""
+import io
+
+import pytest
+
+from app import main
+from app import worker as worker_module
+from app.token_usage import TOKEN_REQUEST_BUDGET, token_ledger
+from app.work_queue import WorkQueue
+from app.worker import Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+
+
+def test_tasks_run_under_their_batch_token_budget(queue, monkeypatch):
+    budgets = []
+
+    def process_resume_path(path, filename, job_description, mock=False, token_budget=None):
+        budgets.append(token_budget)
+        return {"status": "success", "filename": filename}
+
+    monkeypatch.setattr(worker_module, "process_resume_path", process_resume_path)
+    batch_id = queue.enqueue_batch("jd", [{"filename": f"{i}.pdf", "data": b"%PDF"} for i in range(2)],
+                                   {"mock": False, "tenant": "key:abc", "token_budget": 5000})
+    Worker(queue, poll_seconds=0).run(once=True)
+
+    assert len(budgets) == 2
+    assert budgets[0] is budgets[1]
+    assert (budgets[0].tenant, budgets[0].limit) == ("key:abc", 5000)
+    assert queue.get_batch(batch_id)["counts"]["done"] == 2
+
+
+def test_batches_get_their_own_budget():
+    worker = Worker(queue=None)
+    first = worker.token_budget({"batch_id": "a", "options": {"tenant": "t1", "token_budget": 100}})
+    assert worker.token_budget({"batch_id": "a", "options": {}}) is first
+    # Batches queued before budgets were stored fall back to the defaults
+    other = worker.token_budget({"batch_id": "b", "options": {}})
+    assert other is not first
+    assert (other.tenant, other.limit) == ("anonymous", TOKEN_REQUEST_BUDGET)
+
+
+def test_enqueue_stores_the_budget_and_refuses_spent_tenants(queue, monkeypatch):
+    monkeypatch.setattr(main, "work_queue", queue)
+    client = main.app.test_client()
+
+    def enqueue(user):
+        return client.post("/api/jobs?token_budget=700", headers={"X-User-Id": user}, data={
+            "job_description": "Backend role",
+            "file": (io.BytesIO(b"%PDF-1.4"), "a.pdf", "application/pdf"),
+        })
+
+    response = enqueue("worker-test-ok")
+    assert response.status_code == 202
+    task = queue.lease("test")
+    assert task["options"] == {"mock": False, "tenant": "user:worker-test-ok", "token_budget": 700}
+
+    monkeypatch.setattr(token_ledger, "daily_budget", 10)
+    token_ledger.record({"prompt_tokens": 5, "completion_tokens": 5, "total_tokens": 10}, "jd", "user:worker-test-spent")
+    response = enqueue("worker-test-spent")
+    assert response.status_code == 429
+    assert response.get_json()["error_code"] == "token_budget_exceeded"
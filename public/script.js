@@ -10,6 +10,8 @@ let uploadedFiles = [];
 let processedFiles = new Set(); // Track files that have been processed
 let previousResults = []; // Store previous analysis results for collapsed display
 let filesEverUploaded = false; // Track if files have ever been uploaded in this session
+let screeningSessionId = null; // Server-side session that keeps the ranking for the current job description
+let stagedFiles = new Map(); // fileId -> promise of the pre-staged upload ({ handle, expiresAt } or null)
 
 // Function to sort previous results by score (high to low) then by firstname alphabetically
 function sortPreviousResults(results) {
@@ -135,6 +137,7 @@ function handleFiles(files) {
     const validTypes = ['application/pdf', 'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'];
     const maxFileSize = 10 * 1024 * 1024; // 10MB
 
+    const acceptedFiles = [];
     Array.from(files).forEach(file => {
         // Create a unique identifier for the file
         const fileId = `${file.name}_${file.size}_${file.lastModified}`;
@@ -163,16 +166,72 @@ function handleFiles(files) {
         
         // Add file to upload queue
         uploadedFiles.push(file);
+        acceptedFiles.push(file);
         
         // Mark that files have been uploaded in this session
         filesEverUploaded = true;
         console.log('📁 File uploaded, filesEverUploaded set to true');
     });
 
+    // Upload and extract in the background while the user finishes up
+    prestageFiles(acceptedFiles);
+
     updateUploadDisplay();
     updateScreenButton();
 }
 
+// Send files to /api/prestage as soon as they are selected.
+// The server extracts them in the background and returns handles the analyze call can reference.
+function prestageFiles(files) {
+    const pdfFiles = files.filter(file => file.type === 'application/pdf');
+    if (pdfFiles.length === 0) {
+        return;
+    }
+    
+    const formData = new FormData();
+    pdfFiles.forEach(file => formData.append('file', file));
+    
+    const request = fetch(`${getApiBaseUrl()}/api/prestage`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.ok ? response.json() : null)
+    .then(data => {
+        const staged = data && data.files ? data.files : [];
+        console.log('📦 Pre-staged files:', staged.map(f => f.handle));
+        return staged;
+    })
+    .catch(error => {
+        console.warn('⚠️ Pre-staging failed, files will be uploaded on analyze:', error.message);
+        return [];
+    });
+    
+    // Rejected files are left out of the response, so match handles by the name sent and the size
+    pdfFiles.forEach(file => {
+        stagedFiles.set(getFileId(file), request.then(staged => {
+            const match = staged.find(f => f.upload_name === file.name && f.size === file.size);
+            return match ? {
+                handle: match.handle,
+                expiresAt: Date.now() + match.expires_in_seconds * 1000
+            } : null;
+        }));
+    });
+}
+
+// Resolve a file's pre-staged handle, or null if it has to be uploaded
+function getStagedHandle(file) {
+    const entry = stagedFiles.get(getFileId(file));
+    if (!entry) {
+        return Promise.resolve(null);
+    }
+    // Leave a margin so the handle does not expire before the server reads it
+    return entry.then(staged => staged && staged.expiresAt - Date.now() > 10000 ? staged.handle : null);
+}
+
+function getFileId(file) {
+    return `${file.name}_${file.size}_${file.lastModified}`;
+}
+
 function showUploadTooltip() {
     // Remove any existing tooltip
     const existingTooltip = document.querySelector('.upload-tooltip');
@@ -294,7 +353,10 @@ function updateUploadDisplay() {
 }
 
 function removeFile(index) {
-    uploadedFiles.splice(index, 1);
+    const [removed] = uploadedFiles.splice(index, 1);
+    if (removed) {
+        stagedFiles.delete(getFileId(removed));
+    }
     updateUploadDisplay();
     updateScreenButton();
     
@@ -635,8 +697,17 @@ function closeModal() {
     }
 }
 
-function exportResults() {
-    alert('Export functionality would be implemented here. Results would be downloaded as CSV or PDF.');
+// Download the current session's ranking (or the stored history when there is no session) as a spreadsheet
+function exportResults(format = 'xlsx') {
+    const exportPath = screeningSessionId
+        ? `/api/sessions/${screeningSessionId}/export`
+        : '/api/history/export';
+    const link = document.createElement('a');
+    link.href = `${getApiBaseUrl()}${exportPath}?format=${format}&sort=match_score`;
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
 }
 
 // Mobile Menu Functionality
@@ -773,14 +844,22 @@ function callUploadAPI() {
     }
 
     // Create FormData for file upload
-    const formData = new FormData();
-    
-    // Add job description
-    formData.append('job_description', jobDescription);
-    
-    // Add all uploaded files
-    uploadedFiles.forEach(file => {
-        formData.append('file', file);
+    // Pre-staged files are referenced by handle; the rest are uploaded now
+    const filesToSend = uploadedFiles.slice();
+    const formDataReady = Promise.all(filesToSend.map(getStagedHandle)).then(handles => {
+        const formData = new FormData();
+        
+        // Add job description
+        formData.append('job_description', jobDescription);
+        
+        filesToSend.forEach((file, index) => {
+            if (handles[index]) {
+                formData.append('handle', handles[index]);
+            } else {
+                formData.append('file', file);
+            }
+        });
+        return formData;
     });
 
     // IMPORTANT: Save existing results BEFORE showing loading state
@@ -838,25 +917,32 @@ function callUploadAPI() {
         status: "loading"
     });
 
-    // Determine API URL based on environment
-    const getApiUrl = () => {
-        // Check if we're in production (deployed)
-        if (window.location.hostname !== 'localhost' && window.location.hostname !== '127.0.0.1') {
-            // Production: use the same hostname as the frontend
-            return `${window.location.protocol}//${window.location.hostname}/api/upload-resume`;
-        } else {
-            // Development: use localhost
-            return 'http://localhost:8000/api/upload-resume';
-        }
-    };
-    
-    const apiUrl = getApiUrl();
-    
-    console.log('📡 Calling API:', apiUrl);
-    
-    fetch(apiUrl, {
-        method: 'POST',
-        body: formData
+    // Only the newly selected files are sent; the server merges them into the session ranking
+    Promise.all([ensureScreeningSession(jobDescription), formDataReady])
+    .then(([sessionId, formData]) => {
+        const apiUrl = sessionId
+            ? `${getApiBaseUrl()}/api/sessions/${sessionId}/files`
+            : `${getApiBaseUrl()}/api/upload-resume`;
+        
+        console.log('📡 Calling API:', apiUrl);
+        
+        return fetch(apiUrl, {
+            method: 'POST',
+            body: formData
+        }).then(response => {
+            if (response.status === 404 && sessionId) {
+                // Session expired on the server - start a new one and retry once
+                console.warn('⚠️ Screening session expired, creating a new one');
+                screeningSessionId = null;
+                return ensureScreeningSession(jobDescription).then(newSessionId => fetch(
+                    newSessionId
+                        ? `${getApiBaseUrl()}/api/sessions/${newSessionId}/files`
+                        : `${getApiBaseUrl()}/api/upload-resume`,
+                    { method: 'POST', body: formData }
+                ));
+            }
+            return response;
+        });
     })
     .then(response => {
         console.log('📡 API Response status:', response.status);
@@ -884,6 +970,15 @@ function callUploadAPI() {
                 showMultipleAnalysisResults(data);
                 
                 // Mark all uploaded files as processed
+                uploadedFiles.forEach(file => {
+                    const fileId = `${file.name}_${file.size}_${file.lastModified}`;
+                    processedFiles.add(fileId);
+                });
+            } else if (Array.isArray(data.results)) {
+                // Every file was a duplicate the session had already screened - nothing new to show
+                console.log('🗂️ All files already screened in this session:', data.skipped_files);
+                showSkippedFilesMessage(data, existingResult ? previousResults.pop() : null);
+                
                 uploadedFiles.forEach(file => {
                     const fileId = `${file.name}_${file.size}_${file.lastModified}`;
                     processedFiles.add(fileId);
@@ -913,6 +1008,7 @@ function callUploadAPI() {
             }
             
             // Clear the upload queue since files have been processed
+            uploadedFiles.forEach(file => stagedFiles.delete(getFileId(file)));
             uploadedFiles = [];
             
             // Note: Job input remains disabled permanently after files are uploaded
@@ -945,6 +1041,70 @@ function callUploadAPI() {
     });
 }
 
+// Tell the user that the selected files were skipped, putting back the result that was on screen
+function showSkippedFilesMessage(data, restoredResult) {
+    const skipped = data.skipped_files || [];
+    const message = skipped.length > 0
+        ? `Already screened in this session: ${skipped.join(', ')}`
+        : (data.message || 'All files were already screened in this session');
+    
+    if (restoredResult) {
+        showAnalysisResults(restoredResult);
+        alert(message);
+        return;
+    }
+    
+    const resultContent = document.getElementById('resultSection').querySelector('.result-content');
+    resultContent.innerHTML = `
+        <div class="results-right-panel">
+            <div class="results-right-content">
+                <div class="analysis-results">
+                    <div class="error-state">
+                        <i class="fas fa-info-circle"></i>
+                        <h3>Nothing New to Analyze</h3>
+                        <p>${message}</p>
+                    </div>
+                </div>
+            </div>
+        </div>
+    `;
+}
+
+// Determine API base URL based on environment
+function getApiBaseUrl() {
+    // Check if we're in production (deployed)
+    if (window.location.hostname !== 'localhost' && window.location.hostname !== '127.0.0.1') {
+        // Production: use the same hostname as the frontend
+        return `${window.location.protocol}//${window.location.hostname}`;
+    }
+    // Development: use localhost
+    return 'http://localhost:8000';
+}
+
+// Create the server-side screening session on first use.
+// Resolves to null if sessions are unavailable so callers can fall back to /api/upload-resume.
+function ensureScreeningSession(jobDescription) {
+    if (screeningSessionId) {
+        return Promise.resolve(screeningSessionId);
+    }
+    
+    return fetch(`${getApiBaseUrl()}/api/sessions`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ job_description: jobDescription })
+    })
+    .then(response => response.ok ? response.json() : null)
+    .then(data => {
+        screeningSessionId = data && data.session_id ? data.session_id : null;
+        console.log('🗂️ Screening session:', screeningSessionId);
+        return screeningSessionId;
+    })
+    .catch(error => {
+        console.warn('⚠️ Could not create screening session, using direct upload:', error.message);
+        return null;
+    });
+}
+
 function displayAPIResponse(data) {
     const resultSection = document.getElementById('resultSection');
     const resultContent = resultSection.querySelector('.result-content');